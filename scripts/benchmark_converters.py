@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Converter Benchmark - Speed and fidelity of README <-> Notion conversion
+Runs markdown -> blocks -> markdown over a synthetic corpus and reports
+throughput, memory, push request counts and round-trip diffs as JSON
+"""
+
+import json
+import time
+import random
+import difflib
+import platform
+import subprocess
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from markdown_to_notion import markdown_to_blocks
+from notion_chunking import MAX_REQUEST_BYTES, payload_size, plan_appends
+from notion_to_markdown import blocks_to_markdown
+
+BASE_DIR = Path(__file__).parent.parent
+
+DEFAULT_SIZES = ["1K", "10K", "100K", "1M", "5M"]
+
+WORDS = ("elf portal cocktail lodge permit venue guest story magic staff budget vendor "
+         "cinnamon lantern sleigh ribbon winter hearth garland toast surprise workshop").split()
+
+
+def parse_size(size: str) -> int:
+    units = {"K": 1_000, "M": 1_000_000}
+    size = size.strip().upper()
+    return int(float(size[:-1]) * units[size[-1]]) if size[-1] in units else int(size)
+
+
+class CorpusGenerator:
+    """Deterministic synthetic READMEs shaped like the project docs"""
+
+    def __init__(self, seed: int = 1225):
+        self.rng = random.Random(seed)
+
+    def _sentence(self, words: int = 12) -> str:
+        text = " ".join(self.rng.choice(WORDS) for _ in range(words))
+        # Sprinkle inline formatting
+        roll = self.rng.random()
+        if roll < 0.2:
+            text = text.replace(" ", " **", 1).replace(" ", "** ", 2).replace("** ", " ", 1)
+        elif roll < 0.3:
+            text += f" `{self.rng.choice(WORDS)}`"
+        elif roll < 0.4:
+            text += f" [{self.rng.choice(WORDS)}](https://example.com/{self.rng.choice(WORDS)})"
+        elif roll < 0.45:
+            text += f" *{self.rng.choice(WORDS)}*"
+        return text.capitalize() + "."
+
+    def _nested_list(self, depth: int, prefix: str = "") -> List[str]:
+        lines = []
+        for _ in range(self.rng.randint(2, 4)):
+            lines.append(f"{prefix}- {self._sentence(6)}")
+            if depth > 1:
+                lines.extend(self._nested_list(depth - 1, prefix + "  "))
+        return lines
+
+    def _section(self) -> List[str]:
+        kind = self.rng.random()
+        lines = [f"## {self._sentence(3).rstrip('.')}", ""]
+
+        if kind < 0.35:
+            lines += [self._sentence(self.rng.randint(15, 60)), ""]
+        elif kind < 0.55:
+            lines += [f"- {self._sentence(8)}" for _ in range(self.rng.randint(3, 12))] + [""]
+        elif kind < 0.65:
+            lines += [f"{n}. {self._sentence(8)}" for n in range(1, self.rng.randint(3, 9))] + [""]
+        elif kind < 0.75:
+            lines += self._nested_list(self.rng.randint(2, 5)) + [""]
+        elif kind < 0.82:
+            lines += ["| Item | Owner | Status |", "| --- | --- | --- |"]
+            lines += [f"| {self._sentence(3)} | {self.rng.choice(WORDS)} | {self.rng.choice(WORDS)} |"
+                      for _ in range(self.rng.randint(2, 8))] + [""]
+        elif kind < 0.9:
+            lines += ["```python"] + [f"step_{i} = '{self._sentence(5)}'"
+                                      for i in range(self.rng.randint(5, 40))] + ["```", ""]
+        else:
+            lines += [f"> {self._sentence(10)}" for _ in range(self.rng.randint(1, 3))] + [""]
+
+        return lines
+
+    def readme(self, target_bytes: int) -> str:
+        lines = [f"# {self._sentence(4).rstrip('.')}", ""]
+        size = 0
+        while size < target_bytes:
+            section = self._section()
+            size += sum(len(line) + 1 for line in section)
+            lines += section
+        return "\n".join(lines).rstrip("\n") + "\n"
+
+    def deep_list(self, target_bytes: int, depth: int = 8) -> str:
+        lines = ["# Deeply nested checklist", ""]
+        size = 0
+        while size < target_bytes:
+            chunk = self._nested_list(depth)[:200]
+            size += sum(len(line) + 1 for line in chunk)
+            lines += chunk
+        return "\n".join(lines) + "\n"
+
+    def long_code(self, target_bytes: int) -> str:
+        body = []
+        size = 0
+        while size < target_bytes:
+            line = f"    print('{self._sentence(10)}')"
+            size += len(line) + 1
+            body.append(line)
+        return "# Long code block\n\n```python\ndef run():\n" + "\n".join(body) + "\n```\n"
+
+    def large_code(self, target_bytes: int, block_bytes: int = 150_000) -> str:
+        """Several big fenced blocks; together they overflow one request's byte limit"""
+        sections = ["# Large code blocks", ""]
+        size = 0
+        while size < target_bytes:
+            body = []
+            block = 0
+            while block < block_bytes:
+                line = f"log(\"{self._sentence(10)}\")"
+                block += len(line) + 1
+                body.append(line)
+            size += block
+            sections += ["```python"] + body + ["```", ""]
+        return "\n".join(sections).rstrip("\n") + "\n"
+
+    def nested_emphasis(self, paragraphs: int = 200) -> str:
+        """Paragraphs of emphasis nested inside emphasis; should round-trip unchanged"""
+        shapes = ["*{} **{}** {}*", "**{} *{}* {}**", "***{}***", "~~{} **{}** {}~~",
+                  "*{} `{}` {}*", "*{} **{}***", "[**{}**](https://example.com/{})"]
+        lines = ["# Nested emphasis", ""]
+        for _ in range(paragraphs):
+            shape = self.rng.choice(shapes)
+            words = [self.rng.choice(WORDS) for _ in range(shape.count("{}"))]
+            lines += [f"{self._sentence(5)} {shape.format(*words)} {self.rng.choice(WORDS)}.", ""]
+        return "\n".join(lines).rstrip("\n") + "\n"
+
+    def corpus(self, sizes: List[str]) -> List[Tuple[str, str]]:
+        documents = []
+        for size in sizes:
+            target = parse_size(size)
+            documents.append((f"readme_{size}", self.readme(target)))
+        smallest = parse_size(sizes[0]) if sizes else 1_000
+        documents.append(("deep_list", self.deep_list(max(smallest, 20_000))))
+        documents.append(("long_code", self.long_code(max(smallest, 50_000))))
+        documents.append(("large_code", self.large_code(max(smallest, 1_000_000))))
+        documents.append(("nested_emphasis", self.nested_emphasis()))
+        return documents
+
+
+def count_blocks(blocks: List[Dict]) -> int:
+    total = 0
+    for block in blocks:
+        total += 1
+        body = block.get(block["type"], {})
+        total += count_blocks(body.get("children", []))
+    return total
+
+
+def timed(func, *args, rounds: int = 3):
+    """Best wall time over rounds, plus the last result"""
+    best = None
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(func, *args) -> Tuple[int, int]:
+    """Peak traced bytes and number of live allocations at the peak run's end"""
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del result
+    return peak, allocations
+
+
+def round_trip_diff(original: str, rendered: str, sample_lines: int = 20) -> Dict:
+    diff = list(difflib.unified_diff(original.splitlines(), rendered.splitlines(),
+                                     "original", "round_trip", lineterm="", n=0))
+    changes = [line for line in diff if line[:1] in "+-" and line[:3] not in ("+++", "---")]
+    return {
+        "identical": original == rendered,
+        "changed_lines": len(changes),
+        "sample": diff[:sample_lines]
+    }
+
+
+def benchmark_document(name: str, markdown: str, rounds: int) -> Dict:
+    size = len(markdown.encode("utf-8"))
+    size_mb = size / 1_000_000
+
+    compile_time, blocks = timed(markdown_to_blocks, markdown, rounds=rounds)
+    render_time, rendered = timed(blocks_to_markdown, blocks, rounds=rounds)
+    compile_peak, compile_allocs = peak_memory(markdown_to_blocks, markdown)
+    render_peak, render_allocs = peak_memory(blocks_to_markdown, blocks)
+
+    plan = plan_appends(blocks)
+    largest_request = max((payload_size({"children": r["children"]}) for r in plan), default=0)
+    if largest_request > MAX_REQUEST_BYTES:
+        print(f"[WARN] {name}: a {largest_request:,} byte request is over Notion's limit")
+
+    # A second trip should change nothing if conversion is stable
+    stable = blocks_to_markdown(markdown_to_blocks(rendered)) == rendered
+
+    result = {
+        "name": name,
+        "bytes": size,
+        "lines": markdown.count("\n"),
+        "top_level_blocks": len(blocks),
+        "total_blocks": count_blocks(blocks),
+        "push_requests": len(plan),
+        "largest_request_bytes": largest_request,
+        "markdown_to_blocks": {
+            "seconds": round(compile_time, 6),
+            "mb_per_s": round(size_mb / compile_time, 3) if compile_time else None,
+            "peak_bytes": compile_peak,
+            "live_allocations": compile_allocs
+        },
+        "blocks_to_markdown": {
+            "seconds": round(render_time, 6),
+            "mb_per_s": round(size_mb / render_time, 3) if render_time else None,
+            "peak_bytes": render_peak,
+            "live_allocations": render_allocs
+        },
+        "round_trip": round_trip_diff(markdown, rendered),
+        "stable_after_one_trip": stable
+    }
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=BASE_DIR).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_suite(sizes: List[str], rounds: int, include_docs: bool) -> Dict:
+    documents = CorpusGenerator().corpus(sizes)
+    if include_docs:
+        for readme in sorted((BASE_DIR / "Docs").glob("*/README.md")):
+            documents.append((f"docs/{readme.parent.name}", readme.read_text(encoding="utf-8")))
+
+    results = []
+    for name, markdown in documents:
+        print(f"[BENCH] {name} ({len(markdown):,} chars)...")
+        results.append(benchmark_document(name, markdown, rounds))
+
+    return {
+        "generated": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "rounds": rounds,
+        "results": results
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n{'document':<28}{'KB':>9}{'blocks':>9}{'reqs':>6}{'md>blk MB/s':>13}"
+          f"{'blk>md MB/s':>13}{'peak MB':>9}{'diff':>7}{'stable':>8}")
+    for r in report["results"]:
+        peak = max(r["markdown_to_blocks"]["peak_bytes"], r["blocks_to_markdown"]["peak_bytes"])
+        print(f"{r['name']:<28}{r['bytes'] / 1000:>9.1f}{r['total_blocks']:>9,}{r['push_requests']:>6}"
+              f"{r['markdown_to_blocks']['mb_per_s'] or 0:>13.2f}{r['blocks_to_markdown']['mb_per_s'] or 0:>13.2f}"
+              f"{peak / 1_000_000:>9.1f}{r['round_trip']['changed_lines']:>7}"
+              f"{'yes' if r['stable_after_one_trip'] else 'NO':>8}")
+
+
+def compare(old_file: Path, new_file: Path):
+    """Print per-document deltas between two JSON reports"""
+    with open(old_file, 'r') as f:
+        old = {r["name"]: r for r in json.load(f)["results"]}
+    with open(new_file, 'r') as f:
+        new = json.load(f)
+
+    print(f"\n{'document':<28}{'md>blk':>10}{'blk>md':>10}{'reqs':>8}{'diff lines':>12}")
+    for r in new["results"]:
+        before = old.get(r["name"])
+        if not before:
+            print(f"{r['name']:<28}  (new)")
+            continue
+
+        def speedup(key):
+            a, b = before[key]["seconds"], r[key]["seconds"]
+            return f"{a / b:.2f}x" if b else "-"
+
+        print(f"{r['name']:<28}{speedup('markdown_to_blocks'):>10}{speedup('blocks_to_markdown'):>10}"
+              f"{r['push_requests'] - before['push_requests']:>+8}"
+              f"{r['round_trip']['changed_lines'] - before['round_trip']['changed_lines']:>+12}")
+
+
+def main():
+    """CLI interface"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark README <-> Notion converters")
+    parser.add_argument('--sizes', default=",".join(DEFAULT_SIZES),
+                        help='Synthetic README sizes, e.g. 1K,100K,5M')
+    parser.add_argument('--rounds', type=int, default=3, help='Timing rounds per document')
+    parser.add_argument('--no-docs', action='store_true', help='Skip the real Docs/*/README.md files')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two JSON reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(Path(args.compare[0]), Path(args.compare[1]))
+        return
+
+    report = run_suite([s for s in args.sizes.split(",") if s], args.rounds, not args.no_docs)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
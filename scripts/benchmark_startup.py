@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Import cost of the CLI modules
+Runs `python -X importtime -c "import <module>"` for each module, checks the
+result against a time budget and flags heavy dependencies loaded on import
+"""
+
+import sys
+import json
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+SCRIPTS_DIR = Path(__file__).parent
+
+# Milliseconds of cumulative import time allowed per module
+BUDGETS_MS = {
+    "notion": 25,
+    "notion_task_manager": 25,
+    "generate_tasks_md": 25,
+    "notion_client": 10,
+    "pipeline": 40,
+    "start_work": 40,
+    "notion_daemon": 50,
+    "web_service": 40,
+}
+
+# Only needed once a request is made or the web app is built
+HEAVY_MODULES = ("requests", "urllib3", "flask", "flask_cors", "dotenv")
+
+
+def import_profile(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds for every package a fresh import loads"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=SCRIPTS_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-500:]}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def measure(module: str, rounds: int) -> Dict:
+    profiles = [import_profile(module) for _ in range(rounds)]
+    ms = statistics.median(p.get(module, 0) for p in profiles) / 1000
+    budget = BUDGETS_MS.get(module)
+    return {
+        "module": module,
+        "import_ms": round(ms, 1),
+        "budget_ms": budget,
+        "over_budget": budget is not None and ms > budget,
+        "heavy_imports": [name for name in HEAVY_MODULES if name in profiles[0]]
+    }
+
+
+def run_suite(modules: List[str], rounds: int) -> List[Dict]:
+    return [measure(module, rounds) for module in modules]
+
+
+def print_report(results: List[Dict]):
+    print(f"\n{'Module':<24}{'Import':>10}{'Budget':>10}  Heavy imports")
+    print("-" * 64)
+    for r in results:
+        budget = f"{r['budget_ms']}ms" if r['budget_ms'] is not None else "-"
+        flag = "  OVER" if r['over_budget'] else ""
+        print(f"{r['module']:<24}{r['import_ms']:>8.1f}ms{budget:>10}  "
+              f"{', '.join(r['heavy_imports']) or '-'}{flag}")
+
+
+def main():
+    """CLI interface"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check CLI module import times against budgets")
+    parser.add_argument('modules', nargs='*', help='Modules to measure (default: all budgeted modules)')
+    parser.add_argument('--rounds', type=int, default=5, help='Fresh interpreters per module (median is used)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    results = run_suite(args.modules or list(BUDGETS_MS), args.rounds)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+
+    over = [r["module"] for r in results if r["over_budget"]]
+    if over:
+        print(f"\n[ERROR] Over budget: {', '.join(over)}")
+        sys.exit(1)
+    print("\n[OK] All modules within budget")
+
+
+if __name__ == "__main__":
+    main()
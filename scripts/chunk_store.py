@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Chunk Store - Content-addressed storage for snapshots and README backups
+Files are split into chunks at markdown headings and each distinct chunk is
+stored once under store/, so a snapshot or backup kept this way costs a
+small manifest plus whatever chunks it doesn't share with earlier ones
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import hashlib
+import threading
+from pathlib import Path
+from typing import List, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+STORE_DIR = BASE_DIR / "store"
+SNAPSHOTS_DIR = BASE_DIR / "snapshots"
+BACKUP_DIR = BASE_DIR / "backups"
+DOCS_DIR = BASE_DIR / "Docs"
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Chunks end before a heading once they reach MIN_CHUNK bytes, so edits only
+# touch the chunks around them; MAX_CHUNK bounds chunks in heading-free text.
+# Much smaller chunks dedupe no better on snapshots and cost a filesystem
+# block each
+MIN_CHUNK = 4 * 1024
+MAX_CHUNK = 32 * 1024
+HEADING = re.compile(rb"^#{1,3} ", re.MULTILINE)
+
+# gc leaves recently written chunks alone, in case a manifest using them is
+# being written right now
+GC_GRACE_SECONDS = 3600
+
+
+def manifest_path(path: Path) -> Path:
+    return path.with_name(path.name + MANIFEST_SUFFIX)
+
+
+def split_chunks(data: bytes) -> List[bytes]:
+    """Cut data before headings (at least MIN_CHUNK apart) and at line ends past MAX_CHUNK"""
+    chunks = []
+    start = 0
+    for match in HEADING.finditer(data):
+        cut = match.start()
+        while cut - start > MAX_CHUNK:
+            end = data.rfind(b"\n", start, start + MAX_CHUNK) + 1 or start + MAX_CHUNK
+            chunks.append(data[start:end])
+            start = end
+        if cut - start >= MIN_CHUNK:
+            chunks.append(data[start:cut])
+            start = cut
+    while len(data) - start > MAX_CHUNK:
+        end = data.rfind(b"\n", start, start + MAX_CHUNK) + 1 or start + MAX_CHUNK
+        chunks.append(data[start:end])
+        start = end
+    if start < len(data) or not chunks:
+        chunks.append(data[start:])
+    return chunks
+
+
+class ChunkStore:
+    """
+    store/<ab>/<sha256>: zlib-compressed chunks, named by the sha256 of
+    their uncompressed bytes.
+
+    A stored file is a manifest next to where the file would be
+    (README_20250925_124033.md.manifest.json) listing its chunks in order.
+    Reads take the plain file when it exists, otherwise reassemble the
+    manifest, so callers don't care which form a file is in.
+    """
+
+    def __init__(self, root: Path = STORE_DIR, manifest_roots: Tuple[Path, ...] = (SNAPSHOTS_DIR, BACKUP_DIR)):
+        self.root = root
+        self.manifest_roots = manifest_roots
+        self._lock = threading.Lock()
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _write_chunk(self, chunk: bytes) -> Tuple[str, int]:
+        """(digest, bytes written): nothing is written for a chunk already stored"""
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._chunk_path(digest)
+        try:
+            os.utime(path)  # keep gc's grace period from expiring it
+            return digest, 0
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = zlib.compress(chunk, 9)
+        tmp = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(compressed)
+        os.replace(tmp, path)
+        return digest, len(compressed)
+
+    def put(self, path: Path, data: bytes) -> int:
+        """Store data as path's manifest; returns the bytes of new chunks written"""
+        written = [self._write_chunk(chunk) for chunk in split_chunks(data)]
+        digests = [digest for digest, _ in written]
+        manifest = {"size": len(data), "sha256": hashlib.sha256(data).hexdigest(), "chunks": digests}
+        target = manifest_path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, target)
+        return sum(size for _, size in written)
+
+    def pack(self, path: Path) -> bool:
+        """Replace a plain file with its manifest; False if it isn't a plain file"""
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return False
+        self.put(path, data)
+        # Only drop the plain copy once the manifest reads back to the same bytes
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            digests = json.load(f)["chunks"]
+        if b"".join(zlib.decompress(self._chunk_path(d).read_bytes()) for d in digests) != data:
+            manifest_path(path).unlink()
+            raise ValueError(f"{path.name} did not reassemble from the store; kept the plain file")
+        path.unlink()
+        return True
+
+    def read(self, path: Path) -> bytes:
+        """A file's bytes, reassembled from chunks if it was packed"""
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            pass
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        data = b"".join(zlib.decompress(self._chunk_path(d).read_bytes()) for d in manifest["chunks"])
+        if hashlib.sha256(data).hexdigest() != manifest["sha256"]:
+            raise ValueError(f"{path.name} reassembled to different content than was stored")
+        return data
+
+    def read_text(self, path: Path) -> str:
+        return self.read(path).decode("utf-8")
+
+    def exists(self, path: Path) -> bool:
+        return path.exists() or manifest_path(path).exists()
+
+    def on_disk(self, path: Path) -> Path:
+        """The file actually holding path: itself, or its manifest"""
+        return path if path.exists() else manifest_path(path)
+
+    def listing(self, directory: Path, pattern: str) -> List[Path]:
+        """Sorted paths matching pattern in directory, plain or packed"""
+        found = set(directory.glob(pattern))
+        found.update(m.with_name(m.name[:-len(MANIFEST_SUFFIX)])
+                     for m in directory.glob(pattern + MANIFEST_SUFFIX))
+        return sorted(found)
+
+    def delete(self, path: Path):
+        """Remove a file in either form (its chunks go at the next gc)"""
+        path.unlink(missing_ok=True)
+        manifest_path(path).unlink(missing_ok=True)
+
+    def gc(self) -> Tuple[int, int]:
+        """Delete chunks no manifest refers to; returns (chunks, bytes) freed"""
+        with self._lock:
+            referenced = set()
+            for root in self.manifest_roots:
+                for manifest in root.rglob("*" + MANIFEST_SUFFIX):
+                    try:
+                        with open(manifest, 'r', encoding='utf-8') as f:
+                            referenced.update(json.load(f)["chunks"])
+                    except (OSError, ValueError, KeyError):
+                        # Can't tell what it needs, so keep everything
+                        return 0, 0
+            cutoff = time.time() - GC_GRACE_SECONDS
+            count = freed = 0
+            for chunk in self.root.glob("*/*"):
+                if chunk.name in referenced or chunk.suffix == ".tmp":
+                    continue
+                stat = chunk.stat()
+                if stat.st_mtime < cutoff:
+                    chunk.unlink()
+                    count += 1
+                    freed += stat.st_size
+            return count, freed
+
+    def size(self) -> Tuple[int, int]:
+        """(chunks, bytes) currently stored"""
+        sizes = [p.stat().st_size for p in self.root.glob("*/*") if p.suffix != ".tmp"]
+        return len(sizes), sum(sizes)
+
+
+_store = None
+
+
+def get_chunk_store() -> ChunkStore:
+    """Process-wide chunk store"""
+    global _store
+    if _store is None:
+        _store = ChunkStore()
+    return _store
+
+
+def restore_backup(backup: Path) -> Path:
+    """
+    Put a README backup back in Docs/<project>/README.md, backing up the
+    README it replaces first. Returns the README path.
+    """
+    from datetime import datetime
+    store = get_chunk_store()
+    readme = DOCS_DIR / backup.parent.name / "README.md"
+    data = store.read(backup)
+    if readme.exists():
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        store.put(BACKUP_DIR / backup.parent.name / f"README_{timestamp}.md", readme.read_bytes())
+    readme.write_bytes(data)
+    return readme
+
+
+def main():
+    """CLI interface"""
+    commands = ("pack", "gc", "stats", "cat", "restore")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("""
+Usage:
+  python chunk_store.py pack             # Move README backups and older snapshots into the store
+  python chunk_store.py gc               # Delete chunks nothing refers to any more
+  python chunk_store.py stats            # Stored vs. reassembled size
+  python chunk_store.py cat <file>       # Print a stored snapshot or backup
+  python chunk_store.py restore <backup> # Put a README backup back in Docs/<project>/
+        """)
+        return
+
+    store = get_chunk_store()
+    command = sys.argv[1]
+
+    if command in ("cat", "restore"):
+        if len(sys.argv) < 3:
+            print(f"[ERROR] {command} needs a file, e.g. backups/01_Permits_Legal/README_20250925_124033.md")
+            sys.exit(1)
+        path = Path(sys.argv[2]).resolve()
+        if not store.exists(path):
+            print(f"[ERROR] {sys.argv[2]} is not stored")
+            sys.exit(1)
+        if command == "cat":
+            sys.stdout.write(store.read_text(path))
+        else:
+            print(f"[OK] Restored {restore_backup(path)} from {path.name}")
+
+    elif command == "pack":
+        packed = 0
+        for project_dir in sorted(p for p in BACKUP_DIR.iterdir() if p.is_dir()) if BACKUP_DIR.exists() else []:
+            packed += sum(store.pack(backup) for backup in sorted(project_dir.glob("README_*.md")))
+        from snapshot_catalog import get_catalog
+        packed += get_catalog().compact()
+        print(f"[OK] Packed {packed} files into {store.root}")
+
+    elif command == "gc":
+        count, freed = store.gc()
+        print(f"[OK] Deleted {count} unreferenced chunks ({freed:,} bytes)")
+
+    else:
+        files = [m for root in store.manifest_roots for m in root.rglob("*" + MANIFEST_SUFFIX)]
+        logical = 0
+        for manifest in files:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                logical += json.load(f)["size"]
+        chunks, stored = store.size()
+        manifests = sum(m.stat().st_size for m in files)
+        print(f"Files:     {len(files)} stored, {logical:,} bytes reassembled")
+        print(f"Chunks:    {chunks} ({stored:,} bytes compressed)")
+        print(f"Manifests: {manifests:,} bytes")
+        if logical:
+            print(f"On disk:   {(stored + manifests) / logical:.0%} of the full copies")
+
+
+if __name__ == "__main__":
+    main()
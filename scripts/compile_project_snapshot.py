@@ -7,11 +7,21 @@ Perfect for AI analysis, team reviews, and strategic planning
 import os
 import sys
 import json
-import requests
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
-from dotenv import load_dotenv
+from typing import Callable, Dict, List, Optional, Tuple
+
+from notion_client import load_env
+from snapshot_catalog import get_catalog
+from snapshot_delta import build_delta, record_inputs, save_delta
+from snapshot_encoding import write_variants
+from snapshot_packer import (DEFAULT_BUDGET, ESSENTIAL, STATUS, HIGH_PRIORITY_TASK, CRITICAL_PATH, OVERVIEW,
+                             PROJECT, DETAIL, GUIDE, CONTEXT, Block, block, pack, split_headings)
+from snapshot_sections import file_digest, get_section_cache
+from snapshot_tree import FORMATS, build_tree, render_all
 
 # Setup paths
 BASE_DIR = Path(__file__).parent.parent
@@ -19,16 +29,62 @@ DOCS_DIR = BASE_DIR / "Docs"
 CACHE_DIR = BASE_DIR / "cache"
 OUTPUT_DIR = BASE_DIR / "snapshots"
 
-# Ensure output directory exists
-OUTPUT_DIR.mkdir(exist_ok=True)
+# Progress stages reported as [n/STAGES]
+STAGES = 7
+STAGE_LABELS = {
+    1: "Executive summary",
+    2: "Project overview",
+    3: "Status dashboard",
+    4: "Project sections",
+    5: "Analysis prompts",
+    6: "Team context",
+    7: "Metadata"
+}
+
+PROJECT_FOLDERS = [
+    ("01_Permits_Legal", "Permits & Legal", "🔴"),
+    ("02_Space_Ops", "Space & Operations", "🏠"),
+    ("03_Theme_Design_Story", "Theme, Design & Story", "🎨"),
+    ("04_Marketing_Sales", "Marketing & Sales", "📢"),
+    ("05_Team", "Team", "👥"),
+    ("06_Budget_Finance", "Budget & Finance", "💰"),
+    ("07_Vendors_Suppliers", "Vendors & Suppliers", "📦"),
+    ("08_Evaluation_Scaling", "Evaluation & Scaling", "📈"),
+]
+# Marked 🔴 in the dashboard; packed ahead of the other projects
+CRITICAL_PATH_FOLDERS = {"01_Permits_Legal", "05_Team"}
+
+# (stage, name, input files or None if never reusable, renderer returning blocks)
+Section = Tuple[int, str, Optional[List[Path]], Callable[[], List[Block]]]
+
+
+def input_files() -> List[Path]:
+    """Every file a snapshot is built from"""
+    files = [DOCS_DIR / "core.md"]
+    files += sorted(DOCS_DIR.glob("*/README.md"))
+    files += sorted(DOCS_DIR.glob("*/tasks.md"))
+    files += sorted((CACHE_DIR / "indexes").glob("*.json"))
+    return [f for f in files if f.exists()]
+
+
+def inputs_hash() -> str:
+    """Content hash of the snapshot inputs; unchanged inputs give the same snapshot"""
+    digest = hashlib.sha256()
+    for path in input_files():
+        digest.update(str(path.relative_to(BASE_DIR)).encode("utf-8") + b"\0")
+        digest.update((file_digest(path) or "").encode("utf-8") + b"\0")
+    return digest.hexdigest()
 
-# Load environment
-load_dotenv(BASE_DIR / ".env")
 
 class ProjectSnapshot:
     """Compiles entire project state into a single markdown file"""
 
-    def __init__(self):
+    def __init__(self, progress: Optional[Callable[[int, int, str], None]] = None,
+                 budget: Optional[int] = None):
+        load_env()
+        self.progress = progress
+        # Token budget the snapshot is packed into; 0 means no limit
+        self.budget = budget if budget is not None else int(os.getenv("SNAPSHOT_TOKEN_BUDGET", DEFAULT_BUDGET))
         self.api_key = os.getenv("NOTION_API")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -39,61 +95,179 @@ class ProjectSnapshot:
         self.content_sections = []
         self.task_data = {}
         self.project_summaries = {}
+        # Sections rendered vs reused from the section cache in the last render()
+        self.rendered = 0
+        self.reused = 0
+        self.pack_report: Dict = {}
+        # Section tree of the last render() and every format rendered from it
+        self.tree: Optional[Dict] = None
+        self.formats: Dict[str, str] = {}
 
     def compile_snapshot(self, pull_latest=True) -> str:
-        """Main method to compile everything"""
-        print("[COMPILE] Compiling Santa's Workshop Project Snapshot...")
-
-        if pull_latest and self.api_key:
-            print("[PULL] Pulling latest data from Notion...")
-            self._pull_latest_data()
-
-        # 1. Executive Summary
-        print("[1/7] Creating executive summary...")
-        self._add_executive_summary()
-
-        # 2. Project Overview
-        print("[2/7] Adding project overview...")
-        self._add_project_overview()
-
-        # 3. Current Status Dashboard
-        print("[3/7] Building status dashboard...")
-        self._add_status_dashboard()
-
-        # 4. All Project Sections with Tasks
-        print("[4/7] Compiling all project sections...")
-        self._compile_all_projects()
-
-        # 5. Analysis Prompts for AI
-        print("[5/7] Adding analysis prompts...")
-        self._add_analysis_prompts()
-
-        # 6. Team Context
-        print("[6/7] Adding team context...")
-        self._add_team_context()
-
-        # 7. Metadata
-        self._add_metadata()
+        """Main method to compile everything; returns the saved file path"""
+        snapshot = self.render(pull_latest)
+        return str(self.save(snapshot, input_hash=inputs_hash()))
+
+    def compile_delta(self, since: str, pull_latest=True) -> str:
+        """Write what changed since a snapshot or date; returns the saved file path"""
+        print(f"[COMPILE] Compiling changes since {since}...")
+        if pull_latest:
+            self.pull_latest_data()
+        content, changes = build_delta(since)
+        filepath = save_delta(content)
+        print(f"\n[SUCCESS] Delta saved to: {filepath}")
+        print(f"[INFO] {sum(len(items) for items in changes.values())} changes, {len(content):,} characters")
+        return str(filepath)
 
-        # Combine everything
-        snapshot = "\n\n".join(self.content_sections)
+    def sections(self) -> List[Section]:
+        """Every section in document order, with the files it is built from"""
+        indexes = CACHE_DIR / "indexes"
+        priority_index = indexes / "high_priority_tasks.json"
+        self.high_priority = self._high_priority_names(priority_index)
+        plan = [
+            (1, "executive_summary", [], self._render_executive_summary),
+            (2, "project_overview", [DOCS_DIR / "core.md"], self._render_project_overview),
+            (3, "status_dashboard", [indexes / "summary.json", indexes / "upcoming_deadlines.json"],
+             self._render_status_dashboard),
+        ]
+        for folder, title, icon in PROJECT_FOLDERS:
+            plan.append((4, f"project:{folder}",
+                         [DOCS_DIR / folder / "README.md", DOCS_DIR / folder / "tasks.md", priority_index],
+                         partial(self._render_project, folder, title, icon)))
+        plan += [
+            (5, "analysis_prompts", [], self._render_analysis_prompts),
+            (6, "team_context", [], self._render_team_context),
+            (7, "metadata", None, self._render_metadata),  # timestamped, always fresh
+        ]
+        return plan
+
+    def render(self, pull_latest=True) -> str:
+        """
+        Build the snapshot markdown without writing it.
+
+        Sections whose inputs (and renderer code) are unchanged since they
+        were last rendered come from the section cache; the rest render in
+        parallel. The result is packed into self.budget tokens, parsed into
+        self.tree, and rendered from the tree to every format in
+        self.formats.
+        """
+        print("[COMPILE] Compiling Santa's Workshop Project Snapshot...")
 
-        # Save to file
+        if pull_latest:
+            self.pull_latest_data()
+
+        cache = get_section_cache()
+        code = Path(__file__).parent
+        salt = "".join(file_digest(code / name) or "" for name in ("compile_project_snapshot.py", "snapshot_packer.py"))
+        plan = self.sections()
+        results: List[Optional[List[Block]]] = [None] * len(plan)
+        todo = []
+        for i, (stage, name, inputs, renderer) in enumerate(plan):
+            key = cache.key(name, inputs, salt) if inputs is not None else None
+            results[i] = cache.get(name, key) if key else None
+            if results[i] is None:
+                todo.append((i, key))
+
+        # Report each stage once all of its sections are ready
+        remaining = {}
+        for stage, *_ in plan:
+            remaining[stage] = remaining.get(stage, 0) + 1
+        fresh = {plan[i][0] for i, _ in todo}
+        finished = []
+
+        def complete(stage):
+            remaining[stage] -= 1
+            if not remaining[stage]:
+                finished.append(stage)
+                suffix = "" if stage in fresh else " (unchanged)"
+                self._stage(len(finished), f"{STAGE_LABELS[stage]}{suffix}")
+
+        for i, (stage, *_) in enumerate(plan):
+            if results[i] is not None:
+                complete(stage)
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(8, len(todo)), thread_name_prefix="snapshot-section") as pool:
+                futures = {pool.submit(plan[i][3]): (i, key) for i, key in todo}
+                for future in as_completed(futures):
+                    i, key = futures[future]
+                    results[i] = future.result()
+                    if key:
+                        cache.put(plan[i][1], key, results[i])
+                    complete(plan[i][0])
+            cache.save()
+
+        self.rendered = len(todo)
+        self.reused = len(plan) - len(todo)
+        print(f"[INFO] Rendered {self.rendered} sections, reused {self.reused}")
+
+        self.content_sections, self.pack_report = pack([blocks for blocks in results if blocks], self.budget)
+        report = self.pack_report
+        if report["kept"] < report["blocks"]:
+            print(f"[INFO] Packed ~{report['tokens']:,} of ~{report['full_tokens']:,} tokens into the "
+                  f"{report['budget']:,}-token budget ({report['blocks'] - report['kept']} parts left out)")
+        else:
+            print(f"[INFO] ~{report['tokens']:,} tokens, everything fits")
+
+        # One tree, every format
+        self.tree = build_tree("\n\n".join(self.content_sections), generated=datetime.now().isoformat())
+        self.formats = render_all(self.tree)
+        return self.formats["md"]
+
+    def save(self, snapshot: str, input_hash: Optional[str] = None) -> Path:
+        """Write a rendered snapshot to snapshots/ and record it in the catalog"""
+        OUTPUT_DIR.mkdir(exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"project_snapshot_{timestamp}.md"
-        filepath = OUTPUT_DIR / filename
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(snapshot)
+        data = snapshot.encode("utf-8")
+
+        # Exclusive create, so snapshots saved in the same second never overwrite each other
+        for attempt in range(1, 1000):
+            suffix = f"_{attempt}" if attempt > 1 else ""
+            filepath = OUTPUT_DIR / f"project_snapshot_{timestamp}{suffix}.md"
+            try:
+                with open(filepath, 'xb') as f:
+                    f.write(data)
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(f"No free snapshot filename for {timestamp}")
+
+        # The newest snapshot also gets its other formats as files; for older
+        # ones they're rendered from the markdown when asked for
+        formats = self.formats if self.formats.get("md") == snapshot else \
+            render_all(build_tree(snapshot, generated=datetime.now().isoformat()))
+        for fmt, text in formats.items():
+            if fmt != "md":
+                filepath.with_suffix(FORMATS[fmt][0]).write_text(text, encoding="utf-8")
+
+        # Compress once here rather than on every download
+        encodings = write_variants(filepath, data)
+        get_catalog().add(filepath, snapshot, input_hash, encodings=encodings)
+        # What --since compares against later
+        record_inputs(filepath, input_hash)
 
         print(f"\n[SUCCESS] Snapshot saved to: {filepath}")
         print(f"[INFO] File size: {len(snapshot):,} characters")
         print(f"[INFO] Sections: {len(self.content_sections)}")
 
-        return str(filepath)
+        return filepath
+
+    def _stage(self, number: int, message: str):
+        """Log a build stage and report it to the progress callback"""
+        print(f"[{number}/{STAGES}] {message}")
+        if self.progress:
+            self.progress(number, STAGES, message)
 
-    def _pull_latest_data(self):
+    def pull_latest_data(self):
         """Pull latest data from Notion if API key available"""
+        if not self.api_key:
+            return
+
+        print("[PULL] Pulling latest data from Notion...")
+        if self.progress:
+            self.progress(0, STAGES, "Pulling latest data from Notion...")
         try:
             # Use existing scripts to pull latest
             import subprocess
@@ -123,8 +297,17 @@ class ProjectSnapshot:
         except Exception as e:
             print(f"  [WARN] Could not pull latest: {e}")
 
-    def _add_executive_summary(self):
-        """Add executive summary section"""
+    @staticmethod
+    def _high_priority_names(index_file: Path) -> set:
+        """Lower-cased names of the tasks in the high-priority index"""
+        try:
+            with open(index_file, 'r') as f:
+                return {str(task.get("name", "")).strip().lower() for task in json.load(f)}
+        except (OSError, ValueError, AttributeError):
+            return set()
+
+    def _render_executive_summary(self) -> List[Block]:
+        """Executive summary section"""
         summary = """# 🎅 Santa's Workshop - Project Snapshot
 
 ## Executive Summary
@@ -158,22 +341,18 @@ A theatrical speakeasy experience that layers:
 4. Marketing campaign live by October 1
 5. Opening night November 1"""
 
-        self.content_sections.append(summary)
+        return [block(summary, ESSENTIAL, None)]
 
-    def _add_project_overview(self):
-        """Add detailed project overview from core.md"""
+    def _render_project_overview(self) -> List[Block]:
+        """Project overview from core.md, one block per subsection"""
         core_file = DOCS_DIR / "core.md"
-        if core_file.exists():
-            with open(core_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Extract first 1500 chars as overview
-                if len(content) > 1500:
-                    content = content[:1500] + "\n\n*[Core document continues...]*"
+        if not core_file.exists():
+            return []
+        with open(core_file, 'r', encoding='utf-8') as f:
+            return split_headings(f.read(), OVERVIEW, DETAIL, head="## Project Foundation\n\n")
 
-                self.content_sections.append("## Project Foundation\n\n" + content)
-
-    def _add_status_dashboard(self):
-        """Add current status dashboard"""
+    def _render_status_dashboard(self) -> List[Block]:
+        """Current status dashboard"""
         # Load task indexes
         dashboard = "## 📊 Current Status Dashboard\n"
 
@@ -216,70 +395,62 @@ A theatrical speakeasy experience that layers:
 8. **Evaluation & Scaling** - Growth planning
 """
 
-        self.content_sections.append(dashboard)
-
-    def _compile_all_projects(self):
-        """Compile all project READMEs and tasks"""
-        project_folders = [
-            ("01_Permits_Legal", "Permits & Legal", "🔴"),
-            ("02_Space_Ops", "Space & Operations", "🏠"),
-            ("03_Theme_Design_Story", "Theme, Design & Story", "🎨"),
-            ("04_Marketing_Sales", "Marketing & Sales", "📢"),
-            ("05_Team", "Team", "👥"),
-            ("06_Budget_Finance", "Budget & Finance", "💰"),
-            ("07_Vendors_Suppliers", "Vendors & Suppliers", "📦"),
-            ("08_Evaluation_Scaling", "Evaluation & Scaling", "📈"),
-        ]
-
-        for folder, title, icon in project_folders:
-            project_dir = DOCS_DIR / folder
-            if not project_dir.exists():
-                continue
-
-            section = f"## {icon} {title}\n"
-
-            # Add README content
-            readme_file = project_dir / "README.md"
-            if readme_file.exists():
-                with open(readme_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Get first 2000 chars or until first major section
-                    lines = content.split('\n')
-                    excerpt = []
-                    char_count = 0
-
-                    for line in lines:
-                        if char_count > 2000 and line.startswith('##'):
-                            break
-                        excerpt.append(line)
-                        char_count += len(line)
-
-                    section += '\n'.join(excerpt)
-
-            # Add tasks
-            tasks_file = project_dir / "tasks.md"
-            if tasks_file.exists():
-                with open(tasks_file, 'r', encoding='utf-8') as f:
-                    task_content = f.read()
-                    # Extract just the task list, not the header
-                    lines = task_content.split('\n')
-                    task_lines = []
-                    in_tasks = False
-
-                    for line in lines:
-                        if line.startswith('### '):
-                            in_tasks = True
-                        if in_tasks:
-                            task_lines.append(line)
-
-                    if task_lines:
-                        section += "\n\n### Current Tasks\n" + '\n'.join(task_lines)
-
-            section += "\n\n---"
-            self.content_sections.append(section)
-
-    def _add_analysis_prompts(self):
-        """Add analysis prompts for AI assistance"""
+        return [block(dashboard, STATUS, None)]
+
+    def _render_project(self, folder: str, title: str, icon: str) -> List[Block]:
+        """
+        One project's README and tasks: the README intro heads the section,
+        each README subsection and each task is its own block
+        """
+        project_dir = DOCS_DIR / folder
+        if not project_dir.exists():
+            return []
+
+        priority = CRITICAL_PATH if folder in CRITICAL_PATH_FOLDERS else PROJECT
+        head = f"## {icon} {title}\n"
+
+        # Add README content
+        readme_file = project_dir / "README.md"
+        if readme_file.exists():
+            with open(readme_file, 'r', encoding='utf-8') as f:
+                blocks = split_headings(f.read(), priority, priority - 20, head=head)
+        else:
+            blocks = [block(head, priority, None)]
+
+        # Add tasks
+        tasks_file = project_dir / "tasks.md"
+        if tasks_file.exists():
+            with open(tasks_file, 'r', encoding='utf-8') as f:
+                task_content = f.read()
+                # Extract just the task list, not the header
+                lines = task_content.split('\n')
+                task_lines = []
+                in_tasks = False
+
+                for line in lines:
+                    if line.startswith('### '):
+                        in_tasks = True
+                    if in_tasks:
+                        task_lines.append(line)
+
+                if task_lines:
+                    blocks.append(block("\n\n### Current Tasks\n", priority))
+                    tasks_header = len(blocks) - 1
+                    chunks = []
+                    for line in task_lines:
+                        if line.startswith('### ') or not chunks:
+                            chunks.append([])
+                        chunks[-1].append(line)
+                    for n, chunk in enumerate(chunks):
+                        name = chunk[0][4:].lstrip("⬜🔄✅🚫 ").strip().lower()
+                        task_priority = HIGH_PRIORITY_TASK if name in self.high_priority else priority - 5
+                        blocks.append(block(("\n" if n else "") + '\n'.join(chunk), task_priority, tasks_header))
+
+        blocks.append(block("\n\n---", priority))
+        return blocks
+
+    def _render_analysis_prompts(self) -> List[Block]:
+        """Analysis prompts for AI assistance"""
         prompts = """## 🤖 AI Analysis Guide
 
 ### How to Use This Document with AI
@@ -338,10 +509,10 @@ Based on the current project status and your specific role, you might ask:
 - "What successful examples could we learn from for [specific element]?"
 - "Generate a checklist for [specific milestone or task]"
 """
-        self.content_sections.append(prompts)
+        return [block(prompts, GUIDE, None)]
 
-    def _add_team_context(self):
-        """Add team context section"""
+    def _render_team_context(self) -> List[Block]:
+        """Team context section"""
         context = """## 👥 Team Context & Collaboration
 
 ### Project Team Structure
@@ -367,10 +538,10 @@ This snapshot represents a point-in-time view. For most current information:
 - Create role-specific prompt templates
 - Track which recommendations get implemented
 """
-        self.content_sections.append(context)
+        return [block(context, CONTEXT, None)]
 
-    def _add_metadata(self):
-        """Add metadata section"""
+    def _render_metadata(self) -> List[Block]:
+        """Metadata section"""
         metadata = f"""## 📋 Document Metadata
 
 **Generated**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
@@ -395,7 +566,7 @@ This snapshot represents a point-in-time view. For most current information:
 ---
 *End of Project Snapshot*"""
 
-        self.content_sections.append(metadata)
+        return [block(metadata, STATUS, None)]
 
 def main():
     """Main entry point"""
@@ -405,10 +576,24 @@ def main():
     parser.add_argument('--no-pull', action='store_true',
                        help='Skip pulling latest from Notion')
     parser.add_argument('--output', help='Output filename')
+    parser.add_argument('--budget', type=int,
+                       help=f'Token budget to pack the snapshot into (default {DEFAULT_BUDGET}, '
+                            f'or SNAPSHOT_TOKEN_BUDGET; 0 for no limit)')
+    parser.add_argument('--since', metavar='SNAPSHOT|DATE',
+                       help='Write only what changed since a snapshot (e.g. project_snapshot_20250925_124500.md) '
+                            'or a date (YYYY-MM-DD)')
 
     args = parser.parse_args()
 
-    snapshot = ProjectSnapshot()
+    snapshot = ProjectSnapshot(budget=args.budget)
+    if args.since:
+        try:
+            filepath = snapshot.compile_delta(args.since, pull_latest=not args.no_pull)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        print(f"[LOCATION] {filepath}")
+        return
     filepath = snapshot.compile_snapshot(pull_latest=not args.no_pull)
 
     print(f"\n[SUCCESS] Your project snapshot is ready!")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Daemon IPC - Forward CLI commands to a running sync daemon
+A Unix socket under cache/ carries one JSON request and reply per
+connection; CLIs fall back to running in-process when nothing answers
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import socketserver
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+SOCKET_PATH = BASE_DIR / "cache" / "notion_daemon.sock"
+
+Handler = Callable[[List[str]], None]
+
+_local = threading.local()
+
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout stand-in that sends each thread's prints to its own buffer"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        buffer = getattr(_local, "buffer", None)
+        return (buffer or self.fallback).write(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+
+def capture_output(func: Callable, *args) -> str:
+    """Run func and return what it printed, without touching other threads' output"""
+    if not isinstance(sys.stdout, _ThreadOutput):
+        sys.stdout = _ThreadOutput(sys.stdout)
+    _local.buffer = io.StringIO()
+    try:
+        func(*args)
+        return _local.buffer.getvalue()
+    finally:
+        _local.buffer = None
+
+
+class CommandServer:
+    """Serves named command handlers on the daemon socket"""
+
+    def __init__(self, handlers: Dict[str, Handler], path: Path = SOCKET_PATH):
+        self.handlers = handlers
+        self.path = path
+        self._server = None
+
+    def start(self):
+        if self.path.exists():
+            self.path.unlink()  # left behind by a daemon that didn't shut down cleanly
+
+        handlers = self.handlers
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                start = time.perf_counter()
+                try:
+                    request = json.loads(self.rfile.readline())
+                    handler = handlers[request["command"]]
+                    reply = {"ok": True, "output": capture_output(handler, request.get("args", []))}
+                except (Exception, SystemExit) as e:
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                reply["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.path), RequestHandler)
+        self._server.daemon_threads = True
+        os.chmod(self.path, 0o600)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+def forward(command: str, args: List[str] = (), timeout: float = 120,
+            path: Path = SOCKET_PATH) -> Optional[str]:
+    """Run a command in the daemon; returns its output, or None if it couldn't"""
+    if os.getenv("NOTION_NO_DAEMON") or not path.exists():
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps({"command": command, "args": list(args)}).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reply_file:
+                reply = json.loads(reply_file.readline())
+    except (OSError, ValueError):
+        return None  # stale socket or daemon went away
+
+    return reply["output"] if reply.get("ok") else None
+
@@ -4,37 +4,13 @@ End-of-work sync script - Run this after your work session
 Pushes your changes to Notion
 """
 
-import os
 import sys
-import time
 import subprocess
 from pathlib import Path
 from datetime import datetime
 
-def run_command(cmd, description):
-    """Run a command and show status"""
-    print(f"\n{'='*60}")
-    print(f"{description}")
-    print(f"{'='*60}")
-
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent.parent
-        )
-
-        if result.returncode == 0:
-            print(result.stdout)
-            return True
-        else:
-            print(f"[ERROR] Command failed: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        return False
+from pipeline import PipelineContext, end_work_pipeline
+from sync_policy import SyncPolicy
 
 def check_git_status():
     """Check if there are uncommitted changes"""
@@ -63,6 +39,9 @@ def main():
 
     print(f"\nEnding work session at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
+    # --yes pushes without asking (for scheduled runs)
+    policy, _ = SyncPolicy.from_argv(sys.argv[1:])
+
     success = True
 
     # Step 1: Check what's changed
@@ -94,19 +73,14 @@ def main():
         print("STEP 2: Push README changes to Notion")
         print("="*60)
 
-        response = input("\nPush all modified READMEs to Notion? (y/n/select): ").lower()
+        if policy.interactive:
+            response = input("\nPush all modified READMEs to Notion? (y/n/select): ").lower()
+        else:
+            response = 'y' if policy.confirm("\nPush all modified READMEs to Notion? (y/n): ") else 'n'
 
+        projects = []
         if response == 'y':
-            # Push all READMEs
-            if run_command(
-                "python scripts/sync_readme_to_notion.py",
-                "Pushing all README files to Notion"
-            ):
-                print("[OK] All READMEs pushed to Notion")
-            else:
-                print("[ERROR] Failed to push some READMEs")
-                success = False
-
+            projects = None  # every mapped project
         elif response == 'select':
             # Let user select which ones to push
             print("\nSelect projects to sync:")
@@ -117,14 +91,18 @@ def main():
 
             if selections:
                 selected_indices = [int(x.strip()) - 1 for x in selections.split(',')]
-                for idx in selected_indices:
-                    if 0 <= idx < len(modified_readmes):
-                        project = modified_readmes[idx]
-                        run_command(
-                            f"python scripts/sync_readme_to_notion.py {project}",
-                            f"Pushing {project} to Notion"
-                        )
-                        time.sleep(1)
+                projects = [modified_readmes[idx] for idx in selected_indices
+                            if 0 <= idx < len(modified_readmes)]
+
+        if projects is None or projects:
+            # Selected projects push concurrently over one shared client
+            pipeline = end_work_pipeline(projects, context=PipelineContext(policy=policy))
+            if pipeline.run():
+                print("[OK] README changes pushed to Notion")
+            else:
+                print("[ERROR] Failed to push some READMEs")
+                success = False
+            pipeline.report()
         else:
             print("[SKIP] Not pushing README changes")
     else:
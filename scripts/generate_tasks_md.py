@@ -5,15 +5,13 @@ Filters tasks from the cached Notion tasks database
 """
 
 import os
+import sys
 import json
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
-
-load_dotenv()
 
 class TaskGenerator:
-    def __init__(self):
+    def __init__(self, tasks=None):
         self.base_dir = Path(__file__).parent.parent
         self.docs_dir = self.base_dir / "Docs"
         self.cache_dir = self.base_dir / "cache"
@@ -72,7 +70,11 @@ class TaskGenerator:
             ]
         }
 
-        self.load_tasks()
+        # Tasks handed over in-process (e.g. by the pipeline) skip the cache read
+        if tasks is not None:
+            self.tasks = tasks
+        else:
+            self.load_tasks()
 
     def load_tasks(self):
         """Load tasks from cached Notion data"""
@@ -296,6 +298,14 @@ class TaskGenerator:
 
 
 def main():
+    # A running daemon already holds the latest tasks in memory
+    if "--local" not in sys.argv:
+        from daemon_ipc import forward
+        output = forward("generate-tasks")
+        if output is not None:
+            print(output, end="")
+            return
+
     generator = TaskGenerator()
 
     if generator.tasks:
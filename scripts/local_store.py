@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Local Store - In-memory copy of the synced Notion cache
+Serves database rows (cache/content) and indexes (cache/indexes) to the web
+service without re-reading JSON per request, reloading whatever a sync
+rewrote, plus the filtering, projection and paging the read API uses
+"""
+
+import io
+import csv
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / "cache"
+
+# Query parameters that aren't property filters
+RESERVED = ("fields", "limit", "cursor", "sort", "q", "updated_since")
+
+
+def _key(name: str) -> str:
+    return name.lower().replace("_", " ").strip()
+
+
+def field_value(row: Dict, field: str):
+    """A top-level key or property of a row, matched case-insensitively (due_date finds "Due Date")"""
+    wanted = _key(field)
+    for key, value in row.items():
+        if _key(key) == wanted and key != "properties":
+            return value
+    for key, value in row.get("properties", {}).items():
+        if _key(key) == wanted:
+            return value
+    return None
+
+
+def project(row: Dict, fields: List[str]) -> Dict:
+    """Keep only the named fields; properties stay nested and the id is always kept"""
+    wanted = {_key(f) for f in fields}
+    out = {key: value for key, value in row.items()
+           if key != "properties" and (key == "id" or _key(key) in wanted)}
+    props = {key: value for key, value in row.get("properties", {}).items() if _key(key) in wanted}
+    if props:
+        out["properties"] = props
+    return out
+
+
+def _matches(value, accepted: List[str]) -> bool:
+    if isinstance(value, list):
+        return any(str(v).lower() in accepted for v in value)
+    return str(value).lower() in accepted
+
+
+def matches(row: Dict, args: Dict[str, str]) -> bool:
+    """Whether a row passes the property filters, q and updated_since in args"""
+    for name, raw in args.items():
+        if name in RESERVED or not raw:
+            continue
+        if not _matches(field_value(row, name), [v.strip().lower() for v in raw.split(",")]):
+            return False
+    if args.get("q") and args["q"].lower() not in str(field_value(row, "name") or "").lower():
+        return False
+    if args.get("updated_since") and (row.get("updated") or "") < args["updated_since"]:
+        return False
+    return True
+
+
+def select(rows: List[Dict], args: Dict[str, str], default_limit: int = 50,
+           max_limit: int = 500) -> Tuple[List[Dict], int, Optional[str]]:
+    """
+    Filter, sort, page and project rows from query parameters.
+
+    - Any non-reserved parameter filters on that field; commas give a choice
+      (status=Not started,In progress). Values compare case-insensitively and
+      list fields match if any element does.
+    - q: substring of the row's name. updated_since: ISO time or date.
+    - sort: a field, prefixed with - for descending. Rows missing it go last.
+    - cursor: the id of the last row on the previous page (or an offset for
+      rows without ids). limit: page size.
+    - fields: comma-separated projection.
+
+    Returns (page, total matching, next cursor). Raises ValueError for a bad
+    limit, or a cursor row that is no longer in the results (a sync removed
+    it, or it stopped matching), rather than pretending the listing ended.
+    """
+    try:
+        limit = max(1, min(int(args.get("limit", default_limit)), max_limit))
+    except ValueError:
+        raise ValueError("limit must be a number")
+
+    rows = [row for row in rows if isinstance(row, dict) and matches(row, args)]
+
+    if args.get("sort"):
+        field = args["sort"].lstrip("-")
+        present = [row for row in rows if field_value(row, field) is not None]
+        missing = [row for row in rows if field_value(row, field) is None]
+        present.sort(key=lambda row: str(field_value(row, field)), reverse=args["sort"].startswith("-"))
+        rows = present + missing
+
+    start = 0
+    cursor = args.get("cursor")
+    if cursor:
+        ids = [row.get("id") for row in rows]
+        if cursor in ids:
+            start = ids.index(cursor) + 1
+        elif cursor.isdigit():
+            start = int(cursor)
+        else:
+            raise ValueError(f"cursor {cursor} is no longer in the results; start again without it")
+
+    page = rows[start:start + limit]
+    next_cursor = None
+    if start + limit < len(rows):
+        next_cursor = page[-1].get("id") or str(start + limit)
+
+    if args.get("fields"):
+        fields = [f for f in args["fields"].split(",") if f.strip()]
+        page = [project(row, fields) if isinstance(row, dict) else row for row in page]
+    return page, len(rows), next_cursor
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return str(value)
+
+
+def export(datasets: List[Tuple[str, List[Dict]]], args: Dict[str, str], fmt: str = "ndjson",
+           chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Stream rows as NDJSON or CSV in chunks of about chunk_size characters.
+
+    Rows are encoded one at a time, so the only memory used beyond the
+    store itself is one chunk (plus, for CSV, the set of column names).
+    Filters and fields work as in select(); each row is tagged with its
+    dataset name.
+    """
+    fields = [f for f in args.get("fields", "").split(",") if f.strip()]
+    wanted = {_key(f) for f in fields}
+    buffer = io.StringIO()
+
+    def rows():
+        for name, data in datasets:
+            for row in data:
+                if isinstance(row, dict) and matches(row, args):
+                    yield name, project(row, fields) if fields else row
+
+    if fmt == "csv":
+        # Property names differ per database; CSV needs them all up front
+        columns: List[str] = []
+        for name, data in datasets:
+            for row in data:
+                for key in row.get("properties", {}) if isinstance(row, dict) else ():
+                    if key not in columns and (not fields or _key(key) in wanted):
+                        columns.append(key)
+        base = ["id", "created", "updated"]
+        if fields:
+            base = [b for b in base if b == "id" or b in wanted]
+        writer = csv.writer(buffer)
+        writer.writerow(["dataset"] + base + columns)
+        for name, row in rows():
+            props = row.get("properties", {})
+            writer.writerow([name] + [_cell(row.get(b)) for b in base] + [_cell(props.get(c)) for c in columns])
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    else:
+        for name, row in rows():
+            buffer.write(json.dumps(dict(row, dataset=name), default=str))
+            buffer.write("\n")
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class Dataset:
+    """One JSON file's contents, with a hash of its bytes as its version"""
+
+    def __init__(self, path: Path, stat):
+        self.path = path
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        data = path.read_bytes()
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.data = json.loads(data)
+        self.folders: Optional[Dict[str, List[str]]] = None
+
+
+class LocalStore:
+    """
+    Rows and indexes from cache/, kept in memory.
+
+    A database's rows come from its newest cache/content/<category>_*.json;
+    tasks fall back to cache/tasks/all_tasks_*.json like generate_tasks_md.
+    Syncs write new timestamped files, so the newest name is re-checked
+    whenever the directory changes, and each file is reloaded when its
+    mtime or size changes.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.datasets: Dict[str, Dataset] = {}  # by category, or index/<name>
+        self._newest: Dict[str, Tuple[Tuple, Optional[Path]]] = {}
+        self._lock = threading.Lock()
+
+    def categories(self) -> List[str]:
+        try:
+            with open(self.cache_dir / "notion_config.json", 'r') as f:
+                categories = list(json.load(f).get("databases", {}))
+        except (OSError, ValueError):
+            categories = []
+        return categories if "tasks" in categories else categories + ["tasks"]
+
+    def _sources(self, category: str) -> List[Tuple[Path, str]]:
+        sources = [(self.cache_dir / "content", f"{category}_*.json")]
+        if category == "tasks":
+            sources.append((self.cache_dir / "tasks", "all_tasks_*.json"))
+        return sources
+
+    def _newest_file(self, category: str) -> Optional[Path]:
+        sources = self._sources(category)
+        dir_stamps = []
+        for directory, _ in sources:
+            try:
+                dir_stamps.append(directory.stat().st_mtime_ns)
+            except FileNotFoundError:
+                dir_stamps.append(None)
+
+        cached = self._newest.get(category)
+        if cached and cached[0] == tuple(dir_stamps):
+            return cached[1]
+
+        newest = None
+        for directory, pattern in sources:
+            files = sorted(directory.glob(pattern)) if directory.exists() else []
+            if files:
+                newest = files[-1]
+                break
+        self._newest[category] = (tuple(dir_stamps), newest)
+        return newest
+
+    def _load(self, key: str, path: Optional[Path]) -> Optional[Dataset]:
+        """The dataset stored under key, reloaded if path is a different or changed file"""
+        try:
+            stat = path.stat() if path else None
+        except FileNotFoundError:
+            stat = None
+            self._newest.clear()
+        if stat is None:
+            self.datasets.pop(key, None)
+            return None
+        dataset = self.datasets.get(key)
+        if dataset is None or dataset.path != path or dataset.stamp != (stat.st_mtime_ns, stat.st_size):
+            dataset = self.datasets[key] = Dataset(path, stat)
+        return dataset
+
+    def rows(self, category: str) -> Optional[Dataset]:
+        """A database's rows, or None if it has never been synced"""
+        with self._lock:
+            return self._load(category, self._newest_file(category))
+
+    def index(self, name: str) -> Optional[Dataset]:
+        """cache/indexes/<name>.json, or None if there is no such index"""
+        if not name.replace("_", "").isalnum():
+            return None
+        with self._lock:
+            return self._load(f"index/{name}", self.cache_dir / "indexes" / f"{name}.json")
+
+    def index_names(self) -> List[str]:
+        return sorted(p.stem for p in (self.cache_dir / "indexes").glob("*.json"))
+
+    def project_folders(self) -> List[str]:
+        from generate_tasks_md import TaskGenerator
+        return list(TaskGenerator(tasks=[]).project_keywords) + ["00_Uncategorized"]
+
+    def project_tasks(self, folder: str) -> Tuple[Optional[Dataset], List[Dict]]:
+        """Tasks filed under a project folder, using the same keyword rules as tasks.md"""
+        dataset = self.rows("tasks")
+        if dataset is None:
+            return None, []
+        with self._lock:
+            if dataset.folders is None:
+                from generate_tasks_md import TaskGenerator
+                generator = TaskGenerator(tasks=[])
+                folders: Dict[str, List[str]] = {}
+                for task in dataset.data:
+                    for name in generator.categorize_task(task):
+                        folders.setdefault(name, []).append(task["id"])
+                dataset.folders = folders
+        ids = set(dataset.folders.get(folder, []))
+        return dataset, [task for task in dataset.data if task["id"] in ids]
+
+
+_store = None
+
+
+def get_store() -> LocalStore:
+    """Process-wide store instance"""
+    global _store
+    if _store is None:
+        _store = LocalStore()
+    return _store
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Markdown to Notion Block Compiler
+Single-pass, linear-time conversion shared by every README -> Notion push
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from notion_chunking import chunk_rich_text, group_rich_text
+
+NOTION_LANGUAGES = {
+    "abap", "arduino", "bash", "basic", "c", "clojure", "coffeescript", "c++", "c#",
+    "css", "dart", "diff", "docker", "elixir", "elm", "erlang", "flow", "fortran",
+    "f#", "gherkin", "glsl", "go", "graphql", "groovy", "haskell", "html", "java",
+    "javascript", "json", "julia", "kotlin", "latex", "less", "lisp", "livescript",
+    "lua", "makefile", "markdown", "markup", "matlab", "mermaid", "nix", "objective-c",
+    "ocaml", "pascal", "perl", "php", "plain text", "powershell", "prolog", "protobuf",
+    "python", "r", "reason", "ruby", "rust", "sass", "scala", "scheme", "scss", "shell",
+    "sql", "swift", "typescript", "vb.net", "verilog", "vhdl", "visual basic",
+    "webassembly", "xml", "yaml", "java/c/c++/c#"
+}
+
+LANGUAGE_ALIASES = {
+    "": "plain text", "text": "plain text", "txt": "plain text", "plaintext": "plain text",
+    "js": "javascript", "ts": "typescript", "py": "python", "sh": "shell", "zsh": "shell",
+    "yml": "yaml", "md": "markdown", "cpp": "c++", "csharp": "c#", "dockerfile": "docker",
+    "rb": "ruby", "rs": "rust", "ps1": "powershell", "console": "shell"
+}
+
+# Block-level line patterns, tried in order
+FENCE_RE = re.compile(r'^\s*(```|~~~)\s*([\w+#.-]*)')
+# A closing run of #s only counts after a space ("### Learn C#" keeps its #)
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+HR_RE = re.compile(r'^\s*([-*_])(?:\s*\1){2,}\s*$')
+TABLE_RE = re.compile(r'^\s*\|.*\|\s*$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?(\s*:?-{3,}:?\s*\|)+\s*(:?-{3,}:?\s*)?\|?\s*$')
+QUOTE_RE = re.compile(r'^\s*>\s?(.*)$')
+TODO_RE = re.compile(r'^(\s*)[-*+]\s+\[([ xX])\]\s+(.*)$')
+BULLET_RE = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+NUMBERED_RE = re.compile(r'^(\s*)\d+[.)]\s+(.*)$')
+IMAGE_RE = re.compile(r'^\s*!\[([^\]]*)\]\((\S+?)\)\s*$')
+
+# Notion only accepts absolute web URLs for links and external images
+WEB_URL_RE = re.compile(r'^https?://\S+$', re.IGNORECASE)
+
+# Characters that can start inline markup
+INLINE_SPECIAL_RE = re.compile(r'[`*_~\[]')
+
+
+def normalize_language(language: str) -> str:
+    """Map a fence info string to a language Notion accepts"""
+    language = language.strip().lower()
+    language = LANGUAGE_ALIASES.get(language, language)
+    return language if language in NOTION_LANGUAGES else "plain text"
+
+
+def text_run(content: str, annotations: Optional[Dict] = None, link: Optional[str] = None) -> Dict:
+    """Build one rich text object"""
+    run = {"type": "text", "text": {"content": content}}
+    if link:
+        run["text"]["link"] = {"url": link}
+    if annotations:
+        run["annotations"] = dict(annotations)
+    return run
+
+
+def parse_inline(text: str, annotations: Optional[Dict] = None) -> List[Dict]:
+    """
+    Tokenize inline markdown (bold, italic, strikethrough, code, links).
+
+    Scans left to right jumping between candidate delimiters. A delimiter whose
+    closer can't be found is marked dead for the rest of the text, so unmatched
+    markup never triggers repeated forward scans.
+    """
+    annotations = annotations or {}
+    runs = []
+    dead = set()
+    pairs = {}
+    plain_start = 0
+    bracket = -1
+    i = 0
+    n = len(text)
+
+    def flush(end):
+        if end > plain_start:
+            runs.append(text_run(text[plain_start:end], annotations))
+
+    while i < n:
+        match = INLINE_SPECIAL_RE.search(text, i)
+        if not match:
+            break
+        i = match.start()
+        ch = text[i]
+
+        if ch == '`':
+            j = i
+            while j < n and text[j] == '`':
+                j += 1
+            fence = text[i:j]
+            close = -1 if fence in dead else text.find(fence, j)
+            if close == -1:
+                dead.add(fence)
+                i = j
+                continue
+            flush(i)
+            runs.append(text_run(text[j:close], dict(annotations, code=True)))
+            i = plain_start = close + len(fence)
+
+        elif ch == '[':
+            # The link text ends at the first "]"; without "(" right after it
+            # the "[" is literal ("[ref] and [link](url)" links only "link")
+            if bracket <= i:
+                bracket = -1 if '[' in dead else text.find(']', i + 1)
+            mid = bracket
+            if mid == -1:
+                dead.add('[')
+                i += 1
+                continue
+            if text[mid + 1:mid + 2] != '(':
+                i += 1
+                continue
+            close = -1 if '(' in dead else text.find(')', mid + 2)
+            if close == -1:
+                dead.add('(')
+                i += 1
+                continue
+            url = text[mid + 2:close].strip()
+            if not WEB_URL_RE.match(url):
+                # Relative and #anchor links would fail the whole request; keep them as written
+                i = close + 1
+                continue
+            flush(i)
+            for run in parse_inline(text[i + 1:mid], annotations):
+                run["text"]["link"] = {"url": url}
+                runs.append(run)
+            i = plain_start = close + 1
+
+        else:
+            double = text[i:i + 2]
+            if double in ('**', '__', '~~'):
+                delim = double
+            elif ch in '*_':
+                delim = ch
+            else:
+                i += 1
+                continue
+
+            # Underscores inside words (snake_case) are not emphasis
+            if ch == '_' and i > 0 and text[i - 1].isalnum():
+                i += len(delim)
+                continue
+
+            start = i + len(delim)
+            if start >= n or text[start].isspace():
+                # "a * b" or "** " opens nothing
+                i = start
+                continue
+            if delim in dead:
+                close = -1
+            elif delim == '~~':
+                close = text.find(delim, start)
+            elif (i, delim) in pairs:
+                close = pairs[(i, delim)]
+                if close == -1:
+                    i = start
+                    continue
+            else:
+                settled = len(pairs)
+                close = _find_emphasis_close(text, start, delim, pairs)
+                if close == -1 and len(pairs) > settled:
+                    # Unmatched only because of emphasis opened inside; a later
+                    # delimiter may still pair up, so don't mark it dead
+                    i = start
+                    continue
+            if close == -1:
+                dead.add(delim)
+                i = start
+                continue
+            if close == start:
+                i = start
+                continue
+
+            flush(i)
+            if delim in ('**', '__'):
+                inner = dict(annotations, bold=True)
+            elif delim == '~~':
+                inner = dict(annotations, strikethrough=True)
+            else:
+                inner = dict(annotations, italic=True)
+            runs.extend(parse_inline(text[start:close], inner))
+            i = plain_start = close + len(delim)
+
+    flush(n)
+    return runs
+
+
+def _find_emphasis_close(text: str, start: int, delim: str, pairs: Dict) -> int:
+    """
+    Find the delimiter closing an emphasis opened just before start, or -1.
+
+    Runs of "*" (or "_") in between go on a stack: "*a **b** c*" pushes "**",
+    pops it, then closes on the last "*". Every inner opener the scan settles
+    is recorded in pairs as (position, delimiter) -> close index or -1, so
+    later openers are looked up instead of rescanned ("*a *a *a ..." stays linear).
+    """
+    ch = delim[0]
+    n = len(text)
+    stack = []
+    pos = start
+    while True:
+        pos = text.find(ch, pos)
+        if pos == -1:
+            for opener in stack:
+                pairs[opener] = -1
+            return -1
+        end = pos
+        while end < n and text[end] == ch:
+            end += 1
+        before = text[pos - 1] if pos > 0 else ' '
+        after = text[end] if end < n else ' '
+        can_close = not before.isspace()
+        can_open = not after.isspace()
+        if ch == '_':
+            can_close = can_close and not after.isalnum()
+            can_open = can_open and not before.isalnum()
+        while pos < end:
+            if stack and can_close and end - pos >= len(stack[-1][1]):
+                opener = stack.pop()
+                pairs[opener] = pos
+                pos += len(opener[1])
+            elif not stack and can_close and end - pos >= len(delim):
+                return pos
+            elif can_open:
+                opener = (pos, ch * min(end - pos, 2))
+                stack.append(opener)
+                pos += len(opener[1])
+            else:
+                break
+        pos = end
+
+
+def make_blocks(block_type: str, runs: List[Dict], **extra) -> List[Dict]:
+    """Build one block, or several if its rich text exceeds Notion's limits"""
+    groups = group_rich_text(chunk_rich_text(runs) or [text_run("")])
+    blocks = []
+    for group in groups:
+        if block_type == "code" and len(groups) > 1:
+            # Each continuation is its own code block; drop the break it was split on
+            last = group[-1]
+            if last["text"]["content"].endswith("\n"):
+                group = group[:-1] + [dict(last, text=dict(last["text"], content=last["text"]["content"][:-1]))]
+        body = {"rich_text": group}
+        body.update(extra)
+        blocks.append({"type": block_type, block_type: body})
+    return blocks
+
+
+def _split_table_row(line: str) -> List[str]:
+    cells = re.split(r'(?<!\\)\|', line.strip())
+    if cells and cells[0] == '':
+        cells = cells[1:]
+    if cells and cells[-1] == '':
+        cells = cells[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in cells]
+
+
+def _indent_width(whitespace: str) -> int:
+    return len(whitespace.replace('\t', '    '))
+
+
+class MarkdownCompiler:
+    """Compiles a markdown document into a list of Notion blocks"""
+
+    def __init__(self, markdown: str):
+        self.lines = markdown.split('\n')
+        self.blocks: List[Dict] = []
+        # Open list items as (indent, block) from outermost to innermost
+        self.list_stack: List[tuple] = []
+
+    def compile(self) -> List[Dict]:
+        lines = self.lines
+        i = 0
+        n = len(lines)
+
+        while i < n:
+            line = lines[i].rstrip()
+
+            if not line.strip():
+                i += 1
+                continue
+
+            fence = FENCE_RE.match(line)
+            if fence:
+                i = self._code_block(i, fence)
+                continue
+
+            if TABLE_RE.match(line):
+                i = self._table(i)
+                continue
+
+            quote = QUOTE_RE.match(line)
+            if quote:
+                i = self._quote(i)
+                continue
+
+            item = TODO_RE.match(line)
+            if item:
+                indent, checked, text = item.groups()
+                self._list_item(_indent_width(indent), make_blocks(
+                    "to_do", parse_inline(text), checked=checked.lower() == 'x'))
+                i += 1
+                continue
+
+            item = BULLET_RE.match(line)
+            if item and not HR_RE.match(line):
+                indent, text = item.groups()
+                self._list_item(_indent_width(indent), make_blocks("bulleted_list_item", parse_inline(text)))
+                i += 1
+                continue
+
+            item = NUMBERED_RE.match(line)
+            if item:
+                indent, text = item.groups()
+                self._list_item(_indent_width(indent), make_blocks("numbered_list_item", parse_inline(text)))
+                i += 1
+                continue
+
+            # Indented text under a list item continues that item
+            indent = _indent_width(line[:len(line) - len(line.lstrip())])
+            if self.list_stack and indent > 0:
+                while self.list_stack and self.list_stack[-1][0] >= indent:
+                    self.list_stack.pop()
+                if self.list_stack:
+                    self._append_child(self.list_stack[-1][1], make_blocks("paragraph", parse_inline(line.strip())))
+                    i += 1
+                    continue
+
+            self.list_stack = []
+
+            heading = HEADING_RE.match(line)
+            if heading:
+                level = min(len(heading.group(1)), 3)
+                self.blocks.extend(make_blocks(f"heading_{level}", parse_inline(heading.group(2))))
+            elif HR_RE.match(line):
+                self.blocks.append({"type": "divider", "divider": {}})
+            elif IMAGE_RE.match(line) and WEB_URL_RE.match(IMAGE_RE.match(line).group(2)):
+                alt, url = IMAGE_RE.match(line).groups()
+                image = {"type": "external", "external": {"url": url}}
+                if alt:
+                    image["caption"] = [text_run(alt)]
+                self.blocks.append({"type": "image", "image": image})
+            else:
+                self.blocks.extend(make_blocks("paragraph", parse_inline(line.strip())))
+            i += 1
+
+        return self.blocks
+
+    def _emit(self, blocks: List[Dict]):
+        """Add top-level blocks, closing any open list"""
+        self.list_stack = []
+        self.blocks.extend(blocks)
+
+    def _append_child(self, parent: Dict, blocks: List[Dict]):
+        body = parent[parent["type"]]
+        body.setdefault("children", []).extend(blocks)
+
+    def _list_item(self, indent: int, blocks: List[Dict]):
+        """Place a list item at the nesting level given by its indentation"""
+        while self.list_stack and self.list_stack[-1][0] >= indent:
+            self.list_stack.pop()
+
+        if self.list_stack:
+            self._append_child(self.list_stack[-1][1], blocks)
+        else:
+            self.blocks.extend(blocks)
+
+        self.list_stack.append((indent, blocks[-1]))
+
+    def _code_block(self, i: int, fence) -> int:
+        marker, language = fence.group(1), fence.group(2)
+        code_lines = []
+        i += 1
+        while i < len(self.lines) and not self.lines[i].strip().startswith(marker):
+            code_lines.append(self.lines[i])
+            i += 1
+
+        self._emit(make_blocks("code", [text_run('\n'.join(code_lines))],
+                               language=normalize_language(language)))
+        return i + 1
+
+    def _table(self, i: int) -> int:
+        rows = []
+        has_header = False
+        while i < len(self.lines) and TABLE_RE.match(self.lines[i]):
+            line = self.lines[i]
+            if len(rows) == 1 and TABLE_SEPARATOR_RE.match(line):
+                has_header = True
+            else:
+                rows.append(_split_table_row(line))
+            i += 1
+
+        width = max(len(row) for row in rows)
+        table_rows = [{
+            "type": "table_row",
+            "table_row": {"cells": [chunk_rich_text(parse_inline(cell)) for cell in row + [''] * (width - len(row))]}
+        } for row in rows]
+
+        self._emit([{
+            "type": "table",
+            "table": {
+                "table_width": width,
+                "has_column_header": has_header,
+                "has_row_header": False,
+                "children": table_rows
+            }
+        }])
+        return i
+
+    def _quote(self, i: int) -> int:
+        quote_lines = []
+        while i < len(self.lines):
+            match = QUOTE_RE.match(self.lines[i])
+            if not match:
+                break
+            quote_lines.append(match.group(1))
+            i += 1
+
+        runs = []
+        for idx, text in enumerate(quote_lines):
+            if idx:
+                runs.append(text_run('\n'))
+            runs.extend(parse_inline(text))
+        self._emit(make_blocks("quote", runs))
+        return i
+
+
+def markdown_to_blocks(markdown: str) -> List[Dict]:
+    """Compile markdown into Notion blocks"""
+    return MarkdownCompiler(markdown).compile()
+
+
+def benchmark(paths: List[Path], target_bytes: int = 1_000_000, rounds: int = 3):
+    """Measure compiler throughput on READMEs scaled up to target_bytes"""
+    for path in paths:
+        source = path.read_text(encoding='utf-8')
+        if not source:
+            continue
+        repeat = max(1, target_bytes // len(source.encode('utf-8')))
+        document = '\n\n'.join([source] * repeat)
+        size_mb = len(document.encode('utf-8')) / 1_000_000
+
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            blocks = markdown_to_blocks(document)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        print(f"{path.parent.name}/{path.name}: {size_mb:.2f} MB, {len(blocks):,} blocks, "
+              f"{best:.3f}s ({size_mb / best:.1f} MB/s, {len(blocks) / best:,.0f} blocks/s)")
+
+
+def main():
+    """CLI interface"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        paths = [Path(p) for p in sys.argv[2:]]
+        if not paths:
+            paths = sorted((Path(__file__).parent.parent / "Docs").glob("*/README.md"))
+        benchmark(paths)
+    elif len(sys.argv) > 1:
+        import json
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            print(json.dumps(markdown_to_blocks(f.read()), indent=2, ensure_ascii=False))
+    else:
+        print("""
+Usage:
+  python markdown_to_notion.py <file.md>             # Print compiled blocks as JSON
+  python markdown_to_notion.py --benchmark [files]   # Throughput on ~1 MB documents
+        """)
+
+
+if __name__ == "__main__":
+    main()
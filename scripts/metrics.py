@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Metrics - Minimal Prometheus-style counters, gauges and histograms
+Process-wide registry rendered in the text exposition format, so the web
+service can serve /metrics without extra dependencies
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _labels(labels: Dict) -> LabelValues:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelValues, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, registry: Optional["Registry"] = None):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic count per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, registry: Optional["Registry"] = None):
+        super().__init__(name, help, registry)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(_labels(labels), 0)
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self.values.items())]
+
+
+class Gauge(Metric):
+    """
+    Current value per label set.
+
+    Pass `collect` to compute values at scrape time instead: a function
+    returning a list of (labels dict, value) pairs.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Optional[Callable[[], List[Tuple[Dict, float]]]] = None,
+                 registry: Optional["Registry"] = None):
+        super().__init__(name, help, registry)
+        self.values: Dict[LabelValues, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[_labels(labels)] = value
+
+    def samples(self):
+        if self.collect:
+            return [(self.name, _labels(labels), value) for labels, value in self.collect()]
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self.values.items())]
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS,
+                 registry: Optional["Registry"] = None):
+        super().__init__(name, help, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.series: Dict[LabelValues, Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self.series.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    out.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), count))
+                out.append((f"{self.name}_sum", key, series["sum"]))
+                out.append((f"{self.name}_count", key, series["count"]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            self.metrics.append(metric)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return next((m for m in self.metrics if m.name == name), None)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Notion API (recorded by NotionClient in whichever process makes the calls) ---
+
+NOTION_REQUESTS = Counter("notion_api_requests_total",
+                          "Notion API responses by method, endpoint and HTTP status")
+NOTION_RATE_LIMITED = Counter("notion_api_rate_limited_total", "429 responses from Notion")
+NOTION_RETRIES = Counter("notion_api_retries_total", "Requests retried, by reason")
+NOTION_LATENCY = Histogram("notion_api_request_seconds", "Notion API request latency")
@@ -7,31 +7,32 @@ Simple, clear, powerful.
 import os
 import sys
 import json
-import time
 import re
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-import requests
-from dotenv import load_dotenv
+
+from notion_client import NotionClient, load_env
 
 # Setup paths
 BASE_DIR = Path(__file__).parent.parent
 CACHE_DIR = BASE_DIR / "cache"
 CONFIG_FILE = CACHE_DIR / "notion_config.json"
 
-# Create directories
-CACHE_DIR.mkdir(exist_ok=True)
-(CACHE_DIR / "content").mkdir(exist_ok=True)
-(CACHE_DIR / "indexes").mkdir(exist_ok=True)
 
-# Load environment
-load_dotenv(BASE_DIR / ".env")
+def init_dirs():
+    """Create the cache directories the manager writes to"""
+    for directory in (CACHE_DIR, CACHE_DIR / "content", CACHE_DIR / "indexes"):
+        directory.mkdir(exist_ok=True)
+
 
 class NotionManager:
     """One class to manage everything Notion"""
 
-    def __init__(self):
+    def __init__(self, client: Optional[NotionClient] = None):
+        load_env()
+        init_dirs()
+
         # Get API key
         self.api_key = os.getenv("NOTION_API")
         if not self.api_key:
@@ -49,9 +50,16 @@ class NotionManager:
             "Notion-Version": "2022-06-28"
         }
 
+        self.client = client or NotionClient(self.api_key)
+
         # Load cached config if exists
         self.config = self._load_config()
 
+        # Processed pages by category, kept in memory between syncs
+        self.content: Dict[str, List[Dict]] = {}
+        # (cache file, mtime) each category's content was loaded from or saved to
+        self.content_source: Dict[str, tuple] = {}
+
     def _extract_page_id(self, url: str) -> str:
         """Extract page ID from Notion URL"""
         if not url:
@@ -84,30 +92,10 @@ class NotionManager:
 
     def _api_request(self, method: str, url: str, data: Optional[Dict] = None) -> Optional[Dict]:
         """Make API request with error handling"""
-        try:
-            if method == "GET":
-                response = requests.get(url, headers=self.headers)
-            elif method == "POST":
-                response = requests.post(url, headers=self.headers, json=data or {})
-            elif method == "PATCH":
-                response = requests.patch(url, headers=self.headers, json=data or {})
-            else:
-                return None
-
-            time.sleep(0.35)  # Rate limiting
-
-            if response.status_code == 429:  # Rate limited
-                retry_after = int(response.headers.get('Retry-After', 60))
-                print(f"Rate limited. Waiting {retry_after} seconds...")
-                time.sleep(retry_after)
-                return self._api_request(method, url, data)
-
-            response.raise_for_status()
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            print(f"API error: {e}")
+        if method not in ("GET", "POST", "PATCH"):
             return None
+        # Rate limiting, 429 and retries are handled by the shared client
+        return self.client.request(method, url, data=data)
 
     def discover(self, force: bool = False):
         """Discover all databases and save configuration"""
@@ -191,8 +179,61 @@ class NotionManager:
             # Clean name for use as key
             return re.sub(r'[^a-z0-9_]', '_', title_lower)
 
-    def sync(self):
-        """Sync all data from Notion"""
+    def _query_database(self, db_id: str, filter: Optional[Dict] = None) -> List[Dict]:
+        """Query every page of a database, optionally filtered"""
+        query_url = f"https://api.notion.com/v1/databases/{db_id}/query"
+        data = {"page_size": 100}
+        if filter:
+            data["filter"] = filter
+
+        pages = []
+        has_more = True
+        next_cursor = None
+
+        while has_more:
+            if next_cursor:
+                data["start_cursor"] = next_cursor
+
+            response = self._api_request("POST", query_url, data)
+            if not response:
+                break
+
+            pages.extend(response.get("results", []))
+            has_more = response.get("has_more", False)
+            next_cursor = response.get("next_cursor")
+
+        return pages
+
+    def _save_content(self, category: str, pages: List[Dict]):
+        """Write a category's pages to a new cache/content snapshot"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        cache_file = CACHE_DIR / "content" / f"{category}_{timestamp}.json"
+
+        with open(cache_file, 'w') as f:
+            json.dump(pages, f, indent=2, default=str)
+
+        self.content[category] = pages
+        self.content_source[category] = (cache_file.name, cache_file.stat().st_mtime)
+
+    def _latest_content(self, category: str) -> List[Dict]:
+        """
+        Pages for a category from the newest cache file. Kept in memory until
+        another process (a sync, the webhook refresher) writes a newer one.
+        """
+        files = sorted((CACHE_DIR / "content").glob(f"{category}_*.json"))
+        if files:
+            try:
+                source = (files[-1].name, files[-1].stat().st_mtime)
+                if self.content_source.get(category) != source:
+                    with open(files[-1], 'r') as f:
+                        self.content[category] = json.load(f)
+                    self.content_source[category] = source
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Could not read {files[-1].name}: {e}")
+        return self.content.get(category, [])
+
+    def sync(self) -> Dict[str, List[Dict]]:
+        """Sync all data from Notion; returns processed pages by category"""
         if not self.config.get('databases'):
             print("WARNING: No configuration found. Running discovery first...")
             self.discover()
@@ -200,53 +241,95 @@ class NotionManager:
         print("Syncing data from Notion...")
 
         total_pages = 0
+        synced = {}
 
-        for category, db_info in self.config['databases'].items():
-            db_id = db_info['id']
-            title = db_info['title']
-
-            print(f"\nSyncing {title}...")
-
-            # Query database
-            query_url = f"https://api.notion.com/v1/databases/{db_id}/query"
-            data = {"page_size": 100}
+        for category in self.config['databases']:
+            processed_pages = self.sync_database(category)
+            total_pages += len(processed_pages)
+            synced[category] = processed_pages
 
-            pages = []
-            has_more = True
-            next_cursor = None
+        # Create indexes
+        self._create_indexes()
 
-            while has_more:
-                if next_cursor:
-                    data["start_cursor"] = next_cursor
+        print(f"\nSync complete! Total items: {total_pages}")
+        return synced
+
+    def sync_database(self, category: str) -> List[Dict]:
+        """Re-read one database in full; returns its processed pages"""
+        db_info = self.config['databases'][category]
+        print(f"\nSyncing {db_info['title']}...")
+
+        processed_pages = [self._process_page(page) for page in self._query_database(db_info['id'])]
+        self._save_content(category, processed_pages)
+
+        print(f"  Synced {len(processed_pages)} items")
+        return processed_pages
+
+    def refresh_pages(self, category: str, page_ids: List[str], removed: Optional[List[str]] = None) -> int:
+        """
+        Re-read single rows of a database and merge them into the cached
+        content; ids in `removed` (or pages now archived) are dropped.
+        Returns the number of rows changed.
+        """
+        merged = {page["id"]: page for page in self._latest_content(category)}
+        changed = 0
+
+        for page_id in removed or []:
+            if merged.pop(page_id, None):
+                changed += 1
+
+        for page_id in page_ids:
+            page = self._api_request("GET", f"https://api.notion.com/v1/pages/{page_id}")
+            if not page:
+                continue
+            if page.get("archived") or page.get("in_trash"):
+                if merged.pop(page["id"], None):
+                    changed += 1
+                continue
+            processed = self._process_page(page)
+            if merged.get(processed["id"]) != processed:
+                merged[processed["id"]] = processed
+                changed += 1
+
+        if changed:
+            self._save_content(category, list(merged.values()))
+        return changed
+
+    def sync_changes(self, since: str) -> Dict[str, int]:
+        """
+        Fetch only pages edited since an ISO timestamp and merge them into the
+        cached content. Returns the number of new or changed pages by category.
+
+        Pages archived in Notion drop out of queries, so removals only show up
+        on the next full sync().
+        """
+        if not self.config.get('databases'):
+            return {}
 
-                response = self._api_request("POST", query_url, data)
-                if not response:
-                    break
+        edited = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+        changes = {}
 
-                pages.extend(response.get("results", []))
-                has_more = response.get("has_more", False)
-                next_cursor = response.get("next_cursor")
+        for category, db_info in self.config['databases'].items():
+            pages = self._query_database(db_info['id'], filter=edited)
+            if not pages:
+                continue
 
-            # Process pages
-            processed_pages = []
+            merged = {page["id"]: page for page in self._latest_content(category)}
+            changed = 0
             for page in pages:
                 processed = self._process_page(page)
-                processed_pages.append(processed)
-
-            # Save to cache
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            cache_file = CACHE_DIR / "content" / f"{category}_{timestamp}.json"
+                if merged.get(processed["id"]) != processed:
+                    merged[processed["id"]] = processed
+                    changed += 1
 
-            with open(cache_file, 'w') as f:
-                json.dump(processed_pages, f, indent=2, default=str)
+            if changed:
+                self._save_content(category, list(merged.values()))
+                changes[category] = changed
 
-            print(f"  Synced {len(processed_pages)} items")
-            total_pages += len(processed_pages)
-
-        # Create indexes
-        self._create_indexes()
+        if "tasks" in changes:
+            self._create_indexes()
 
-        print(f"\nSync complete! Total items: {total_pages}")
+        return changes
 
     def _process_page(self, page: Dict) -> Dict:
         """Process a Notion page into simplified format"""
@@ -456,6 +539,25 @@ class NotionManager:
         if not_started / total > 0.7:
             print("4. Over 70% of tasks not started. Break down into smaller tasks.")
 
+    def query(self, text: str, limit: int = 20):
+        """Find cached pages whose properties mention text"""
+        needle = text.lower()
+        matches = []
+        for category in self.config.get('databases', {}):
+            for page in self._latest_content(category):
+                props = page.get("properties", {})
+                if needle in json.dumps(props, default=str).lower():
+                    matches.append((category, props))
+
+        print(f"\n=== {len(matches)} match(es) for '{text}' ===\n")
+        for category, props in matches[:limit]:
+            print(f"[{category}] {props.get('Name') or props.get('Title') or '(untitled)'}")
+            details = [f"{key}: {props[key]}" for key in ("Status", "Priority", "Due Date") if props.get(key)]
+            if details:
+                print(f"     {' | '.join(details)}")
+        if len(matches) > limit:
+            print(f"\n... {len(matches) - limit} more")
+
     def _load_index(self, name: str) -> Any:
         """Load an index file"""
         index_file = CACHE_DIR / "indexes" / f"{name}.json"
@@ -476,9 +578,14 @@ Usage:
   python notion.py sync        # Pull latest data from Notion
   python notion.py status      # Show current status
   python notion.py analyze     # AI analysis and recommendations
+  python notion.py query TEXT  # Search cached tasks, notes and projects
+  python notion.py daemon      # Watch READMEs and poll Notion continuously
 
 Options:
   --force                      # Force rediscovery of databases
+  --local                      # status/analyze/query: don't ask a running daemon
+  --no-push / --no-pull        # daemon: only sync one direction
+  --on-conflict=POLICY         # daemon: skip, merge (default) or backup-and-overwrite
 
 First time? Run: python notion.py discover
 """)
@@ -486,6 +593,15 @@ First time? Run: python notion.py discover
 
     command = sys.argv[1]
     force = "--force" in sys.argv
+    args = [arg for arg in sys.argv[2:] if not arg.startswith("--")]
+
+    # Read commands are answered by a running daemon when there is one
+    if command in ("status", "analyze", "query") and "--local" not in sys.argv:
+        from daemon_ipc import forward
+        output = forward(command, args)
+        if output is not None:
+            print(output, end="")
+            return
 
     # Initialize manager
     nm = NotionManager()
@@ -499,6 +615,17 @@ First time? Run: python notion.py discover
         nm.status()
     elif command == "analyze":
         nm.analyze()
+    elif command == "query":
+        if not args:
+            print("ERROR: Usage: python notion.py query TEXT")
+            return
+        nm.query(" ".join(args))
+    elif command == "daemon":
+        from notion_daemon import SyncDaemon
+        from sync_policy import SyncPolicy
+        policy, _ = SyncPolicy.from_argv(sys.argv[2:])
+        SyncDaemon(nm, policy=policy, push="--no-push" not in sys.argv,
+                   pull="--no-pull" not in sys.argv).run()
     else:
         print(f"ERROR: Unknown command: {command}")
         print("Run 'python notion.py' for help")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Block Tree Fetcher - Materialize nested Notion content before rendering
+Expands has_children blocks breadth-first with bounded concurrency and
+reuses cached subtrees while the page they belong to hasn't been edited
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from notion_client import NotionClient
+
+BASE_DIR = Path(__file__).parent.parent
+TREE_CACHE_FILE = BASE_DIR / "cache" / "block_trees.json"
+
+# Blocks whose children belong to another page/database, not to this tree
+OPAQUE_TYPES = {"child_page", "child_database", "link_to_page"}
+
+
+class BlockTreeFetcher:
+    """
+    Fetches a complete block tree so renderers never have to do I/O.
+
+    Each fetched block gets a "children" list. Subtrees are cached per page,
+    under the version they were fetched at - the page's last_edited_time -
+    and reused only while that matches. A block's own last_edited_time
+    doesn't move when its children or grandchildren are edited, so it can't
+    tell a stale subtree on its own. A page's entry is replaced whole when it
+    is fetched at a new version, so the cache holds one tree per page.
+    """
+
+    def __init__(self, client: Optional[NotionClient] = None, max_workers: int = 3,
+                 cache_file: Path = TREE_CACHE_FILE):
+        self.client = client or NotionClient()
+        self.max_workers = max_workers
+        self.cache_file = cache_file
+        self._cache_lock = threading.Lock()
+        self.cache = self._load_cache()
+        self.stats = {"fetched": 0, "cached": 0}
+
+    def _load_cache(self) -> Dict:
+        """Load cached subtrees, {page/block ID: {"version", "blocks"}}"""
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                # Entries without "blocks" are per-block ones from older versions
+                return {k: v for k, v in json.load(f).items() if "blocks" in v}
+        return {}
+
+    def save_cache(self):
+        """Save cached subtrees"""
+        with self._cache_lock:
+            with open(self.cache_file, 'w') as f:
+                json.dump(self.cache, f)
+
+    def _cached_children(self, cached: Dict, block: Dict) -> Optional[List[Dict]]:
+        """Return the cached subtree from the page's current-version entry"""
+        entry = cached.get(block["id"])
+        if entry and entry.get("last_edited_time") == block.get("last_edited_time"):
+            return entry["children"]
+        return None
+
+    def _expandable(self, block: Dict) -> bool:
+        return block.get("has_children", False) and block.get("type") not in OPAQUE_TYPES
+
+    def fetch(self, block_id: str, use_cache: bool = True, version: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch the children of block_id with all nested content attached.
+
+        version is the last_edited_time of the page holding the tree; cached
+        subtrees are only used (and only stored) when it is given. Raises
+        NotionFetchError if any level fails, so a partial tree is never
+        returned or cached.
+        """
+        page = self.cache.get(block_id) if use_cache and version is not None else None
+        cached = page["blocks"] if page and page.get("version") == version else {}
+        root_children = self.client.get_block_children(block_id, strict=True)
+        self.stats["fetched"] += 1
+
+        frontier = [b for b in root_children if self._expandable(b)]
+        expanded = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while frontier:
+                to_fetch = []
+                for block in frontier:
+                    subtree = self._cached_children(cached, block)
+                    if subtree is not None:
+                        block["children"] = subtree
+                        self.stats["cached"] += 1
+                    else:
+                        to_fetch.append(block)
+
+                results = pool.map(lambda b: self.client.get_block_children(b["id"], strict=True), to_fetch)
+
+                next_frontier = []
+                for block, children in zip(to_fetch, results):
+                    block["children"] = children
+                    expanded.append(block)
+                    self.stats["fetched"] += 1
+                    next_frontier.extend(c for c in children if self._expandable(c))
+
+                frontier = next_frontier
+
+        if version is None:
+            return root_children
+
+        # Children are fully materialized now, so whole subtrees can be cached;
+        # anything cached for an older version of the page is dropped
+        blocks = dict(cached)
+        for block in expanded:
+            blocks[block["id"]] = {
+                "last_edited_time": block.get("last_edited_time"),
+                "children": block["children"]
+            }
+        with self._cache_lock:
+            self.cache[block_id] = {"version": version, "blocks": blocks}
+
+        return root_children
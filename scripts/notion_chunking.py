@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Notion Chunking - Fit compiled blocks into Notion's request limits
+Splits long rich text at natural boundaries and plans the fewest append
+requests that respect the children, block count, byte size and nesting limits
+"""
+
+import json
+from typing import Dict, List, Optional
+
+# Notion API limits
+MAX_TEXT_LENGTH = 2000       # characters per rich text object
+MAX_RICH_TEXT_ITEMS = 100    # rich text objects per block
+MAX_CHILDREN = 100           # blocks per children array / append request
+MAX_REQUEST_BLOCKS = 1000    # block elements in one request payload
+MAX_REQUEST_BYTES = 500_000  # serialized size of one request payload
+
+# The request body around its blocks, with room for an "after" block ID
+REQUEST_ENVELOPE_BYTES = len(json.dumps({"children": [], "after": "0" * 36}))
+
+# How far back from the hard limit to look for a newline or space
+SPLIT_WINDOW = 500
+
+
+def split_text(content: str, limit: int = MAX_TEXT_LENGTH) -> List[str]:
+    """Split text into pieces of at most limit, preferring line then word breaks"""
+    pieces = []
+    start = 0
+    while len(content) - start > limit:
+        end = start + limit
+        floor = max(start + 1, end - SPLIT_WINDOW)
+        cut = content.rfind('\n', floor, end)
+        if cut == -1:
+            cut = content.rfind(' ', floor, end)
+        # Keep the separator at the end of the left piece
+        cut = cut + 1 if cut != -1 else end
+        pieces.append(content[start:cut])
+        start = cut
+    pieces.append(content[start:])
+    return pieces
+
+
+def _same_style(a: Dict, b: Dict) -> bool:
+    return (a.get("type", "text") == b.get("type", "text") == "text"
+            and a.get("annotations", {}) == b.get("annotations", {})
+            and a["text"].get("link") == b["text"].get("link"))
+
+
+def chunk_rich_text(runs: List[Dict], limit: int = MAX_TEXT_LENGTH) -> List[Dict]:
+    """
+    Merge adjacent runs with identical styling, then split any run over the
+    character limit. Every piece keeps its run's annotations and link.
+    """
+    merged = []
+    for run in runs:
+        if merged and _same_style(merged[-1], run):
+            last = merged[-1]
+            merged[-1] = dict(last, text=dict(last["text"], content=last["text"]["content"] + run["text"]["content"]))
+        else:
+            merged.append(run)
+
+    result = []
+    for run in merged:
+        content = run.get("text", {}).get("content", "")
+        if len(content) <= limit:
+            result.append(run)
+            continue
+        for piece in split_text(content, limit):
+            result.append(dict(run, text=dict(run["text"], content=piece)))
+    return result
+
+
+def group_rich_text(runs: List[Dict], max_items: int = MAX_RICH_TEXT_ITEMS) -> List[List[Dict]]:
+    """Split a rich text array into per-block groups under the item limit"""
+    return [runs[start:start + max_items] for start in range(0, len(runs), max_items)] or [[]]
+
+
+def _children_of(block: Dict) -> List[Dict]:
+    return block.get(block["type"], {}).get("children") or []
+
+
+def payload_size(payload) -> int:
+    """Bytes a block (or request) takes in the JSON body, as requests sends it"""
+    return len(json.dumps(payload))
+
+
+def _inline_weight(child: Dict) -> Optional[int]:
+    """Blocks a child adds to a request when sent inline, or None if it can't be"""
+    grandchildren = _children_of(child)
+    if len(grandchildren) > MAX_CHILDREN or any(_children_of(g) for g in grandchildren):
+        return None
+    return 1 + len(grandchildren)
+
+
+def _trim(block: Dict):
+    """
+    Split a block into what can be sent inline and what must be appended later.
+
+    A request may nest two levels under each block it sends, and appended
+    blocks only come back with their own IDs, so an inline child may carry
+    children of its own only if those are leaves. The longest such prefix
+    goes inline, up to the block and byte limits; everything after it is
+    appended to the block once it exists, which keeps sibling order intact.
+    Returns (payload, blocks inlined, deferred children).
+    """
+    children = _children_of(block)
+    if not children:
+        return block, 0, []
+
+    inline = weight = 0
+    body = {k: v for k, v in block[block["type"]].items() if k != "children"}
+    size = (REQUEST_ENVELOPE_BYTES + payload_size(dict(block, **{block["type"]: body}))
+            + len(', "children": []'))
+    while inline < min(len(children), MAX_CHILDREN):
+        extra = _inline_weight(children[inline])
+        if extra is None or weight + extra >= MAX_REQUEST_BLOCKS:
+            break
+        extra_size = payload_size(children[inline]) + 2  # ", " between siblings
+        if size + extra_size > MAX_REQUEST_BYTES:
+            break
+        inline += 1
+        weight += extra
+        size += extra_size
+
+    if inline:
+        body["children"] = children[:inline]
+    return dict(block, **{block["type"]: body}), weight, children[inline:]
+
+
+def plan_appends(blocks: List[Dict]) -> List[Dict]:
+    """
+    Pack blocks into the fewest append requests.
+
+    Returns requests in execution order as {"parent", "children", "keys"}.
+    "parent" is None for the target block or the key of a block created by an
+    earlier request; "keys" names the created children later requests append to.
+    """
+    plan = []
+    pending = [(None, blocks)]
+    next_key = 0
+
+    while pending:
+        parent, siblings = pending.pop(0)
+        children, keys, weight, size = [], [], 0, REQUEST_ENVELOPE_BYTES
+
+        for block in siblings:
+            payload, inline, deferred = _trim(block)
+            block_size = payload_size(payload) + 2
+            if children and (len(children) >= MAX_CHILDREN or weight + 1 + inline > MAX_REQUEST_BLOCKS
+                             or size + block_size > MAX_REQUEST_BYTES):
+                plan.append({"parent": parent, "children": children, "keys": keys})
+                children, keys, weight, size = [], [], 0, REQUEST_ENVELOPE_BYTES
+
+            key = None
+            if deferred:
+                key = next_key
+                next_key += 1
+                pending.append((key, deferred))
+
+            children.append(payload)
+            keys.append(key)
+            weight += 1 + inline
+            size += block_size
+
+        if children:
+            plan.append({"parent": parent, "children": children, "keys": keys})
+
+    return plan
+
+
+def execute_plan(client, parent_id: str, plan: List[Dict],
+                 after: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Run a plan against parent_id; returns the IDs of the top-level blocks created.
+
+    With after, top-level blocks are inserted after that child instead of at the end.
+    """
+    ids = {}
+    created = []
+
+    for request in plan:
+        data = {"children": request["children"]}
+        if request["parent"] is None:
+            target = parent_id
+            if after:
+                data["after"] = created[-1] if created else after
+        else:
+            target = ids[request["parent"]]
+
+        response = client.patch(f"blocks/{target}/children", data)
+        if response is None:
+            return None
+
+        results = response.get("results", [])[-len(request["children"]):]
+        if after and request["parent"] is None:
+            # Inserted blocks come back in position, not at the end of the list
+            index = next((i for i, r in enumerate(response.get("results", []))
+                          if r["id"] == data["after"]), None)
+            if index is not None:
+                results = response["results"][index + 1:index + 1 + len(request["children"])]
+
+        for key, result in zip(request["keys"], results):
+            if key is not None:
+                ids[key] = result["id"]
+        if request["parent"] is None:
+            created.extend(result["id"] for result in results)
+
+    return created
+
+
+def append_blocks(client, parent_id: str, blocks: List[Dict],
+                  after: Optional[str] = None) -> Optional[List[str]]:
+    """Append blocks of any size or depth under parent_id (optionally after a child)"""
+    return execute_plan(client, parent_id, plan_appends(blocks), after)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Shared Notion API client
+One pooled HTTP session with thread-safe rate limiting and 429 handling
+"""
+
+import os
+import re
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from metrics import NOTION_LATENCY, NOTION_RATE_LIMITED, NOTION_REQUESTS, NOTION_RETRIES
+
+BASE_DIR = Path(__file__).parent.parent
+
+_env_loaded = False
+
+
+def load_env():
+    """Load .env into os.environ, once; call before reading settings"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv(BASE_DIR / ".env")
+        _env_loaded = True
+
+
+API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+ID_PATTERN = re.compile(r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}")
+
+
+class NotionFetchError(RuntimeError):
+    """A read the caller can't do without failed (see strict=True)"""
+
+
+def endpoint_label(url: str) -> str:
+    """API path with IDs collapsed, e.g. blocks/{id}/children, for metrics"""
+    path = url.split("?")[0].replace(API_URL, "").strip("/")
+    return ID_PATTERN.sub("{id}", path)
+
+
+class NotionClient:
+    """
+    Thread-safe wrapper around the Notion REST API.
+
+    Requests from every thread share one slot schedule, so concurrent callers
+    together stay under Notion's ~3 requests/second average. The HTTP session
+    (and requests itself) is only set up when the first request is made.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, min_interval: float = 0.35,
+                 pool_size: int = 8, max_retries: int = 3):
+        if not api_key:
+            load_env()
+        self.api_key = api_key or os.getenv("NOTION_API")
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+
+        self._session = None
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    session.headers.update({
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                        "Notion-Version": NOTION_VERSION
+                    })
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def _throttle(self):
+        """Wait for this thread's turn in the shared request schedule"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def request(self, method: str, path: str, params: Optional[Dict] = None,
+                data: Optional[Dict] = None) -> Optional[Dict]:
+        """Make API request with rate limiting and retries"""
+        import requests
+
+        url = path if path.startswith("http") else f"{API_URL}/{path.lstrip('/')}"
+        endpoint = endpoint_label(url)
+
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, params=params,
+                    json=data if method in ("POST", "PATCH") else None
+                )
+            except requests.exceptions.RequestException as e:
+                NOTION_REQUESTS.inc(method=method, endpoint=endpoint, status="error")
+                print(f"API error: {e}")
+                return None
+            NOTION_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+            NOTION_REQUESTS.inc(method=method, endpoint=endpoint, status=response.status_code)
+
+            if response.status_code == 429:  # Rate limited
+                NOTION_RATE_LIMITED.inc(endpoint=endpoint)
+                NOTION_RETRIES.inc(reason="rate_limited")
+                retry_after = int(response.headers.get('Retry-After', 60))
+                print(f"Rate limited. Waiting {retry_after} seconds...")
+                time.sleep(retry_after)
+                continue
+
+            if response.status_code >= 500 and attempt < self.max_retries:
+                NOTION_RETRIES.inc(reason="server_error")
+                time.sleep(2 ** attempt)
+                continue
+
+            if response.status_code >= 400:
+                print(f"API error: {response.status_code} {method} {url}")
+                return None
+
+            return response.json()
+
+        return None
+
+    def get(self, path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        return self.request("GET", path, params=params)
+
+    def post(self, path: str, data: Optional[Dict] = None) -> Optional[Dict]:
+        return self.request("POST", path, data=data or {})
+
+    def patch(self, path: str, data: Optional[Dict] = None) -> Optional[Dict]:
+        return self.request("PATCH", path, data=data or {})
+
+    def delete(self, path: str) -> Optional[Dict]:
+        return self.request("DELETE", path)
+
+    def iter_block_children(self, block_id: str, strict: bool = False) -> Iterator[Dict]:
+        """
+        Yield the direct children of a block, one API page at a time.
+
+        A failed request ends the iteration early; with strict=True it raises
+        NotionFetchError instead, for callers that must not mistake a partial
+        listing for the whole one.
+        """
+        params = {"page_size": 100}
+
+        while True:
+            data = self.get(f"blocks/{block_id}/children", params=params)
+            if data is None:
+                print(f"[ERROR] Failed to get block children: {block_id}")
+                if strict:
+                    raise NotionFetchError(f"Failed to get block children: {block_id}")
+                return
+
+            yield from data.get("results", [])
+
+            if not data.get("has_more"):
+                return
+            params["start_cursor"] = data.get("next_cursor")
+
+    def get_block_children(self, block_id: str, strict: bool = False) -> List[Dict]:
+        """Get all direct children of a block"""
+        return list(self.iter_block_children(block_id, strict=strict))
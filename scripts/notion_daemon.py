@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Sync Daemon - Keep READMEs, tasks and indexes in sync continuously
+Pushes README edits after a quiet period and polls Notion for changes,
+polling faster while edits are happening and backing off when idle
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from daemon_ipc import CommandServer
+from metrics import NOTION_RATE_LIMITED, NOTION_REQUESTS, NOTION_RETRIES
+from sync_policy import SyncPolicy
+
+BASE_DIR = Path(__file__).parent.parent
+DOCS_DIR = BASE_DIR / "Docs"
+STATE_FILE = BASE_DIR / "cache" / "daemon_state.json"
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.md5(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class ReadmeWatcher:
+    """
+    Reports changed Docs/<project>/README.md files.
+
+    Uses watchdog (inotify on Linux) when it is installed and falls back to
+    polling modification times.
+    """
+
+    def __init__(self, docs_dir: Path, on_change: Callable[[str], None], poll_interval: float = 2.0):
+        self.docs_dir = docs_dir
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    def _readme_folder(self, path: str) -> Optional[str]:
+        path = Path(path)
+        if path.name == "README.md" and path.parent.parent == self.docs_dir:
+            return path.parent.name
+        return None
+
+    def start(self) -> str:
+        """Start watching; returns the mechanism used"""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+            return "polling"
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Editors often save via rename, so check both ends of a move
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    folder = watcher._readme_folder(path) if path else None
+                    if folder:
+                        watcher.on_change(folder)
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(self.docs_dir), recursive=True)
+        self._observer.start()
+        return "watchdog"
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[float]:
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            # Between glob and stat, e.g. a pull swapping the README in with os.replace
+            return None
+
+    def _poll(self):
+        mtimes = {p: self._mtime(p) for p in self.docs_dir.glob("*/README.md")}
+        while not self._stop.wait(self.poll_interval):
+            for path in self.docs_dir.glob("*/README.md"):
+                mtime = self._mtime(path)
+                if mtime is not None and mtimes.get(path) != mtime:
+                    mtimes[path] = mtime
+                    self.on_change(path.parent.name)
+
+    def stop(self):
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+
+
+class SyncDaemon:
+    """
+    Long-running sync loop sharing one NotionManager and client.
+
+    - README edits are pushed once a file has been quiet for `debounce` seconds
+    - Tasks are fetched incrementally (last_edited_time filter), with a full
+      sync every `full_sync_hours` to pick up deletions
+    - Synced blocks are pulled when their last_edited_time moves
+    - The poll interval drops to `min_interval` after any change and doubles
+      on each quiet cycle up to `max_interval`
+    - Read commands from the CLIs are answered over a Unix socket from the
+      daemon's warm state (see daemon_ipc.py)
+    """
+
+    def __init__(self, manager, policy: Optional[SyncPolicy] = None, debounce: float = 5.0,
+                 min_interval: float = 60, max_interval: float = 900, full_sync_hours: float = 6,
+                 push: bool = True, pull: bool = True, serve: bool = True):
+        from pull_from_notion import NotionToReadmeSync
+        from sync_readme_to_notion import ReadmeToNotionSync
+
+        self.manager = manager
+        self.client = manager.client
+        # A daemon can't prompt; merge unless told otherwise
+        policy = policy or SyncPolicy()
+        self.policy = policy if not policy.interactive else SyncPolicy("merge")
+
+        self.puller = NotionToReadmeSync(client=self.client, policy=self.policy) if pull else None
+        self.pusher = ReadmeToNotionSync(client=self.client) if push else None
+
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.full_sync_every = timedelta(hours=full_sync_hours)
+
+        self.pending: Dict[str, float] = {}
+        self.synced_hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.watcher = ReadmeWatcher(DOCS_DIR, self._on_readme_change) if push else None
+
+        self.last_poll: Optional[datetime] = None
+        self.last_full_sync: Optional[datetime] = None
+        self.started = datetime.now(timezone.utc)
+        self.stats = {"pushes": 0, "pulls": 0, "task_changes": 0, "polls": 0, "commands": 0}
+        self._stopped = threading.Event()
+
+        self.server = CommandServer(self.command_handlers()) if serve else None
+        self.task_manager = None
+        self.task_store: Dict[str, Dict] = {}
+        self.task_read_at: Optional[datetime] = None
+        self._task_lock = threading.Lock()
+
+    def log(self, message: str):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+
+    def _on_readme_change(self, folder: str):
+        with self._lock:
+            self.pending[folder] = time.monotonic()
+
+    def _remember(self, folder: str):
+        """Record a README as in sync so our own writes don't trigger a push"""
+        digest = _file_hash(DOCS_DIR / folder / "README.md")
+        if digest:
+            self.synced_hashes[folder] = digest
+
+    def push_due(self) -> int:
+        """Push READMEs that have been quiet for the debounce period"""
+        now = time.monotonic()
+        with self._lock:
+            due = [f for f, t in self.pending.items() if now - t >= self.debounce]
+            for folder in due:
+                del self.pending[folder]
+
+        pushed = 0
+        for folder in due:
+            if folder not in self.pusher.mappings:
+                continue
+            if _file_hash(DOCS_DIR / folder / "README.md") == self.synced_hashes.get(folder):
+                continue  # written by a pull, or saved without changes
+            self.log(f"[PUSH] {folder}")
+            if self.pusher.sync_project(folder):
+                self._remember(folder)
+                if self.puller:
+                    # The page's timestamp now reflects our own write
+                    self.puller.record_push(folder, DOCS_DIR / folder / "README.md")
+                self.stats["pushes"] += 1
+                pushed += 1
+        return pushed
+
+    def poll(self) -> int:
+        """One incremental pass over Notion; returns the number of changes seen"""
+        started = datetime.now(timezone.utc)
+        changes = 0
+
+        if self.last_full_sync is None or started - self.last_full_sync >= self.full_sync_every:
+            self.log("[SYNC] Full database sync")
+            self.manager.sync()
+            self.last_full_sync = started
+            self.task_read_at = None  # next task read is a full one too, to drop deleted tasks
+        else:
+            # Notion timestamps have minute granularity; overlap by one
+            since = (self.last_poll - timedelta(minutes=1)).isoformat()
+            for category, count in self.manager.sync_changes(since).items():
+                self.log(f"[SYNC] {count} changed in {category}")
+                changes += count
+                if category == "tasks":
+                    self.stats["task_changes"] += count
+
+        if self.puller:
+            for folder in self.puller.mappings:
+                if self.puller.pull_project(folder):
+                    self._remember(folder)
+                    self.stats["pulls"] += 1
+                    changes += 1
+            self.policy.save_report()
+
+        self.last_poll = started
+        self.stats["polls"] += 1
+        return changes
+
+    def adapt_interval(self, changes: int):
+        if changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+    # --- Commands served to the CLIs ----------------------------------------
+
+    def command_handlers(self) -> Dict[str, Callable[[List[str]], None]]:
+        def counted(handler):
+            def run(args):
+                self.stats["commands"] += 1
+                handler(args)
+            return run
+
+        return {name: counted(handler) for name, handler in {
+            "status": self._cmd_status,
+            "analyze": lambda args: self.manager.analyze(),
+            "query": lambda args: self.manager.query(" ".join(args)),
+            "generate-tasks": self._cmd_generate_tasks,
+            "task-read": self._cmd_task_read,
+        }.items()}
+
+    def _cmd_status(self, args: List[str]):
+        self.manager.status()
+        print("\nDaemon:")
+        print(f"  PID: {os.getpid()} (running since {self.started.astimezone().strftime('%Y-%m-%d %H:%M:%S')})")
+        if self.last_poll:
+            print(f"  Last poll: {self.last_poll.astimezone().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"  Poll interval: {self.interval:.0f}s")
+        print(f"  Pushes: {self.stats['pushes']}, pulls: {self.stats['pulls']}, "
+              f"task changes: {self.stats['task_changes']}")
+
+    def _cmd_generate_tasks(self, args: List[str]):
+        from generate_tasks_md import TaskGenerator
+        generator = TaskGenerator(tasks=self.manager._latest_content("tasks") or None)
+        if generator.tasks:
+            generator.generate_all_tasks_files()
+        else:
+            print("[INFO] No tasks synced yet")
+
+    def _cmd_task_read(self, args: List[str]):
+        """notion_task_manager.py read, fetching only tasks edited since the last read"""
+        with self._task_lock:
+            if self.task_manager is None:
+                from notion_task_manager import NotionTaskManager
+                self.task_manager = NotionTaskManager(client=self.client)
+
+            started = datetime.now(timezone.utc)
+            if self.task_read_at is None:
+                self.task_store = {t["id"]: t for t in self.task_manager.read_all_tasks()}
+            else:
+                since = (self.task_read_at - timedelta(minutes=1)).isoformat()
+                changed = self.task_manager.read_all_tasks(filter={
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": since}
+                })
+                for task in changed:
+                    self.task_store[task["id"]] = task
+                print(f"[INFO] {len(changed)} changed since last read, {len(self.task_store)} in memory")
+            self.task_read_at = started
+            self.task_manager.save_tasks(list(self.task_store.values()))
+
+    def save_state(self):
+        """Write a small status file other tools can read"""
+        state = {
+            "pid": os.getpid(),
+            "started": self.started.isoformat(),
+            "last_poll": self.last_poll.isoformat() if self.last_poll else None,
+            "last_full_sync": self.last_full_sync.isoformat() if self.last_full_sync else None,
+            "interval_seconds": self.interval,
+            "stats": self.stats,
+            # This process's Notion traffic, for the web service's /metrics
+            "notion_api": {
+                "requests": NOTION_REQUESTS.total(),
+                "rate_limited": NOTION_RATE_LIMITED.total(),
+                "retries": NOTION_RETRIES.total()
+            }
+        }
+        with open(STATE_FILE, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    def stop(self):
+        """Ask a running loop to exit after its current step"""
+        self._stopped.set()
+
+    def run(self):
+        """Run until interrupted"""
+        for folder in (self.pusher.mappings if self.pusher else []):
+            self._remember(folder)
+
+        mode = self.watcher.start() if self.watcher else "off"
+        self.log(f"[START] Sync daemon (README watch: {mode}, policy: {self.policy.on_conflict})")
+        if self.server:
+            self.server.start()
+            self.log(f"[START] Serving CLI commands on {self.server.path}")
+
+        next_poll = time.monotonic()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    if self.pusher and self.push_due():
+                        # Local activity: check Notion again soon
+                        self.interval = self.min_interval
+                        next_poll = min(next_poll, time.monotonic() + self.min_interval)
+
+                    if time.monotonic() >= next_poll:
+                        self.adapt_interval(self.poll())
+                        self.save_state()
+                        self.log(f"[WAIT] Next Notion poll in {self.interval:.0f}s")
+                        next_poll = time.monotonic() + self.interval
+                except Exception as e:
+                    # One failed cycle (network, a README mid-replace) must not end the daemon
+                    self.adapt_interval(0)
+                    self.log(f"[ERROR] Sync cycle failed: {type(e).__name__}: {e}; "
+                             f"retrying in {self.interval:.0f}s")
+                    next_poll = time.monotonic() + self.interval
+                    self._stopped.wait(self.interval)
+                    continue
+
+                self._stopped.wait(1)
+        except KeyboardInterrupt:
+            self.log("[STOP] Shutting down")
+        finally:
+            if self.server:
+                self.server.stop()
+            if self.watcher:
+                self.watcher.stop()
+            if self.puller:
+                self.puller.tree_fetcher.save_cache()
+            self.save_state()
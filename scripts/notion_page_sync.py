@@ -6,13 +6,18 @@ Maps entire README files to Notion page content blocks
 
 import os
 import json
-import hashlib
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 import requests
 from dotenv import load_dotenv
 
+from markdown_to_notion import markdown_to_blocks
+from notion_chunking import append_blocks
+from notion_to_markdown import blocks_to_markdown, write_markdown
+from notion_client import NotionClient, NotionFetchError
+from sync_policy import SyncPolicy
+
 load_dotenv()
 
 # Page mapping configuration
@@ -64,6 +69,7 @@ class NotionPageSync:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.client = NotionClient(self.api_key)
 
         # Load or initialize page mappings
         self.load_page_mappings()
@@ -87,157 +93,36 @@ class NotionPageSync:
 
     def markdown_to_notion_blocks(self, markdown: str) -> List[Dict]:
         """Convert markdown content to Notion block format"""
-        blocks = []
-        lines = markdown.split('\n')
-
-        for line in lines:
-            if not line.strip():
-                continue
-
-            # Headers
-            if line.startswith('# '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"type": "text", "text": {"content": line[2:]}}]
-                    }
-                })
-            elif line.startswith('## '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": line[3:]}}]
-                    }
-                })
-            elif line.startswith('### '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_3",
-                    "heading_3": {
-                        "rich_text": [{"type": "text", "text": {"content": line[4:]}}]
-                    }
-                })
-            # Bullets
-            elif line.startswith('- '):
-                blocks.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": [{"type": "text", "text": {"content": line[2:]}}]
-                    }
-                })
-            # Checkboxes
-            elif line.startswith('- [ ] ') or line.startswith('- [x] '):
-                checked = line.startswith('- [x] ')
-                blocks.append({
-                    "object": "block",
-                    "type": "to_do",
-                    "to_do": {
-                        "rich_text": [{"type": "text", "text": {"content": line[6:]}}],
-                        "checked": checked
-                    }
-                })
-            # Code blocks
-            elif line.startswith('```'):
-                # Handle code blocks (simplified)
-                blocks.append({
-                    "object": "block",
-                    "type": "code",
-                    "code": {
-                        "rich_text": [{"type": "text", "text": {"content": "Code block"}}],
-                        "language": "plain text"
-                    }
-                })
-            # Regular paragraphs
-            elif line.strip():
-                blocks.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": line}}]
-                    }
-                })
-
-        return blocks
+        return markdown_to_blocks(markdown)
 
     def notion_blocks_to_markdown(self, blocks: List[Dict]) -> str:
         """Convert Notion blocks to markdown format"""
-        markdown_lines = []
-
-        for block in blocks:
-            block_type = block.get("type")
-
-            if block_type == "heading_1":
-                text = self._extract_text(block["heading_1"]["rich_text"])
-                markdown_lines.append(f"# {text}")
-
-            elif block_type == "heading_2":
-                text = self._extract_text(block["heading_2"]["rich_text"])
-                markdown_lines.append(f"## {text}")
-
-            elif block_type == "heading_3":
-                text = self._extract_text(block["heading_3"]["rich_text"])
-                markdown_lines.append(f"### {text}")
-
-            elif block_type == "paragraph":
-                text = self._extract_text(block["paragraph"]["rich_text"])
-                markdown_lines.append(text)
-
-            elif block_type == "bulleted_list_item":
-                text = self._extract_text(block["bulleted_list_item"]["rich_text"])
-                markdown_lines.append(f"- {text}")
-
-            elif block_type == "to_do":
-                text = self._extract_text(block["to_do"]["rich_text"])
-                checked = block["to_do"].get("checked", False)
-                checkbox = "[x]" if checked else "[ ]"
-                markdown_lines.append(f"- {checkbox} {text}")
-
-            elif block_type == "code":
-                text = self._extract_text(block["code"]["rich_text"])
-                language = block["code"].get("language", "")
-                markdown_lines.append(f"```{language}")
-                markdown_lines.append(text)
-                markdown_lines.append("```")
-
-            # Add spacing
-            markdown_lines.append("")
-
-        return '\n'.join(markdown_lines)
-
-    def _extract_text(self, rich_text: List[Dict]) -> str:
-        """Extract plain text from Notion rich text format"""
-        return ''.join([t.get("text", {}).get("content", "") for t in rich_text])
+        return blocks_to_markdown(blocks)
 
     def pull_page_to_readme(self, folder_name: str, page_id: str):
         """Pull Notion page content to README file"""
-        # Get page content
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        response = requests.get(url, headers=self.headers)
-
-        if response.status_code != 200:
-            print(f"Error fetching page: {response.status_code}")
-            return
-
-        blocks = response.json().get("results", [])
-
-        # Convert to markdown
-        markdown = self.notion_blocks_to_markdown(blocks)
-
-        # Add sync metadata
-        metadata = f"\n\n<!-- SYNCED_WITH_NOTION -->\n"
-        metadata += f"<!-- Page ID: {page_id} -->\n"
-        metadata += f"<!-- Last Sync: {datetime.now().isoformat()} -->\n"
-        metadata += f"<!-- Hash: {hashlib.md5(markdown.encode()).hexdigest()} -->\n"
-
-        # Write to README
+        # Stream page content to a side file, one API page of blocks at a
+        # time; it only replaces the README once every block was fetched
         readme_path = self.docs_dir / folder_name / "README.md"
-        with open(readme_path, 'w', encoding='utf-8') as f:
-            f.write(markdown)
-            f.write(metadata)
+        pulled_path = readme_path.with_name("README.md.pulled")
+        try:
+            with open(pulled_path, 'w', encoding='utf-8') as f:
+                content_hash = write_markdown(
+                    self.client.iter_block_children(page_id, strict=True), f,
+                    children_of=lambda block_id: self.client.iter_block_children(block_id, strict=True))
+
+                # Add sync metadata
+                metadata = f"\n<!-- SYNCED_WITH_NOTION -->\n"
+                metadata += f"<!-- Page ID: {page_id} -->\n"
+                metadata += f"<!-- Last Sync: {datetime.now().isoformat()} -->\n"
+                metadata += f"<!-- Hash: {content_hash} -->\n"
+                f.write(metadata)
+        except NotionFetchError as e:
+            pulled_path.unlink(missing_ok=True)
+            print(f"[ERROR] Not pulling {folder_name}, README left as it was: {e}")
+            return
 
+        os.replace(pulled_path, readme_path)
         print(f"Pulled {folder_name} from Notion")
 
     def push_readme_to_page(self, folder_name: str, page_id: str):
@@ -261,27 +146,17 @@ class NotionPageSync:
         # Clear existing page content
         self._clear_page(page_id)
 
-        # Add new blocks
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        data = {"children": blocks[:100]}  # Notion has a limit of 100 blocks per request
-
-        response = requests.patch(url, headers=self.headers, json=data)
+        # Add new blocks, packed into as few requests as the limits allow
+        if append_blocks(self.client, page_id, blocks) is None:
+            print(f"Error pushing {folder_name}")
+            return
 
-        if response.status_code == 200:
-            print(f"Pushed {folder_name} to Notion")
-        else:
-            print(f"Error pushing {folder_name}: {response.status_code}")
+        print(f"Pushed {folder_name} to Notion")
 
     def _clear_page(self, page_id: str):
         """Clear all blocks from a Notion page"""
-        # Get existing blocks
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        response = requests.get(url, headers=self.headers)
-
-        if response.status_code != 200:
-            return
-
-        blocks = response.json().get("results", [])
+        # Get existing blocks (all pages of them)
+        blocks = self.client.get_block_children(page_id)
 
         # Delete each block
         for block in blocks:
@@ -337,12 +212,14 @@ Usage:
   python notion_page_sync.py pull     # Pull from Notion to READMEs
   python notion_page_sync.py push     # Push READMEs to Notion
   python notion_page_sync.py status   # Show sync status
+  --yes, -y                           # Don't ask before pushing
 
 This syncs entire README files as page content in Notion.
         """)
         return
 
-    command = sys.argv[1]
+    policy, args = SyncPolicy.from_argv(sys.argv[1:])
+    command = args[0] if args else ""
     sync = NotionPageSync()
 
     if command == "setup":
@@ -353,8 +230,7 @@ This syncs entire README files as page content in Notion.
         print("\nPull complete!")
 
     elif command == "push":
-        confirm = input("This will overwrite Notion pages. Continue? (y/n): ")
-        if confirm.lower() == 'y':
+        if policy.confirm("This will overwrite Notion pages. Continue? (y/n): "):
             sync.sync_all(direction="push")
             print("\nPush complete!")
 
@@ -6,7 +6,6 @@ Uses special markers to define sync boundaries in Notion pages
 
 import os
 import json
-import hashlib
 import time
 from pathlib import Path
 from datetime import datetime
@@ -14,6 +13,12 @@ from typing import Dict, List, Optional, Tuple
 import requests
 from dotenv import load_dotenv
 
+from markdown_to_notion import markdown_to_blocks
+from notion_chunking import append_blocks
+from notion_client import NotionClient, NotionFetchError
+from sync_policy import SyncPolicy
+from notion_to_markdown import blocks_to_markdown, write_markdown
+
 load_dotenv()
 
 class NotionSegmentSync:
@@ -39,6 +44,7 @@ class NotionSegmentSync:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.client = NotionClient(self.api_key)
 
         # Map folders to their parent Notion pages
         self.segment_map = self.load_segment_map()
@@ -174,27 +180,35 @@ class NotionSegmentSync:
         # Extract segment blocks (excluding marker blocks)
         segment_blocks = blocks[start_idx + 1:end_idx]
 
-        # Convert to markdown
-        markdown = self._blocks_to_markdown(segment_blocks)
-
-        # Write to README
+        # Stream markdown to a side file, fetching nested children (list
+        # items, toggles, columns, table rows) as they are reached; it only
+        # replaces the README once everything was fetched
         readme_path = self.docs_dir / folder_name / "README.md"
         readme_path.parent.mkdir(parents=True, exist_ok=True)
+        pulled_path = readme_path.with_name("README.md.pulled")
+
+        try:
+            with open(pulled_path, 'w', encoding='utf-8') as f:
+                content_hash = write_markdown(
+                    segment_blocks, f,
+                    children_of=lambda block_id: self.client.iter_block_children(block_id, strict=True))
+
+                # Add metadata
+                metadata = [
+                    f"<!-- SYNCED FROM NOTION -->",
+                    f"<!-- Page ID: {page_id} -->",
+                    f"<!-- Marker: {marker} -->",
+                    f"<!-- Last Pull: {datetime.now().isoformat()} -->",
+                    f"<!-- Hash: {content_hash} -->\n"
+                ]
+                f.write('\n')
+                f.write('\n'.join(metadata))
+        except NotionFetchError as e:
+            pulled_path.unlink(missing_ok=True)
+            print(f"[ERROR] Not pulling {folder_name}, README left as it was: {e}")
+            return False
 
-        # Add metadata
-        metadata = [
-            f"<!-- SYNCED FROM NOTION -->",
-            f"<!-- Page ID: {page_id} -->",
-            f"<!-- Marker: {marker} -->",
-            f"<!-- Last Pull: {datetime.now().isoformat()} -->",
-            f"<!-- Hash: {hashlib.md5(markdown.encode()).hexdigest()} -->\n"
-        ]
-
-        with open(readme_path, 'w', encoding='utf-8') as f:
-            f.write(markdown)
-            f.write('\n\n')
-            f.write('\n'.join(metadata))
-
+        os.replace(pulled_path, readme_path)
         print(f"Pulled {folder_name} segment from Notion")
         return True
 
@@ -271,149 +285,11 @@ class NotionSegmentSync:
 
     def _blocks_to_markdown(self, blocks: List[Dict]) -> str:
         """Convert Notion blocks to markdown"""
-        lines = []
-
-        for block in blocks:
-            block_type = block.get("type")
-
-            if block_type == "heading_1":
-                text = self._extract_text_from_block(block)
-                lines.append(f"# {text}")
-
-            elif block_type == "heading_2":
-                text = self._extract_text_from_block(block)
-                lines.append(f"## {text}")
-
-            elif block_type == "heading_3":
-                text = self._extract_text_from_block(block)
-                lines.append(f"### {text}")
-
-            elif block_type == "paragraph":
-                text = self._extract_text_from_block(block)
-                if text:
-                    lines.append(text)
-
-            elif block_type == "bulleted_list_item":
-                text = self._extract_text_from_block(block)
-                lines.append(f"- {text}")
-
-            elif block_type == "numbered_list_item":
-                text = self._extract_text_from_block(block)
-                lines.append(f"1. {text}")
-
-            elif block_type == "to_do":
-                text = self._extract_text_from_block(block)
-                checked = block.get("to_do", {}).get("checked", False)
-                checkbox = "[x]" if checked else "[ ]"
-                lines.append(f"- {checkbox} {text}")
-
-            elif block_type == "code":
-                code_text = self._extract_text_from_block(block)
-                language = block.get("code", {}).get("language", "")
-                lines.append(f"```{language}")
-                lines.append(code_text)
-                lines.append("```")
-
-            elif block_type == "divider":
-                lines.append("---")
-
-            # Add spacing
-            if block_type in ["heading_1", "heading_2", "heading_3", "paragraph", "divider"]:
-                lines.append("")
-
-        return '\n'.join(lines).strip()
+        return blocks_to_markdown(blocks)
 
     def _markdown_to_blocks(self, markdown: str) -> List[Dict]:
-        """Convert markdown to Notion blocks (simplified)"""
-        blocks = []
-        lines = markdown.split('\n')
-
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
-            # Skip empty lines
-            if not line.strip():
-                i += 1
-                continue
-
-            # Headers
-            if line.startswith('# '):
-                blocks.append({
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"type": "text", "text": {"content": line[2:].strip()}}]
-                    }
-                })
-            elif line.startswith('## '):
-                blocks.append({
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": line[3:].strip()}}]
-                    }
-                })
-            elif line.startswith('### '):
-                blocks.append({
-                    "type": "heading_3",
-                    "heading_3": {
-                        "rich_text": [{"type": "text", "text": {"content": line[4:].strip()}}]
-                    }
-                })
-            # Lists
-            elif line.startswith('- '):
-                # Check for checkbox
-                if line.startswith('- [ ] ') or line.startswith('- [x] '):
-                    checked = line.startswith('- [x] ')
-                    text = line[6:].strip()
-                    blocks.append({
-                        "type": "to_do",
-                        "to_do": {
-                            "rich_text": [{"type": "text", "text": {"content": text}}],
-                            "checked": checked
-                        }
-                    })
-                else:
-                    blocks.append({
-                        "type": "bulleted_list_item",
-                        "bulleted_list_item": {
-                            "rich_text": [{"type": "text", "text": {"content": line[2:].strip()}}]
-                        }
-                    })
-            # Code blocks
-            elif line.startswith('```'):
-                # Find end of code block
-                language = line[3:].strip() or "plain text"
-                code_lines = []
-                i += 1
-                while i < len(lines) and not lines[i].startswith('```'):
-                    code_lines.append(lines[i])
-                    i += 1
-
-                blocks.append({
-                    "type": "code",
-                    "code": {
-                        "rich_text": [{"type": "text", "text": {"content": '\n'.join(code_lines)}}],
-                        "language": language
-                    }
-                })
-            # Dividers
-            elif line.strip() == '---':
-                blocks.append({
-                    "type": "divider",
-                    "divider": {}
-                })
-            # Regular paragraphs
-            else:
-                blocks.append({
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": line.strip()}}]
-                    }
-                })
-
-            i += 1
-
-        return blocks
+        """Convert markdown to Notion blocks"""
+        return markdown_to_blocks(markdown)
 
     def _append_segment(self, page_id: str, marker: str, blocks: List[Dict]):
         """Append a new sync segment to a page"""
@@ -434,18 +310,9 @@ class NotionSegmentSync:
             }
         ]
 
-        # Append to page
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-
-        # Notion limits to 100 blocks per request
-        for i in range(0, len(segment_blocks), 100):
-            batch = segment_blocks[i:i+100]
-            data = {"children": batch}
-            response = requests.patch(url, headers=self.headers, json=data)
-            time.sleep(0.35)
-
-            if response.status_code != 200:
-                print(f"Error appending blocks: {response.status_code}")
+        # Append to page in as few requests as the limits allow
+        if append_blocks(self.client, page_id, segment_blocks) is None:
+            print("Error appending blocks")
 
     def _replace_segment(self, page_id: str, current_blocks: List[Dict],
                         start_idx: int, end_idx: int, new_blocks: List[Dict]):
@@ -458,20 +325,11 @@ class NotionSegmentSync:
             requests.delete(delete_url, headers=self.headers)
             time.sleep(0.35)
 
-        # Insert new blocks after start marker
+        # Insert new blocks after the start marker, as siblings on the page
         if new_blocks:
-            # We need to add blocks after the start marker block
             after_block_id = current_blocks[start_idx]['id']
-
-            # Add blocks one by one to maintain order
-            for block in reversed(new_blocks):
-                url = f"https://api.notion.com/v1/blocks/{after_block_id}/children"
-                data = {"children": [block]}
-                response = requests.patch(url, headers=self.headers, json=data)
-                time.sleep(0.35)
-
-                if response.status_code != 200:
-                    print(f"Error inserting block: {response.status_code}")
+            if append_blocks(self.client, page_id, new_blocks, after=after_block_id) is None:
+                print("Error inserting blocks")
 
     def setup_pages(self):
         """Interactive setup to configure page mappings"""
@@ -525,6 +383,9 @@ Usage:
   python notion_segment_sync.py pull-one [folder]  # Pull specific folder
   python notion_segment_sync.py push-one [folder]  # Push specific folder
 
+Options:
+  --yes, -y                               # Don't ask before pushing
+
 How it works:
 1. In Notion, add HTML comments to mark sync boundaries
 2. This tool syncs content between those markers with README files
@@ -538,7 +399,8 @@ Example Notion markup:
         """)
         return
 
-    command = sys.argv[1]
+    policy, args = SyncPolicy.from_argv(sys.argv[1:])
+    command = args[0] if args else ""
     sync = NotionSegmentSync()
 
     if command == "setup":
@@ -548,16 +410,15 @@ Example Notion markup:
         sync.sync_all(direction="pull")
 
     elif command == "push":
-        confirm = input("This will update Notion segments. Continue? (y/n): ")
-        if confirm.lower() == 'y':
+        if policy.confirm("This will update Notion segments. Continue? (y/n): "):
             sync.sync_all(direction="push")
 
-    elif command == "pull-one" and len(sys.argv) > 2:
-        folder = sys.argv[2]
+    elif command == "pull-one" and len(args) > 1:
+        folder = args[1]
         sync.pull_segment(folder)
 
-    elif command == "push-one" and len(sys.argv) > 2:
-        folder = sys.argv[2]
+    elif command == "push-one" and len(args) > 1:
+        folder = args[1]
         sync.push_segment(folder)
 
     else:
@@ -6,13 +6,16 @@ Uses Notion's native synced_block feature instead of HTML markers
 
 import os
 import json
-import time
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 import requests
 from dotenv import load_dotenv
 
+from markdown_to_notion import markdown_to_blocks
+from notion_chunking import append_blocks
+from notion_client import NotionClient
+
 load_dotenv()
 
 class NotionSyncedBlockManager:
@@ -32,6 +35,7 @@ class NotionSyncedBlockManager:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.client = NotionClient(self.api_key)
 
         # Load or create synced block mappings
         self.block_map = self.load_block_mappings()
@@ -60,8 +64,6 @@ class NotionSyncedBlockManager:
 
     def create_synced_block(self, page_id: str, content_blocks: List[Dict]) -> str:
         """Create a new synced block with content"""
-
-        # Create the synced block container
         synced_block = {
             "object": "block",
             "type": "synced_block",
@@ -71,41 +73,24 @@ class NotionSyncedBlockManager:
             }
         }
 
-        # Add to page
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        data = {"children": [synced_block]}
-
-        response = requests.patch(url, headers=self.headers, json=data)
-
-        if response.status_code == 200:
-            result = response.json()
-            # Get the synced block ID
-            synced_block_id = result["results"][0]["id"]
-            return synced_block_id
-
-        return None
+        # The planner sends what fits inline and appends the rest to the new block
+        created = append_blocks(self.client, page_id, [synced_block])
+        return created[0] if created else None
 
     def update_synced_block(self, block_id: str, new_content: List[Dict]):
         """Update content within a synced block"""
 
-        # First, get existing children and delete them
-        children_url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-        response = requests.get(children_url, headers=self.headers)
-
-        if response.status_code == 200:
-            children = response.json().get("results", [])
+        # First, get existing children (all pages of them) and delete them;
+        # the client's throttle and retries pace the deletes
+        for child in self.client.get_block_children(block_id):
+            self.client.delete(f"blocks/{child['id']}")
 
-            # Delete existing children
-            for child in children:
-                delete_url = f"https://api.notion.com/v1/blocks/{child['id']}"
-                requests.delete(delete_url, headers=self.headers)
-                time.sleep(0.1)
+        # Add new content in as few requests as the limits allow
+        return append_blocks(self.client, block_id, new_content) is not None
 
-        # Add new content
-        data = {"children": new_content}
-        response = requests.patch(children_url, headers=self.headers, json=data)
-
-        return response.status_code == 200
+    def update_synced_block_from_markdown(self, block_id: str, markdown: str) -> bool:
+        """Replace a synced block's content with compiled markdown"""
+        return self.update_synced_block(block_id, markdown_to_blocks(markdown))
 
     def get_synced_block_content(self, block_id: str) -> List[Dict]:
         """Retrieve content from a synced block"""
@@ -7,12 +7,11 @@ Handles reading, deduplication, and updating tasks without interfering with othe
 import os
 import sys
 import json
-import time
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Set, Tuple
-import requests
-from dotenv import load_dotenv
+
+from notion_client import NotionClient, load_env
 
 # Setup paths
 BASE_DIR = Path(__file__).parent.parent
@@ -20,18 +19,21 @@ CACHE_DIR = BASE_DIR / "cache"
 TASK_CACHE_DIR = CACHE_DIR / "tasks"
 TASK_CONFIG_FILE = CACHE_DIR / "task_config.json"
 
-# Create directories
-CACHE_DIR.mkdir(exist_ok=True)
-TASK_CACHE_DIR.mkdir(exist_ok=True)
 
-# Load environment
-load_dotenv(BASE_DIR / ".env")
+
+def init_dirs():
+    """Create the cache directories the task manager writes to"""
+    for directory in (CACHE_DIR, TASK_CACHE_DIR):
+        directory.mkdir(exist_ok=True)
 
 
 class NotionTaskManager:
     """Dedicated manager for Notion tasks with read/write capabilities"""
 
-    def __init__(self):
+    def __init__(self, client: Optional[NotionClient] = None):
+        load_env()
+        init_dirs()
+
         # Get API key
         self.api_key = os.getenv("NOTION_API")
         if not self.api_key:
@@ -45,6 +47,8 @@ class NotionTaskManager:
             "Notion-Version": "2022-06-28"
         }
 
+        self.client = client or NotionClient(self.api_key)
+
         # Load task configuration
         self.config = self._load_config()
 
@@ -65,32 +69,10 @@ class NotionTaskManager:
 
     def _api_request(self, method: str, url: str, data: Optional[Dict] = None) -> Optional[Dict]:
         """Make API request with error handling"""
-        try:
-            if method == "GET":
-                response = requests.get(url, headers=self.headers)
-            elif method == "POST":
-                response = requests.post(url, headers=self.headers, json=data or {})
-            elif method == "PATCH":
-                response = requests.patch(url, headers=self.headers, json=data or {})
-            elif method == "DELETE":
-                response = requests.delete(url, headers=self.headers)
-            else:
-                return None
-
-            time.sleep(0.35)  # Rate limiting
-
-            if response.status_code == 429:  # Rate limited
-                retry_after = int(response.headers.get('Retry-After', 60))
-                print(f"Rate limited. Waiting {retry_after} seconds...")
-                time.sleep(retry_after)
-                return self._api_request(method, url, data)
-
-            response.raise_for_status()
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            print(f"API error: {e}")
+        if method not in ("GET", "POST", "PATCH", "DELETE"):
             return None
+        # Rate limiting, 429 and retries are handled by the shared client
+        return self.client.request(method, url, data=data)
 
     def discover_task_databases(self) -> Dict[str, str]:
         """Discover all task databases in the workspace"""
@@ -143,8 +125,8 @@ class NotionTaskManager:
                 return obj["title"][0].get("text", {}).get("content", "Untitled")
         return "Untitled"
 
-    def read_all_tasks(self, db_id: Optional[str] = None) -> List[Dict]:
-        """Read all tasks from specified database or all task databases"""
+    def read_all_tasks(self, db_id: Optional[str] = None, filter: Optional[Dict] = None) -> List[Dict]:
+        """Read all tasks (or those matching filter) from one or all task databases"""
         all_tasks = []
 
         if db_id:
@@ -160,6 +142,8 @@ class NotionTaskManager:
 
             query_url = f"https://api.notion.com/v1/databases/{database_id}/query"
             data = {"page_size": 100}
+            if filter:
+                data["filter"] = filter
 
             has_more = True
             next_cursor = None
@@ -184,6 +168,15 @@ class NotionTaskManager:
         print(f"Total tasks read: {len(all_tasks)}")
         return all_tasks
 
+    def save_tasks(self, tasks: List[Dict]) -> Path:
+        """Write tasks to a timestamped file in cache/tasks"""
+        cache_file = TASK_CACHE_DIR / f"all_tasks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(cache_file, 'w') as f:
+            json.dump(tasks, f, indent=2, default=str)
+
+        print(f"Tasks saved to: {cache_file}")
+        return cache_file
+
     def _process_task_page(self, page: Dict) -> Dict:
         """Process a task page into simplified format"""
         task = {
@@ -549,7 +542,7 @@ def main():
 
 Usage:
   python notion_task_manager.py discover      # Discover task databases
-  python notion_task_manager.py read          # Read all tasks
+  python notion_task_manager.py read          # Read all tasks (--local: bypass daemon)
   python notion_task_manager.py duplicates    # Find duplicate tasks
   python notion_task_manager.py dedupe        # Remove duplicates (dry run)
   python notion_task_manager.py dedupe --run  # Remove duplicates (actual)
@@ -564,6 +557,14 @@ Example workflow:
 
     command = sys.argv[1]
 
+    # A running daemon keeps tasks warm and only fetches what changed
+    if command == "read" and "--local" not in sys.argv:
+        from daemon_ipc import forward
+        output = forward("task-read")
+        if output is not None:
+            print(output, end="")
+            return
+
     # Initialize manager
     tm = NotionTaskManager()
 
@@ -572,14 +573,7 @@ Example workflow:
         tm.discover_task_databases()
 
     elif command == "read":
-        tasks = tm.read_all_tasks()
-
-        # Save to cache
-        cache_file = TASK_CACHE_DIR / f"all_tasks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(cache_file, 'w') as f:
-            json.dump(tasks, f, indent=2, default=str)
-
-        print(f"Tasks saved to: {cache_file}")
+        tm.save_tasks(tm.read_all_tasks())
 
     elif command == "duplicates":
         tasks = tm.read_all_tasks()
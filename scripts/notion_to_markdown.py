@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Notion Block to Markdown Renderer
+Streaming, generator-based rendering shared by pull, segment and page sync
+"""
+
+import hashlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+LIST_TYPES = {"bulleted_list_item", "numbered_list_item", "to_do"}
+BULLET_TYPES = {"bulleted_list_item", "to_do"}
+MEDIA_TYPES = {"image", "video", "file", "pdf", "audio"}
+LINK_TYPES = {"bookmark", "embed", "link_preview"}
+SILENT_TYPES = {"table_of_contents", "breadcrumb", "unsupported", "template"}
+
+ChildrenOf = Callable[[str], Iterable[Dict]]
+
+
+MARKERS = (("strikethrough", "~~"), ("italic", "*"), ("bold", "**"))
+
+
+def rich_text_to_markdown(rich_text: List[Dict]) -> str:
+    """
+    Convert a Notion rich text array to inline markdown.
+
+    Markers stay open across runs that share an annotation, so "*a **b** c*"
+    comes back as written rather than as "*a* ***b*** *c*".
+    """
+    parts = []
+    opened = []
+    pending = ""
+
+    for item in rich_text or []:
+        if item.get("type", "text") == "text":
+            text = item.get("text", {}).get("content", "")
+            link = (item.get("text", {}).get("link") or {}).get("url")
+        else:
+            # Mentions and inline equations only carry plain_text
+            text = item.get("plain_text", "")
+            link = item.get("href")
+
+        if not text:
+            continue
+
+        annotations = item.get("annotations")
+        if not annotations and not link and not opened:
+            parts.append(pending + text if pending else text)
+            pending = ""
+            continue
+        annotations = annotations or {}
+        code = annotations.get("code")
+        if not code and not link and not text.strip():
+            # Whitespace doesn't change the open markers
+            pending += text
+            continue
+
+        wanted = [marker for key, marker in MARKERS if annotations.get(key)] if annotations else []
+        # Close from the top until every open marker is still wanted
+        while opened and any(marker not in wanted for marker in opened):
+            parts.append(opened.pop())
+        if pending:
+            parts.append(pending)
+
+        if code:
+            lead, core, trail = "", f"`{text}`", ""
+        else:
+            # Keep surrounding whitespace outside the markers ("**x** " not "**x **")
+            core = text.strip()
+            if core == text:
+                lead = trail = ""
+            else:
+                lead = text[:len(text) - len(text.lstrip())]
+                trail = text[len(text.rstrip()):]
+                parts.append(lead)
+
+        fresh = [marker for marker in wanted if marker not in opened] if wanted else wanted
+        if link:
+            # Markers new to the link stay inside its brackets: "[**x**](url)"
+            for marker in reversed(fresh):
+                core = f"{marker}{core}{marker}"
+            core = f"[{core}]({link})"
+            parts.append(core)
+        else:
+            if fresh:
+                parts.extend(fresh)
+                opened.extend(fresh)
+            parts.append(core)
+        pending = trail
+
+    parts.extend(reversed(opened))
+    parts.append(pending)
+    return "".join(parts)
+
+
+def _plain_text(rich_text: List[Dict]) -> str:
+    return "".join(t.get("plain_text") or t.get("text", {}).get("content", "") for t in rich_text or [])
+
+
+def _prefixed(text: str, first: str, rest: str) -> Iterator[str]:
+    """Yield text line by line, with a marker on the first line"""
+    for idx, line in enumerate(text.split("\n")):
+        yield f"{first if idx == 0 else rest}{line}".rstrip() + "\n"
+
+
+def _media_url(body: Dict) -> str:
+    return body.get(body.get("type", ""), {}).get("url", "") or body.get("url", "")
+
+
+class MarkdownRenderer:
+    """
+    Renders Notion blocks to markdown chunks.
+
+    Blocks are consumed from any iterable and only the current nesting path
+    is held in memory. Children come from each block's "children" list (as
+    materialized by BlockTreeFetcher) or, if children_of is given, are
+    streamed on demand for blocks that weren't materialized.
+    """
+
+    def __init__(self, children_of: Optional[ChildrenOf] = None):
+        self.children_of = children_of
+
+    def _children(self, block: Dict) -> Iterable[Dict]:
+        if "children" in block:
+            return block["children"]
+        # Blocks built for the API (markdown_to_notion) nest children in the body
+        body = block.get(block.get("type"), {}) or {}
+        if "children" in body:
+            return body["children"]
+        if block.get("has_children") and self.children_of:
+            return self.children_of(block["id"])
+        return []
+
+    def render(self, blocks: Iterable[Dict], prefix: str = "") -> Iterator[str]:
+        """Yield markdown for a sequence of sibling blocks"""
+        prev_type = None
+        number = 0
+
+        for block in blocks:
+            block_type = block.get("type")
+
+            # Numbered lists count per nesting level until another block type
+            if block_type == "numbered_list_item":
+                number = number + 1 if prev_type == "numbered_list_item" else 1
+
+            chunks = self.render_block(block, prefix, number)
+            first = next(chunks, None)
+            if first is None:
+                continue
+
+            # Blank line between blocks; items of the same list stay tight
+            same_list = block_type == prev_type or {block_type, prev_type} <= BULLET_TYPES
+            if prev_type is not None and not (block_type in LIST_TYPES and same_list):
+                yield prefix.rstrip() + "\n"
+
+            yield first
+            yield from chunks
+            prev_type = block_type
+
+    def render_block(self, block: Dict, prefix: str, number: int = 1) -> Iterator[str]:
+        """Yield markdown for one block and its children"""
+        block_type = block.get("type")
+        body = block.get(block_type, {}) or {}
+        text = rich_text_to_markdown(body.get("rich_text", []))
+
+        if block_type == "paragraph":
+            if text:
+                yield from _prefixed(text, prefix, prefix)
+            yield from self.render(self._children(block), prefix)
+
+        elif block_type in ("heading_1", "heading_2", "heading_3"):
+            hashes = "#" * int(block_type[-1])
+            yield f"{prefix}{hashes} {text.replace(chr(10), ' ')}".rstrip() + "\n"
+            children = self.render(self._children(block), prefix)
+            first = next(children, None)
+            if first is not None:
+                yield prefix.rstrip() + "\n"
+                yield first
+                yield from children
+
+        elif block_type in LIST_TYPES:
+            if block_type == "numbered_list_item":
+                marker = f"{number}. "
+            elif block_type == "to_do":
+                marker = "- [x] " if body.get("checked") else "- [ ] "
+            else:
+                marker = "- "
+            indent = prefix + " " * (3 if block_type == "numbered_list_item" else 2)
+            yield from _prefixed(text, prefix + marker, indent)
+            yield from self.render(self._children(block), indent)
+
+        elif block_type in ("quote", "callout"):
+            if block_type == "callout" and (body.get("icon") or {}).get("type") == "emoji":
+                text = f"{body['icon']['emoji']} {text}"
+            yield from _prefixed(text, prefix + "> ", prefix + "> ")
+            children = self.render(self._children(block), prefix + "> ")
+            first = next(children, None)
+            if first is not None:
+                yield prefix + ">\n"
+                yield first
+                yield from children
+
+        elif block_type == "toggle":
+            yield f"{prefix}<details>\n"
+            yield f"{prefix}<summary>{text}</summary>\n"
+            yield prefix.rstrip() + "\n"
+            yield from self.render(self._children(block), prefix)
+            yield prefix.rstrip() + "\n"
+            yield f"{prefix}</details>\n"
+
+        elif block_type == "code":
+            code = _plain_text(body.get("rich_text", []))
+            language = body.get("language", "")
+            if language == "plain text":
+                language = ""
+            fence = "````" if "```" in code else "```"
+            yield f"{prefix}{fence}{language}\n"
+            yield from _prefixed(code, prefix, prefix)
+            yield f"{prefix}{fence}\n"
+
+        elif block_type == "divider":
+            yield f"{prefix}---\n"
+
+        elif block_type == "table":
+            yield from self._render_table(block, body, prefix)
+
+        elif block_type in ("column_list", "column", "synced_block"):
+            # Layout containers: render their content in reading order
+            yield from self.render(self._flatten_columns(block), prefix)
+
+        elif block_type in MEDIA_TYPES:
+            caption = _plain_text(body.get("caption", []))
+            url = _media_url(body)
+            if block_type == "image":
+                yield f"{prefix}![{caption}]({url})\n"
+            else:
+                yield f"{prefix}[{caption or block_type.title()}]({url})\n"
+
+        elif block_type in LINK_TYPES:
+            caption = _plain_text(body.get("caption", []))
+            url = body.get("url", "")
+            yield f"{prefix}[{caption or url}]({url})\n"
+
+        elif block_type == "equation":
+            yield f"{prefix}$$\n"
+            yield from _prefixed(body.get("expression", ""), prefix, prefix)
+            yield f"{prefix}$$\n"
+
+        elif block_type in ("child_page", "child_database"):
+            title = body.get("title", "Untitled")
+            page_id = block.get("id", "").replace("-", "")
+            yield f"{prefix}[{title}](https://www.notion.so/{page_id})\n"
+
+        elif block_type in SILENT_TYPES:
+            return
+
+        elif text:
+            # Unknown block type that still carries text
+            yield from _prefixed(text, prefix, prefix)
+            yield from self.render(self._children(block), prefix)
+
+        else:
+            yield f"{prefix}<!-- notion:{block_type} -->\n"
+
+    def _flatten_columns(self, block: Dict) -> Iterator[Dict]:
+        for child in self._children(block):
+            if child.get("type") == "column":
+                yield from self._children(child)
+            else:
+                yield child
+
+    def _render_table(self, block: Dict, body: Dict, prefix: str) -> Iterator[str]:
+        width = body.get("table_width", 0)
+        header_written = False
+
+        for row in self._children(block):
+            cells = row.get("table_row", {}).get("cells", [])
+            cells = [rich_text_to_markdown(c).replace("|", "\\|").replace("\n", "<br>") for c in cells]
+            cells += [""] * (width - len(cells))
+            yield f"{prefix}| " + " | ".join(cells) + " |\n"
+
+            # Markdown tables always need a header separator after row one
+            if not header_written:
+                yield f"{prefix}|" + "|".join([" --- "] * max(width, len(cells))) + "|\n"
+                header_written = True
+
+
+def render_blocks(blocks: Iterable[Dict], children_of: Optional[ChildrenOf] = None) -> Iterator[str]:
+    """Yield markdown chunks for a sequence of blocks"""
+    return MarkdownRenderer(children_of).render(blocks)
+
+
+def blocks_to_markdown(blocks: Iterable[Dict], children_of: Optional[ChildrenOf] = None) -> str:
+    """Render blocks to a single markdown string"""
+    markdown = "".join(render_blocks(blocks, children_of)).rstrip("\n")
+    return markdown + "\n" if markdown else ""
+
+
+def write_markdown(blocks: Iterable[Dict], output: TextIO,
+                   children_of: Optional[ChildrenOf] = None) -> str:
+    """Stream rendered markdown to an open file; returns the MD5 of what was written"""
+    digest = hashlib.md5()
+    for chunk in render_blocks(blocks, children_of):
+        digest.update(chunk.encode("utf-8"))
+        output.write(chunk)
+    return digest.hexdigest()
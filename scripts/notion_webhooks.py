@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Notion Webhooks - Targeted refreshes from Notion change events
+Maps page/database events to the databases, synced blocks and project
+folders they touch, and runs only those refreshes in the background
+instead of a full sync
+"""
+
+import os
+import sys
+import json
+import hmac
+import time
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import Counter
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / "cache"
+EVENTS_LOG = CACHE_DIR / "webhook_events.jsonl"
+DEFAULT_URL = "http://localhost:5000/webhooks/notion"
+
+# A target is a hashable tuple, so repeated events for the same thing coalesce:
+#   ("database", category)        re-read a whole database
+#   ("row", category, page_id)    re-read one database row
+#   ("removed", category, page_id) drop a deleted row
+#   ("readme", folder)            pull one project's README from its synced block
+#   ("indexes",)                  rebuild cache/indexes and tasks.md files
+Target = Tuple[str, ...]
+
+WEBHOOK_EVENTS = Counter("notion_webhook_events_total", "Notion webhook events received, by type and outcome")
+WEBHOOK_REFRESHES = Counter("notion_webhook_refreshes_total", "Targeted refreshes run for webhook events, by kind")
+
+
+def sign(payload: bytes, secret: str) -> str:
+    """Signature header value for a payload, in Notion's sha256=<hex> form"""
+    return "sha256=" + hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+
+def _norm(notion_id: Optional[str]) -> str:
+    return (notion_id or "").replace("-", "").lower()
+
+
+def _load_json(path: Path) -> Dict:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def describe(target: Target) -> str:
+    return ":".join(target)
+
+
+class EventRouter:
+    """
+    Works out which refreshes a Notion webhook event needs.
+
+    Databases come from cache/notion_config.json and project pages and
+    synced blocks from cache/synced_blocks.json; both are re-read when
+    their mtime changes (after discovery or setup_synced_blocks.py).
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._mtimes: Dict[Path, Optional[int]] = {}
+        self.databases: Dict[str, str] = {}  # database id -> category
+        self.folders: Dict[str, str] = {}    # project page or synced block id -> folder
+
+    def _changed(self, path: Path) -> bool:
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        changed = self._mtimes.get(path, -1) != mtime
+        self._mtimes[path] = mtime
+        return changed
+
+    def _refresh(self):
+        config_file = self.cache_dir / "notion_config.json"
+        if self._changed(config_file):
+            databases = _load_json(config_file).get("databases", {})
+            self.databases = {_norm(info["id"]): category for category, info in databases.items()}
+
+        blocks_file = self.cache_dir / "synced_blocks.json"
+        if self._changed(blocks_file):
+            self.folders = {}
+            for folder, mapping in _load_json(blocks_file).items():
+                for key in ("page_id", "synced_block_id"):
+                    if mapping.get(key):
+                        self.folders[_norm(mapping[key])] = folder
+
+    def plan(self, event: Dict) -> List[Target]:
+        """Targets an event affects, in no particular order; empty if it touches nothing we track"""
+        self._refresh()
+        event_type = event.get("type", "")
+        entity = event.get("entity", {})
+        entity_id = _norm(entity.get("id"))
+        data = event.get("data", {})
+        parent = data.get("parent", {})
+
+        targets = []
+        if entity.get("type") in ("database", "data_source"):
+            category = self.databases.get(entity_id) or self.databases.get(_norm(parent.get("id")))
+            if category:
+                targets.append(("database", category))
+        elif entity.get("type") == "page":
+            # Rows: parent is the database (or a data source of it)
+            for parent_id in (parent.get("id"), parent.get("database_id")):
+                category = self.databases.get(_norm(parent_id))
+                if category:
+                    kind = "removed" if event_type == "page.deleted" else "row"
+                    targets.append((kind, category, entity["id"]))
+                    break
+
+            # Project pages, or content edits inside one of their synced blocks
+            touched = [entity_id] + [_norm(block.get("id")) for block in data.get("updated_blocks", [])]
+            for notion_id in touched:
+                folder = self.folders.get(notion_id)
+                if folder:
+                    targets.append(("readme", folder))
+                    break
+
+        if any(t[0] in ("row", "removed", "database") and t[1] == "tasks" for t in targets):
+            targets.append(("indexes",))
+        return targets
+
+
+class WebhookRefresher:
+    """
+    Runs planned targets on a background thread.
+
+    Targets wait `delay` seconds before running so a burst of events (Notion
+    sends one per edited property) becomes one batch; a target already
+    pending is not queued twice. The Notion manager and README puller are
+    created on first use and share one client.
+    """
+
+    def __init__(self, delay: float = 2.0, manager=None, puller=None):
+        self.delay = delay
+        self.manager = manager
+        self.puller = puller
+        self.pending: "OrderedDict[Target, float]" = OrderedDict()
+        self.last_batch: Optional[Dict] = None
+        self._changed = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, targets: Iterable[Target]) -> List[Target]:
+        """Queue targets; returns the ones that weren't already pending"""
+        added = []
+        with self._changed:
+            for target in targets:
+                if target not in self.pending:
+                    self.pending[target] = time.monotonic()
+                    added.append(target)
+            if added:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="notion-webhooks", daemon=True)
+                    self._thread.start()
+                self._changed.notify_all()
+        return added
+
+    def depth(self) -> int:
+        with self._changed:
+            return len(self.pending)
+
+    def _loop(self):
+        while True:
+            with self._changed:
+                while not self.pending:
+                    self._changed.wait()
+                # Let the burst settle: wait until the newest target is `delay` old
+                while self.pending:
+                    quiet = time.monotonic() - max(self.pending.values())
+                    if quiet >= self.delay:
+                        break
+                    self._changed.wait(self.delay - quiet)
+                batch = list(self.pending)
+                self.pending.clear()
+
+            try:
+                self.run(batch)
+            except (Exception, SystemExit) as e:
+                # SystemExit: NotionManager exits when NOTION_API is missing
+                print(f"[ERROR] Webhook refresh failed: {e}")
+
+    def _ensure_clients(self):
+        if self.manager is None:
+            from notion import NotionManager
+            self.manager = NotionManager()
+        if self.puller is None:
+            from pull_from_notion import NotionToReadmeSync
+            from sync_policy import SyncPolicy
+            policy = SyncPolicy()
+            # No one to prompt in the background; merge unless configured otherwise
+            if policy.interactive:
+                policy = SyncPolicy("merge")
+            self.puller = NotionToReadmeSync(client=self.manager.client, policy=policy)
+
+    def run(self, targets: List[Target]) -> Dict[str, int]:
+        """Run one batch of targets now; returns counts by kind"""
+        self._ensure_clients()
+        started = time.perf_counter()
+        counts: Dict[str, int] = {}
+
+        def done(kind, n=1):
+            counts[kind] = counts.get(kind, 0) + n
+            WEBHOOK_REFRESHES.inc(n, kind=kind)
+
+        # Whole-database re-reads make row re-reads for that database redundant
+        full = {t[1] for t in targets if t[0] == "database"}
+        rows: Dict[str, Dict[str, List[str]]] = {}
+        for target in targets:
+            if target[0] in ("row", "removed") and target[1] not in full:
+                rows.setdefault(target[1], {"row": [], "removed": []})[target[0]].append(target[2])
+
+        tasks_changed = False
+        for category in full:
+            if category in self.manager.config.get("databases", {}):
+                self.manager.sync_database(category)
+                tasks_changed |= category == "tasks"
+                done("database")
+
+        for category, ids in rows.items():
+            changed = self.manager.refresh_pages(category, ids["row"], removed=ids["removed"])
+            print(f"[OK] {category}: {changed} of {len(ids['row']) + len(ids['removed'])} rows changed")
+            tasks_changed |= category == "tasks" and changed > 0
+            done("row", len(ids["row"]) + len(ids["removed"]))
+
+        folders = [t[1] for t in targets if t[0] == "readme"]
+        for folder in folders:
+            if folder in self.puller.mappings and self.puller.pull_project(folder):
+                done("readme")
+        if folders:
+            self.puller.policy.save_report()
+
+        if ("indexes",) in targets:
+            if tasks_changed:
+                self.manager._create_indexes()
+                from generate_tasks_md import TaskGenerator
+                generator = TaskGenerator(tasks=self.manager._latest_content("tasks") or None)
+                if generator.tasks:
+                    generator.generate_all_tasks_files()
+                done("indexes")
+            else:
+                print("[SKIP] Indexes: no task rows changed")
+
+        self.last_batch = {
+            "finished": datetime.now().isoformat(),
+            "targets": [describe(t) for t in targets],
+            "counts": counts,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        return counts
+
+
+def log_event(event: Dict, path: Path = EVENTS_LOG):
+    """Append a received event so it can be replayed later"""
+    path.parent.mkdir(exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def read_events(path: Path) -> List[Dict]:
+    """Events from a .jsonl file (one per line) or a .json file (one event or a list)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.suffix == ".jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    events = json.loads(text)
+    return events if isinstance(events, list) else [events]
+
+
+_router = None
+_refresher = None
+
+
+def get_router() -> EventRouter:
+    """Process-wide router instance"""
+    global _router
+    if _router is None:
+        _router = EventRouter()
+    return _router
+
+
+def get_refresher() -> WebhookRefresher:
+    """Process-wide refresher instance"""
+    global _refresher
+    if _refresher is None:
+        _refresher = WebhookRefresher(delay=float(os.getenv("WEBHOOK_REFRESH_DELAY", "2")))
+    return _refresher
+
+
+def post_event(event: Dict, url: str, secret: str = "") -> Tuple[int, str]:
+    """POST one event to a running web service, signed like Notion signs it"""
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError, URLError
+
+    payload = json.dumps(event).encode()
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Notion-Signature"] = sign(payload, secret)
+    try:
+        with urlopen(Request(url, data=payload, headers=headers, method="POST"), timeout=30) as response:
+            return response.status, response.read().decode()
+    except HTTPError as e:
+        return e.code, e.read().decode()
+    except URLError as e:
+        return 0, f"Could not reach {url}: {e.reason}"
+
+
+def main():
+    """CLI interface"""
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) < 2 or args[0] not in ("plan", "replay"):
+        print(f"""
+Usage:
+  python notion_webhooks.py plan <events>              # Show the refreshes each event maps to (no API calls)
+  python notion_webhooks.py replay <events>            # POST events to the web service, signed
+  python notion_webhooks.py replay <events> --local    # Run the refreshes in this process
+
+<events> is a .json file (one event or a list) or a .jsonl file, such as
+the log of received events in {EVENTS_LOG.relative_to(BASE_DIR)}.
+
+Options:
+  --url=URL   Web service endpoint (default {DEFAULT_URL})
+
+Replayed events are signed with NOTION_WEBHOOK_SECRET when it is set.
+        """)
+        return
+
+    from notion_client import load_env
+    load_env()
+
+    events = read_events(Path(args[1]))
+    router = get_router()
+    url = next((a.split("=", 1)[1] for a in sys.argv if a.startswith("--url=")), DEFAULT_URL)
+    secret = os.getenv("NOTION_WEBHOOK_SECRET", "")
+
+    planned: List[Target] = []
+    for event in events:
+        targets = router.plan(event)
+        print(f"{event.get('type', '?'):<28} {event.get('entity', {}).get('id', '?')}  "
+              f"-> {', '.join(describe(t) for t in targets) or 'ignored'}")
+        planned.extend(t for t in targets if t not in planned)
+
+        if args[0] == "replay" and "--local" not in sys.argv:
+            status, body = post_event(event, url, secret)
+            print(f"  [{'OK' if 0 < status < 300 else 'ERROR'}] {status} {body.strip()}")
+            if not status:
+                return
+
+    if args[0] == "replay" and "--local" in sys.argv and planned:
+        counts = WebhookRefresher(delay=0).run(planned)
+        print(f"[OK] Ran {len(planned)} targets: {counts}")
+
+
+if __name__ == "__main__":
+    main()
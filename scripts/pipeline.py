@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Sync Pipeline - Run start/end-of-work steps in one process
+Steps form a small dependency graph; independent steps run concurrently and
+share one Notion client and an in-memory cache instead of subprocesses
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+from notion_client import NotionClient
+from sync_policy import SyncPolicy
+
+BASE_DIR = Path(__file__).parent.parent
+
+
+class PipelineContext:
+    """State shared by every step in a run"""
+
+    def __init__(self, client: Optional[NotionClient] = None, policy: Optional[SyncPolicy] = None):
+        self.client = client or NotionClient()
+        self.policy = policy or SyncPolicy()
+        self.cache: Dict = {}
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """
+    A dependency graph of named steps.
+
+    Each step is a function taking the PipelineContext. It fails by returning
+    False or raising; dependents still run (matching the old "continuing
+    anyway" behaviour) but the run is reported as completed with warnings.
+    """
+
+    def __init__(self, name: str, context: Optional[PipelineContext] = None, max_workers: int = 3):
+        self.name = name
+        self.context = context or PipelineContext()
+        self.max_workers = max_workers
+        self.steps: Dict[str, Dict] = {}
+        self.timings: Dict[str, Dict] = {}
+
+    def step(self, name: str, func: Callable[[PipelineContext], Optional[bool]],
+             after: List[str] = (), description: str = ""):
+        """Register a step that runs once every step in after has finished"""
+        for dependency in after:
+            if dependency not in self.steps:
+                raise ValueError(f"Unknown dependency '{dependency}' for step '{name}'")
+        self.steps[name] = {"func": func, "after": list(after), "description": description or name}
+        return self
+
+    def _run_step(self, name: str) -> bool:
+        step = self.steps[name]
+        print(f"\n[START] {step['description']}")
+        start = time.perf_counter()
+        try:
+            ok = step["func"](self.context) is not False
+        except (Exception, SystemExit) as e:
+            print(f"[ERROR] {name}: {e}")
+            ok = False
+        elapsed = time.perf_counter() - start
+        self.timings[name] = {"seconds": elapsed, "ok": ok}
+        print(f"[{'OK' if ok else 'WARN'}] {step['description']} ({elapsed:.1f}s)")
+        return ok
+
+    def run(self) -> bool:
+        """Run all steps; returns True if every step succeeded"""
+        remaining = dict(self.steps)
+        done = set()
+        running = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while remaining or running:
+                ready = [name for name, step in remaining.items() if set(step["after"]) <= done]
+                for name in ready:
+                    del remaining[name]
+                    running[pool.submit(self._run_step, name)] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done.add(running.pop(future))
+
+        self.total_seconds = time.perf_counter() - started
+        return all(t["ok"] for t in self.timings.values())
+
+    def report(self):
+        """Print per-step timings"""
+        print(f"\n{'Step':<28}{'Time':>9}  Status")
+        print("-" * 46)
+        for name, timing in self.timings.items():
+            print(f"{name:<28}{timing['seconds']:>8.1f}s  {'ok' if timing['ok'] else 'FAILED'}")
+        print("-" * 46)
+        print(f"{'total (wall clock)':<28}{self.total_seconds:>8.1f}s")
+
+
+# --- Steps ---------------------------------------------------------------
+
+def sync_databases(ctx: PipelineContext) -> bool:
+    """Pull Tasks, Notes and Projects databases"""
+    from notion import NotionManager
+    content = NotionManager(client=ctx.client).sync()
+    with ctx.lock:
+        ctx.cache["content"] = content
+    # A failed query reads as an empty database, so no rows at all means no sync
+    return any(content.values())
+
+
+def generate_tasks(ctx: PipelineContext) -> bool:
+    """Write tasks.md for each project from the freshly synced tasks"""
+    from generate_tasks_md import TaskGenerator
+    tasks = (ctx.cache.get("content") or {}).get("tasks")
+    generator = TaskGenerator(tasks=tasks)
+    with ctx.lock:
+        ctx.cache["task_generator"] = generator
+    if not generator.tasks:
+        return False
+    generator.generate_all_tasks_files()
+    return True
+
+
+def pull_readmes(ctx: PipelineContext) -> bool:
+    """Pull README content for every project"""
+    from pull_from_notion import NotionToReadmeSync
+    NotionToReadmeSync(client=ctx.client, policy=ctx.policy).pull_all()
+    return True
+
+
+def push_readmes(projects: Optional[List[str]] = None) -> Callable[[PipelineContext], bool]:
+    """Build a step pushing the given projects' READMEs (all when None)"""
+    def step(ctx: PipelineContext) -> bool:
+        from sync_readme_to_notion import ReadmeToNotionSync
+        sync = ReadmeToNotionSync(client=ctx.client)
+        targets = projects if projects is not None else list(sync.mappings)
+        results = [sync.sync_project(folder) for folder in targets]
+        return all(results)
+    return step
+
+
+def start_work_pipeline(pull: bool = True, context: Optional[PipelineContext] = None) -> Pipeline:
+    """
+    Database sync -> tasks.md, with the README pull running alongside.
+
+    When conflicts are resolved by prompting, the pull waits for the other
+    steps instead, so its questions aren't interleaved with their output.
+    """
+    pipeline = Pipeline("start_work", context)
+    pipeline.step("sync_databases", sync_databases, description="Pulling Tasks, Notes and Projects from Notion")
+    pipeline.step("generate_tasks", generate_tasks, after=["sync_databases"],
+                  description="Generating tasks.md files for each project")
+    if pull:
+        after = ["sync_databases", "generate_tasks"] if pipeline.context.policy.interactive else []
+        pipeline.step("pull_readmes", pull_readmes, after=after,
+                      description="Pulling README content from Notion pages")
+    return pipeline
+
+
+def end_work_pipeline(projects: Optional[List[str]] = None,
+                      context: Optional[PipelineContext] = None) -> Pipeline:
+    """Push each modified README as its own concurrent step"""
+    pipeline = Pipeline("end_work", context)
+    if projects is None:
+        pipeline.step("push_readmes", push_readmes(), description="Pushing all README files to Notion")
+    for project in projects or []:
+        pipeline.step(f"push_{project}", push_readmes([project]), description=f"Pushing {project} to Notion")
+    return pipeline
+
+
+def main():
+    """CLI interface"""
+    policy, args = SyncPolicy.from_argv(sys.argv[1:])
+    if not args or args[0] not in ("start", "end"):
+        print("""
+Usage:
+  python pipeline.py start [--quick]       # Database sync, tasks.md and README pull
+  python pipeline.py end [project ...]     # Push READMEs (all, or the listed projects)
+
+Options:
+  --on-conflict=POLICY   backup-and-overwrite, skip or merge instead of prompting
+  --yes, -y              Answer yes to prompts
+        """)
+        return
+
+    context = PipelineContext(policy=policy)
+    if args[0] == "start":
+        pipeline = start_work_pipeline(pull="--quick" not in args, context=context)
+    else:
+        pipeline = end_work_pipeline(args[1:] or None, context=context)
+
+    ok = pipeline.run()
+    pipeline.report()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
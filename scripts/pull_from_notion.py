@@ -6,34 +6,43 @@ Creates backups before overwriting to prevent data loss
 
 import os
 import json
-import time
 import re
 from pathlib import Path
-from datetime import datetime
-import requests
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import shutil
+import filecmp
+
+from chunk_store import get_chunk_store
+from notion_client import NotionClient, NotionFetchError
+from notion_block_tree import BlockTreeFetcher
+from notion_to_markdown import blocks_to_markdown, write_markdown
+from sync_policy import SyncPolicy, merge_text
 
 load_dotenv()
 
 class NotionToReadmeSync:
-    def __init__(self):
+    def __init__(self, client=None, policy=None):
         self.api_key = os.getenv("NOTION_API")
         self.base_dir = Path(__file__).parent.parent
         self.docs_dir = self.base_dir / "Docs"
         self.cache_dir = self.base_dir / "cache"
         self.backup_dir = self.base_dir / "backups"
         self.backup_dir.mkdir(exist_ok=True)
+        self.state_file = self.cache_dir / "pull_state.json"
+        # Last pulled README per project, the common base for merges
+        self.base_cache_dir = self.cache_dir / "pull_base"
 
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "Notion-Version": "2022-06-28"
-        }
+        self.client = client or NotionClient(self.api_key)
+        self.tree_fetcher = BlockTreeFetcher(self.client)
+        self.policy = policy or SyncPolicy()
 
         # Load synced block mappings
         self.load_mappings()
 
+        # Last-edited timestamps recorded by previous pulls
+        self.pull_state = self.load_pull_state()
+
     def load_mappings(self):
         """Load synced block mappings"""
         mapping_file = self.cache_dir / "synced_blocks.json"
@@ -45,178 +54,187 @@ class NotionToReadmeSync:
         with open(mapping_file, 'r') as f:
             self.mappings = json.load(f)
 
-    def get_block_children(self, block_id, cursor=None):
-        """Recursively get all children of a block"""
-        url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-        params = {"page_size": 100}
+    def load_pull_state(self):
+        """Load last_edited_time bookkeeping from previous pulls"""
+        if self.state_file.exists():
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def save_pull_state(self):
+        """Save last_edited_time bookkeeping for the next pull"""
+        with open(self.state_file, 'w') as f:
+            json.dump(self.pull_state, f, indent=2)
+
+    def get_remote_last_edited(self, folder_name):
+        """
+        One cheap metadata call for a project.
+
+        The page's last_edited_time moves whenever anything inside it changes,
+        including children of the synced block, so it is preferred over the
+        synced block itself (whose timestamp ignores edits to its children).
+        """
+        mapping = self.mappings[folder_name]
+        if mapping.get("page_id"):
+            metadata = self.client.get(f"pages/{mapping['page_id']}")
+        else:
+            metadata = self.client.get(f"blocks/{mapping['synced_block_id']}")
 
-        if cursor:
-            params["start_cursor"] = cursor
+        if metadata is None:
+            print("  [WARN] Metadata check failed")
+            return None
 
-        response = requests.get(url, headers=self.headers, params=params)
+        return metadata.get("last_edited_time")
 
-        if response.status_code != 200:
-            print(f"[ERROR] Failed to get block children: {response.status_code}")
-            return []
+    def is_unchanged_since_last_pull(self, folder_name, remote_edited):
+        """Check whether Notion has changed since the recorded pull"""
+        state = self.pull_state.get(folder_name)
+        readme_path = self.docs_dir / folder_name / "README.md"
 
-        data = response.json()
-        blocks = data.get("results", [])
+        if not state or not remote_edited or not readme_path.exists():
+            return False
 
-        # If there are more pages, get them
-        if data.get("has_more"):
-            time.sleep(0.35)  # Rate limiting
-            blocks.extend(self.get_block_children(block_id, data.get("next_cursor")))
+        if remote_edited > state.get("last_edited_time", ""):
+            return False
 
-        return blocks
+        # The recorded time is our own push, and nothing was edited after it
+        if state.get("pushed"):
+            return True
+
+        # Notion rounds last_edited_time to the minute, so an edit made in the
+        # same minute as the previous pull is indistinguishable from it
+        edited_minute = datetime.fromisoformat(state["last_edited_time"].replace("Z", "+00:00"))
+        pulled_at = datetime.fromisoformat(state["pulled_at"])
+        return pulled_at >= edited_minute + timedelta(minutes=1)
+
+    def record_pull(self, folder_name, remote_edited, blocks):
+        """Remember the block tree's last_edited_time for the next pull"""
+        timestamps = [remote_edited] if remote_edited else []
+        timestamps.extend(b["last_edited_time"] for b in blocks if b.get("last_edited_time"))
+        if not timestamps:
+            return
+
+        self.pull_state[folder_name] = {
+            "last_edited_time": max(timestamps),
+            "pulled_at": datetime.now(timezone.utc).isoformat(),
+            "block_count": len(blocks)
+        }
+        self.save_pull_state()
+
+    def record_push(self, folder_name, readme_path):
+        """
+        Record a README just pushed to Notion as if it had been pulled: the
+        page's new last_edited_time is our own write and the pushed text is
+        the merge base, so the next pull doesn't bring the push back.
+        """
+        remote_edited = self.get_remote_last_edited(folder_name)
+        if not remote_edited:
+            return
+
+        self.save_merge_base(folder_name, readme_path)
+        self.pull_state[folder_name] = dict(
+            self.pull_state.get(folder_name, {}),
+            last_edited_time=remote_edited,
+            pulled_at=datetime.now(timezone.utc).isoformat(),
+            pushed=True
+        )
+        self.save_pull_state()
+
+    def save_merge_base(self, folder_name, pulled_path):
+        """Keep what Notion had at this pull as the base for later merges"""
+        self.base_cache_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(pulled_path, self.base_cache_dir / f"{folder_name}.md")
+
+    def load_merge_base(self, folder_name):
+        """Return the README as last pulled, or "" if never recorded"""
+        base_path = self.base_cache_dir / f"{folder_name}.md"
+        if base_path.exists():
+            return base_path.read_text(encoding='utf-8')
+        return ""
+
+    def resolve_conflict(self, folder_name, readme_path, pulled_path, reason):
+        """
+        Decide a conflict by prompt or policy.
+
+        Returns "overwrite", "skip" or "merged" (README already rewritten).
+        """
+        policy = self.policy.on_conflict
+
+        if self.policy.interactive:
+            response = input("  Overwrite anyway? (y/n/d for diff): ").lower()
 
-    def notion_blocks_to_markdown(self, blocks):
-        """Convert Notion blocks to markdown format"""
-        markdown = []
-        in_list = False
-        list_counter = 0
+            if response == 'd':
+                # Show diff
+                with open(readme_path, 'r', encoding='utf-8') as f:
+                    current = f.read()
+                print("\n  --- Current (first 500 chars) ---")
+                print(current[:500])
+                print("\n  --- From Notion (first 500 chars) ---")
+                with open(pulled_path, 'r', encoding='utf-8') as f:
+                    print(f.read(500))
+                response = input("\n  Overwrite? (y/n): ").lower()
+
+            decision = "overwrite" if response == 'y' else "skip"
+            self.policy.record(folder_name, readme_path, reason, decision)
+            return decision
+
+        if policy == "skip":
+            self.policy.record(folder_name, readme_path, reason, "skip")
+            return "skip"
+
+        if policy == "merge":
+            local = readme_path.read_text(encoding='utf-8')
+            remote = pulled_path.read_text(encoding='utf-8')
+            merged, conflicts = merge_text(self.load_merge_base(folder_name), local, remote)
+
+            if conflicts:
+                # Leave the README alone; the marked-up result is kept for review
+                conflict_path = readme_path.with_name("README.md.conflict")
+                conflict_path.write_text(merged, encoding='utf-8')
+                print(f"  [WARN] {conflicts} overlapping change(s), wrote {conflict_path.name}")
+                self.policy.record(folder_name, readme_path, reason, "merge-conflict",
+                                   conflicts=conflicts, conflict_file=conflict_path)
+                return "skip"
+
+            backup_path = self.backup_file(readme_path)
+            readme_path.write_text(merged, encoding='utf-8')
+            print(f"  [OK] Merged local and Notion changes (backup: {backup_path.name})")
+            self.policy.record(folder_name, readme_path, reason, "merged", backup=backup_path)
+            return "merged"
+
+        self.policy.record(folder_name, readme_path, reason, "overwrite")
+        return "overwrite"
+
+    def get_block_children(self, block_id):
+        """Get all direct children of a block"""
+        return self.client.get_block_children(block_id)
+
+    def strip_sync_markers(self, blocks):
+        """Drop the sync timestamp callout, leading divider and [SYNC] headings"""
+        emitted = False
 
         for block in blocks:
             block_type = block.get("type")
+            text = self.extract_text_from_block(block)
 
             # Skip callouts that are sync markers
-            if block_type == "callout":
-                text = self.extract_text_from_block(block)
-                if "Last synced:" in text or "synced at:" in text:
-                    continue
+            if block_type == "callout" and ("Last synced:" in text or "synced at:" in text):
+                continue
 
             # Skip dividers after sync markers
-            if block_type == "divider" and len(markdown) == 0:
+            if block_type == "divider" and not emitted:
                 continue
 
-            # Convert block to markdown
-            md_line = self.convert_block_to_markdown(block)
-
-            # Handle list continuity
-            if block_type in ["bulleted_list_item", "numbered_list_item"]:
-                if block_type == "numbered_list_item":
-                    if not in_list or in_list != "numbered":
-                        list_counter = 1
-                        in_list = "numbered"
-                    else:
-                        list_counter += 1
-                    md_line = f"{list_counter}. {md_line.lstrip('- ')}"
-                else:
-                    in_list = "bulleted"
-            else:
-                if in_list:
-                    in_list = False
-                    list_counter = 0
-                    if md_line and not md_line.startswith("#"):
-                        markdown.append("")  # Add blank line after lists
-
-            if md_line is not None:
-                markdown.append(md_line)
-
-        return "\n".join(markdown)
-
-    def convert_block_to_markdown(self, block):
-        """Convert a single Notion block to markdown"""
-        block_type = block.get("type")
-
-        if block_type == "paragraph":
-            text = self.extract_rich_text(block.get("paragraph", {}).get("rich_text", []))
-            return text if text else ""
-
-        elif block_type == "heading_1":
-            text = self.extract_rich_text(block.get("heading_1", {}).get("rich_text", []))
-            return f"# {text}" if text else ""
-
-        elif block_type == "heading_2":
-            text = self.extract_rich_text(block.get("heading_2", {}).get("rich_text", []))
-            # Skip sync markers
-            if "[SYNC]" in text or "Documentation" in text and "📁" in text:
-                return None
-            return f"## {text}" if text else ""
-
-        elif block_type == "heading_3":
-            text = self.extract_rich_text(block.get("heading_3", {}).get("rich_text", []))
-            return f"### {text}" if text else ""
-
-        elif block_type == "bulleted_list_item":
-            text = self.extract_rich_text(block.get("bulleted_list_item", {}).get("rich_text", []))
-            return f"- {text}" if text else ""
-
-        elif block_type == "numbered_list_item":
-            text = self.extract_rich_text(block.get("numbered_list_item", {}).get("rich_text", []))
-            return f"- {text}" if text else ""  # Will be fixed by list counter
-
-        elif block_type == "code":
-            code_block = block.get("code", {})
-            text = self.extract_rich_text(code_block.get("rich_text", []))
-            language = code_block.get("language", "")
-            if language == "plain text":
-                language = ""
-            return f"```{language}\n{text}\n```"
-
-        elif block_type == "quote":
-            text = self.extract_rich_text(block.get("quote", {}).get("rich_text", []))
-            return f"> {text}" if text else ""
-
-        elif block_type == "divider":
-            return "---"
-
-        elif block_type == "callout":
-            callout = block.get("callout", {})
-            text = self.extract_rich_text(callout.get("rich_text", []))
-            # Convert callouts to blockquotes with emoji
-            icon = callout.get("icon", {})
-            if icon.get("type") == "emoji":
-                emoji = icon.get("emoji", "📌")
-                return f"> {emoji} {text}"
-            return f"> {text}"
-
-        elif block_type == "toggle":
-            toggle = block.get("toggle", {})
-            text = self.extract_rich_text(toggle.get("rich_text", []))
-            # Convert toggle to details/summary (GitHub markdown)
-            children = self.get_block_children(block.get("id"))
-            if children:
-                child_md = self.notion_blocks_to_markdown(children)
-                return f"<details>\n<summary>{text}</summary>\n\n{child_md}\n</details>"
-            return f"**{text}**"
-
-        elif block_type == "synced_block":
-            # Skip synced block containers
-            return None
-
-        else:
-            # Unknown block type - try to extract text
-            return f"[{block_type}]"
-
-    def extract_rich_text(self, rich_text_array):
-        """Extract and format text from Notion rich text array"""
-        if not rich_text_array:
-            return ""
-
-        result = []
-        for text_obj in rich_text_array:
-            text = text_obj.get("text", {}).get("content", "")
-            annotations = text_obj.get("annotations", {})
-
-            # Apply formatting
-            if annotations.get("code"):
-                text = f"`{text}`"
-            else:
-                if annotations.get("bold"):
-                    text = f"**{text}**"
-                if annotations.get("italic"):
-                    text = f"*{text}*"
-                if annotations.get("strikethrough"):
-                    text = f"~~{text}~~"
-
-            # Handle links
-            if text_obj.get("text", {}).get("link"):
-                url = text_obj["text"]["link"].get("url", "")
-                text = f"[{text}]({url})"
+            # Skip sync marker headings
+            if block_type == "heading_2" and ("[SYNC]" in text or "Documentation" in text and "📁" in text):
+                continue
 
-            result.append(text)
+            emitted = True
+            yield block
 
-        return "".join(result)
+    def notion_blocks_to_markdown(self, blocks):
+        """Convert Notion blocks to markdown format"""
+        return blocks_to_markdown(self.strip_sync_markers(blocks))
 
     def extract_text_from_block(self, block):
         """Extract plain text from any block type"""
@@ -238,33 +256,32 @@ class NotionToReadmeSync:
         return "".join([t.get("text", {}).get("content", "") for t in rich_text])
 
     def backup_file(self, file_path):
-        """Create a backup of the file before overwriting"""
+        """
+        Back up a file before overwriting it.
+
+        Backups go into the chunk store, so sections unchanged since an
+        earlier backup aren't stored again; the returned path reads back
+        through get_chunk_store().read().
+        """
         if not file_path.exists():
             return None
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
 
-        # Create project-specific backup directory
-        project_name = file_path.parent.name
-        project_backup_dir = self.backup_dir / project_name
-        project_backup_dir.mkdir(exist_ok=True)
-
-        backup_path = project_backup_dir / backup_name
-        shutil.copy2(file_path, backup_path)
+        # Project-specific backup directory
+        backup_path = self.backup_dir / file_path.parent.name / backup_name
+        get_chunk_store().put(backup_path, file_path.read_bytes())
 
         return backup_path
 
-    def check_for_conflicts(self, file_path, new_content):
+    def check_for_conflicts(self, file_path, pulled_path):
         """Check if there are potential conflicts"""
         if not file_path.exists():
             return False, "File doesn't exist yet"
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            current_content = f.read()
-
         # Simple conflict detection
-        if current_content == new_content:
+        if filecmp.cmp(file_path, pulled_path, shallow=False):
             return False, "Content identical"
 
         # Check if file was modified recently (last 30 minutes)
@@ -276,7 +293,7 @@ class NotionToReadmeSync:
 
         return False, "No recent modifications"
 
-    def pull_project(self, folder_name, force=False):
+    def pull_project(self, folder_name, force=False, full=False):
         """Pull content from Notion for a specific project"""
         if folder_name not in self.mappings:
             print(f"[ERROR] Project {folder_name} not found in mappings")
@@ -290,8 +307,22 @@ class NotionToReadmeSync:
         print(f"\n[PULL] {folder_name}")
         print(f"  Block ID: {block_id[:8]}...")
 
-        # Get content from Notion
-        blocks = self.get_block_children(block_id)
+        # Skip the download entirely when nothing changed in Notion
+        remote_edited = self.get_remote_last_edited(folder_name)
+        if not full and self.is_unchanged_since_last_pull(folder_name, remote_edited):
+            print(f"  [SKIP] Unchanged in Notion since last pull ({remote_edited})")
+            return False
+
+        # Get content from Notion, including nested children. Cached subtrees
+        # are keyed on the page's timestamp, which moves with any edit inside
+        # it; the synced block's own timestamp doesn't, so it can't key them
+        version = remote_edited if self.mappings[folder_name].get("page_id") else None
+        try:
+            blocks = self.tree_fetcher.fetch(block_id, use_cache=not full, version=version)
+        except NotionFetchError as e:
+            print(f"  [ERROR] Incomplete fetch, README left as it was: {e}")
+            return False
+        self.tree_fetcher.save_cache()
 
         if not blocks:
             print(f"  [WARN] No content found in Notion")
@@ -299,48 +330,57 @@ class NotionToReadmeSync:
 
         print(f"  Retrieved {len(blocks)} blocks from Notion")
 
-        # Convert to markdown
-        markdown_content = self.notion_blocks_to_markdown(blocks)
-
         # Target README file
         readme_path = self.docs_dir / folder_name / "README.md"
+        readme_path.parent.mkdir(exist_ok=True)
+
+        # Stream markdown into a side file; it replaces the README only once accepted
+        pulled_path = readme_path.with_name("README.md.pulled")
+        with open(pulled_path, 'w', encoding='utf-8') as f:
+            write_markdown(self.strip_sync_markers(blocks), f)
 
         # Check for conflicts
-        has_conflict, conflict_reason = self.check_for_conflicts(readme_path, markdown_content)
+        has_conflict, conflict_reason = self.check_for_conflicts(readme_path, pulled_path)
+
+        if conflict_reason == "Content identical":
+            print("  [OK] Already up to date")
+            self.save_merge_base(folder_name, pulled_path)
+            pulled_path.unlink()
+            self.record_pull(folder_name, remote_edited, blocks)
+            return False
 
         if has_conflict and not force:
             print(f"  [WARN] Potential conflict: {conflict_reason}")
-            response = input("  Overwrite anyway? (y/n/d for diff): ").lower()
+            decision = self.resolve_conflict(folder_name, readme_path, pulled_path, conflict_reason)
 
-            if response == 'd':
-                # Show diff
-                if readme_path.exists():
-                    with open(readme_path, 'r', encoding='utf-8') as f:
-                        current = f.read()
-                    print("\n  --- Current (first 500 chars) ---")
-                    print(current[:500])
-                    print("\n  --- From Notion (first 500 chars) ---")
-                    print(markdown_content[:500])
-                    response = input("\n  Overwrite? (y/n): ").lower()
-
-            if response != 'y':
+            if decision == "skip":
                 print("  [SKIP] Skipping due to conflict")
+                pulled_path.unlink()
                 return False
 
+            if decision == "merged":
+                self.save_merge_base(folder_name, pulled_path)
+                pulled_path.unlink()
+                readme_path.with_name("README.md.conflict").unlink(missing_ok=True)
+                self.record_pull(folder_name, remote_edited, blocks)
+                return True
+
         # Create backup
         if readme_path.exists():
             backup_path = self.backup_file(readme_path)
             print(f"  Backup saved: {backup_path.name}")
 
         # Write new content
-        readme_path.parent.mkdir(exist_ok=True)
-        with open(readme_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        self.save_merge_base(folder_name, pulled_path)
+        os.replace(pulled_path, readme_path)
+        readme_path.with_name("README.md.conflict").unlink(missing_ok=True)
+
+        self.record_pull(folder_name, remote_edited, blocks)
 
         print(f"  [OK] Successfully pulled to {readme_path}")
         return True
 
-    def pull_all(self, force=False):
+    def pull_all(self, force=False, full=False):
         """Pull content for all projects"""
         print("\n" + "="*60)
         print("PULL FROM NOTION TO README FILES")
@@ -350,12 +390,11 @@ class NotionToReadmeSync:
         skip_count = 0
 
         for folder_name in self.mappings.keys():
-            result = self.pull_project(folder_name, force)
+            result = self.pull_project(folder_name, force, full)
             if result:
                 success_count += 1
             else:
                 skip_count += 1
-            time.sleep(0.5)  # Rate limiting
 
         print("\n" + "="*60)
         print(f"PULL COMPLETE: {success_count} pulled, {skip_count} skipped")
@@ -364,50 +403,71 @@ class NotionToReadmeSync:
         # Clean old backups (keep last 10 per project)
         self.cleanup_old_backups()
 
+        self.policy.save_report()
+
     def cleanup_old_backups(self, keep_count=10):
         """Remove old backups, keeping only the most recent ones"""
+        store = get_chunk_store()
+        cleaned = 0
         for project_dir in self.backup_dir.iterdir():
             if project_dir.is_dir():
-                backups = sorted(project_dir.glob("README_*.md"),
-                               key=lambda x: x.stat().st_mtime,
-                               reverse=True)
+                # Names sort by their timestamp, newest last
+                backups = store.listing(project_dir, "README_*.md")[::-1]
 
                 # Delete old backups
                 for old_backup in backups[keep_count:]:
-                    old_backup.unlink()
+                    store.delete(old_backup)
+                    cleaned += 1
                     print(f"  Cleaned old backup: {old_backup.name}")
 
+        # Chunks only the deleted backups used
+        if cleaned:
+            store.gc()
+
 
 def main():
     """Run the pull sync"""
-    sync = NotionToReadmeSync()
-
     import sys
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--force":
+    policy, args = SyncPolicy.from_argv(sys.argv[1:])
+    sync = NotionToReadmeSync(policy=policy)
+
+    full = "--full" in args
+    args = [a for a in args if a != "--full"]
+
+    if args:
+        if args[0] == "--force":
             # Force pull all without conflict checking
-            sync.pull_all(force=True)
-        elif sys.argv[1] == "--help":
+            sync.pull_all(force=True, full=full)
+        elif args[0] == "--help":
             print("""
 Usage: python pull_from_notion.py [options] [project]
 
 Options:
   --force          Pull all projects without conflict checking
+  --full           Download every project even if unchanged in Notion
+  --on-conflict=POLICY
+                   Resolve conflicts without prompting: backup-and-overwrite,
+                   skip or merge (3-way with the last pull; overlaps are left
+                   in README.md.conflict). Decisions go to cache/conflict_reports/
+  --yes, -y        Answer yes to prompts (conflicts: backup-and-overwrite)
   --help           Show this help message
   [project]        Pull specific project (e.g., 01_Permits_Legal)
 
 Examples:
   python pull_from_notion.py                    # Pull all with conflict checking
   python pull_from_notion.py --force            # Force pull all
+  python pull_from_notion.py --full             # Ignore last-pull timestamps
+  python pull_from_notion.py --on-conflict=merge # Unattended, merge local edits
   python pull_from_notion.py 01_Permits_Legal   # Pull specific project
             """)
         else:
             # Pull specific project
-            folder = sys.argv[1]
-            sync.pull_project(folder)
+            folder = args[0]
+            sync.pull_project(folder, full=full)
+            sync.policy.save_report()
     else:
         # Pull all projects with conflict checking
-        sync.pull_all()
+        sync.pull_all(full=full)
 
 
 if __name__ == "__main__":
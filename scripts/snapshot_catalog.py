@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Snapshot Catalog - Index of every snapshot written to snapshots/
+Records size, creation time, input hash, content ETag, compressed variants
+and section stats when a snapshot is saved, so listings and downloads don't
+need to scan or stat the directory. `chunk_store.py pack` moves all but
+the newest snapshots into the chunk store
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from chunk_store import get_chunk_store
+from snapshot_encoding import SUFFIXES, variant_path, write_variants
+from snapshot_tree import FORMATS
+
+BASE_DIR = Path(__file__).parent.parent
+SNAPSHOTS_DIR = BASE_DIR / "snapshots"
+CATALOG_FILE = SNAPSHOTS_DIR / "catalog.json"
+
+TASK_LINE = re.compile(r"^\s*- \[[ xX]\]", re.MULTILINE)
+NAME_TIMESTAMP = re.compile(r"project_snapshot_(\d{8}_\d{6})")
+
+# Snapshots compact() leaves as plain .md files (with compressed variants);
+# the GitHub workflows pick up the newest one by filename
+KEEP_PLAIN = 1
+
+
+def section_stats(content: str) -> Dict[str, int]:
+    """Counts describing a rendered snapshot"""
+    return {
+        "characters": len(content),
+        "lines": content.count("\n") + 1,
+        "sections": sum(1 for line in content.splitlines() if line.startswith("## ")),
+        "tasks": len(TASK_LINE.findall(content))
+    }
+
+
+def drop_derived(path: Path):
+    """Delete a snapshot's compressed variants and its other formats"""
+    for encoding in SUFFIXES:
+        variant_path(path, encoding).unlink(missing_ok=True)
+    for suffix, _ in FORMATS.values():
+        if suffix != path.suffix:
+            path.with_suffix(suffix).unlink(missing_ok=True)
+
+
+class SnapshotCatalog:
+    """
+    snapshots/catalog.json, kept in memory.
+
+    Entries are keyed by filename. The file is re-read only when its mtime
+    changes (another process saved a snapshot) and rewritten atomically on
+    each add.
+    """
+
+    def __init__(self, path: Path = CATALOG_FILE, snapshots_dir: Path = SNAPSHOTS_DIR):
+        self.path = path
+        self.snapshots_dir = snapshots_dir
+        self.entries: Dict[str, Dict] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            if self._mtime is None:
+                self.rebuild()  # first run: index what's already on disk
+            return
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = {e["filename"]: e for e in json.load(f)["snapshots"]}
+            self._mtime = mtime
+
+    def _write(self):
+        self.path.parent.mkdir(exist_ok=True)
+        ordered = sorted(self.entries.values(), key=lambda e: (e["created"], e["filename"]), reverse=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"updated": datetime.now().isoformat(), "snapshots": ordered}, f, indent=2)
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def add(self, path: Path, content: str, input_hash: Optional[str] = None,
+            created: Optional[str] = None, encodings: Optional[Dict[str, int]] = None) -> Dict:
+        """Record a snapshot that was just written"""
+        data = content.encode("utf-8")
+        entry = {
+            "filename": path.name,
+            "size": len(data),
+            "created": created or datetime.now().isoformat(),
+            "input_hash": input_hash,
+            "etag": hashlib.sha256(data).hexdigest()[:32],
+            "encodings": encodings or {}
+        }
+        entry.update(section_stats(content))
+        with self._lock:
+            self._refresh()
+            self.entries[path.name] = entry
+            self._write()
+        return entry
+
+    def remove(self, filename: str):
+        """Forget a snapshot whose file is gone, along with its variants, other formats and inputs record"""
+        with self._lock:
+            self._refresh()
+            if self.entries.pop(filename, None):
+                self._write()
+        path = self.snapshots_dir / filename
+        drop_derived(path)
+        (self.snapshots_dir / "inputs" / f"{path.stem}.json").unlink(missing_ok=True)
+
+    def get(self, filename: str) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            return self.entries.get(filename)
+
+    def compact(self, keep: int = KEEP_PLAIN) -> int:
+        """
+        Pack all but the newest `keep` snapshots into the chunk store and drop
+        their compressed variants and other formats (those are rendered from
+        the markdown on demand). Returns the number packed.
+        """
+        store = get_chunk_store()
+        with self._lock:
+            self._refresh()
+            entries = sorted(self.entries.values(), key=lambda e: (e["created"], e["filename"]), reverse=True)
+            packed = 0
+            for entry in entries[keep:]:
+                path = self.snapshots_dir / entry["filename"]
+                if not store.pack(path):
+                    continue
+                drop_derived(path)
+                entry["encodings"] = {}
+                packed += 1
+            if packed:
+                self._write()
+        return packed
+
+    def rebuild(self) -> int:
+        """Re-index snapshots/ from scratch (recompressing plain files); returns the number of entries"""
+        store = get_chunk_store()
+        self.entries = {}
+        for path in store.listing(self.snapshots_dir, "project_snapshot_*.md"):
+            data = store.read(path)
+            content = data.decode("utf-8")
+            # The name's timestamp survives copies and checkouts; mtime doesn't
+            match = NAME_TIMESTAMP.match(path.name)
+            created = (datetime.strptime(match.group(1), "%Y%m%d_%H%M%S") if match
+                       else datetime.fromtimestamp(store.on_disk(path).stat().st_mtime)).isoformat()
+            encodings = write_variants(path, data) if path.exists() else {}
+            entry = {"filename": path.name, "size": len(data), "created": created, "input_hash": None,
+                     "etag": hashlib.sha256(data).hexdigest()[:32], "encodings": encodings}
+            entry.update(section_stats(content))
+            self.entries[path.name] = entry
+        self._write()
+        return len(self.entries)
+
+    def query(self, cursor: Optional[str] = None, limit: int = 10, since: Optional[str] = None,
+              until: Optional[str] = None, input_hash: Optional[str] = None) -> Tuple[List[Dict], int, Optional[str]]:
+        """
+        Newest-first page of entries matching the filters.
+
+        since/until compare against the ISO creation time (a date works too);
+        input_hash matches a prefix. cursor is the next_cursor of the previous
+        page, "<created>|<filename>" of its last entry; the page continues
+        after that position even if the entry itself has since been removed
+        or packed. Returns (page, total matching, next cursor). Raises
+        ValueError for a malformed cursor.
+        """
+        with self._lock:
+            self._refresh()
+            entries = sorted(self.entries.values(), key=lambda e: (e["created"], e["filename"]), reverse=True)
+
+        if since:
+            entries = [e for e in entries if e["created"] >= since]
+        if until:
+            # A bare date includes the whole day
+            bound = until + "T23:59:59.999999" if len(until) == 10 else until
+            entries = [e for e in entries if e["created"] <= bound]
+        if input_hash:
+            entries = [e for e in entries if (e["input_hash"] or "").startswith(input_hash)]
+
+        total = len(entries)
+        if cursor:
+            created, sep, filename = cursor.partition("|")
+            if not sep or not filename:
+                raise ValueError("cursor must be a next_cursor from a previous page")
+            entries = [e for e in entries if (e["created"], e["filename"]) < (created, filename)]
+
+        page = entries[:limit]
+        next_cursor = f"{page[-1]['created']}|{page[-1]['filename']}" if len(entries) > limit else None
+        return page, total, next_cursor
+
+
+_catalog = None
+
+
+def get_catalog() -> SnapshotCatalog:
+    """Process-wide catalog instance"""
+    global _catalog
+    if _catalog is None:
+        _catalog = SnapshotCatalog()
+    return _catalog
+
+
+def main():
+    """CLI interface"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ("rebuild", "list"):
+        print("""
+Usage:
+  python snapshot_catalog.py rebuild    # Re-index snapshots/ (after deleting files by hand)
+  python snapshot_catalog.py list       # Show the newest catalog entries
+        """)
+        return
+
+    catalog = get_catalog()
+    if sys.argv[1] == "rebuild":
+        print(f"[OK] Indexed {catalog.rebuild()} snapshots into {catalog.path}")
+    else:
+        page, total, _ = catalog.query(limit=20)
+        for entry in page:
+            print(f"{entry['created'][:19]}  {entry['filename']:<42}{entry['size']:>9,} bytes  "
+                  f"{entry['sections']} sections, {entry['tasks']} tasks")
+        print(f"\n{total} snapshots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Snapshot Delta - What changed since an earlier snapshot or date
+Every saved snapshot gets a small record of its inputs (task fields and
+README section hashes). A delta compares two such records - one stored or
+rebuilt from sync history, one current - instead of diffing snapshot text
+"""
+
+import re
+import json
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from chunk_store import get_chunk_store
+
+BASE_DIR = Path(__file__).parent.parent
+DOCS_DIR = BASE_DIR / "Docs"
+CACHE_DIR = BASE_DIR / "cache"
+BACKUP_DIR = BASE_DIR / "backups"
+SNAPSHOTS_DIR = BASE_DIR / "snapshots"
+INPUTS_DIR = SNAPSHOTS_DIR / "inputs"
+
+STAMP = re.compile(r"_(\d{8}_\d{6})")
+DONE = {"done", "complete", "completed"}
+INTRO = "(intro)"
+
+
+def _stamp(path: Path) -> Optional[datetime]:
+    """Timestamp in a history file's name (tasks_20250925_112404.json)"""
+    match = STAMP.search(path.stem)
+    return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S") if match else None
+
+
+def task_records(rows: List[Dict]) -> Dict[str, Dict]:
+    """The fields a delta compares, by task id"""
+    records = {}
+    for row in rows:
+        props = row.get("properties", {})
+        records[row["id"]] = {
+            "name": props.get("Name") or "Untitled Task",
+            "status": props.get("Status"),
+            "priority": props.get("Priority"),
+            "due": props.get("Due Date")
+        }
+    return records
+
+
+def readme_sections(text: str) -> Dict[str, str]:
+    """Hash of each ## section of a README (the part before the first one is "(intro)")"""
+    sections: Dict[str, List[str]] = {INTRO: []}
+    current = INTRO
+    for line in text.split("\n"):
+        if line.startswith("## "):
+            current = line[3:].strip()
+            sections.setdefault(current, [])
+        sections[current].append(line)
+    return {name: hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()[:16]
+            for name, lines in sections.items() if any(l.strip() for l in lines)}
+
+
+def _latest_task_file(before: Optional[datetime] = None) -> Optional[Path]:
+    """Newest task sync (at or before `before`), like generate_tasks_md picks it"""
+    for directory, pattern in ((CACHE_DIR / "content", "tasks_*.json"), (CACHE_DIR / "tasks", "all_tasks_*.json")):
+        files = [f for f in sorted(directory.glob(pattern))
+                 if before is None or (_stamp(f) and _stamp(f) <= before)]
+        if files:
+            return files[-1]
+    return None
+
+
+def _load_tasks(path: Optional[Path]) -> Dict[str, Dict]:
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return task_records(json.load(f))
+
+
+def current_inputs() -> Dict:
+    """Input record for the tree as it is now"""
+    tasks_file = _latest_task_file()
+    readmes = {}
+    for readme in sorted(DOCS_DIR.glob("*/README.md")):
+        readmes[readme.parent.name] = readme_sections(readme.read_text(encoding="utf-8"))
+    return {
+        "created": datetime.now().isoformat(),
+        "tasks_file": str(tasks_file.relative_to(BASE_DIR)) if tasks_file else None,
+        "tasks": _load_tasks(tasks_file),
+        "readmes": readmes
+    }
+
+
+def record_inputs(snapshot_path: Path, input_hash: Optional[str] = None) -> Path:
+    """Store the input record for a snapshot that was just saved"""
+    INPUTS_DIR.mkdir(parents=True, exist_ok=True)
+    record = dict(current_inputs(), snapshot=snapshot_path.name, input_hash=input_hash)
+    path = INPUTS_DIR / f"{snapshot_path.stem}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+def inputs_at(when: datetime) -> Tuple[Dict, List[str]]:
+    """
+    Rebuild an input record for a past moment from sync history: the task
+    sync current at that time, and each README as the first backup taken
+    after it preserved it (or as it is now, if it hasn't been replaced since).
+    """
+    notes = []
+    store = get_chunk_store()
+    tasks_file = _latest_task_file(when)
+    if not tasks_file:
+        notes.append(f"No task sync on or before {when:%Y-%m-%d %H:%M}; every task counts as added.")
+
+    readmes = {}
+    for readme in sorted(DOCS_DIR.glob("*/README.md")):
+        folder = readme.parent.name
+        later = [b for b in store.listing(BACKUP_DIR / folder, "README_*.md") if _stamp(b) and _stamp(b) > when]
+        source = later[0] if later else readme
+        readmes[folder] = readme_sections(store.read_text(source))
+
+    return {
+        "created": when.isoformat(),
+        "tasks_file": str(tasks_file.relative_to(BASE_DIR)) if tasks_file else None,
+        "tasks": _load_tasks(tasks_file),
+        "readmes": readmes
+    }, notes
+
+
+def baseline(since: str) -> Tuple[str, Dict, List[str]]:
+    """
+    (label, input record, notes) for --since: a snapshot filename (with or
+    without .md) or an ISO date/time.
+    """
+    name = Path(since).name
+    stem = name[:-3] if name.endswith(".md") else name
+    record_file = INPUTS_DIR / f"{stem}.json"
+    if record_file.exists():
+        with open(record_file, 'r', encoding='utf-8') as f:
+            return f"snapshot {stem}.md", json.load(f), []
+
+    if get_chunk_store().exists(SNAPSHOTS_DIR / f"{stem}.md"):
+        when = _stamp(Path(stem))
+        if when is None:
+            raise ValueError(f"Can't tell when {stem}.md was taken")
+        inputs, notes = inputs_at(when)
+        notes.insert(0, f"{stem}.md has no stored inputs (it predates them); rebuilt from sync history.")
+        return f"snapshot {stem}.md", inputs, notes
+
+    try:
+        when = datetime.fromisoformat(since)
+    except ValueError:
+        raise ValueError(f"--since needs a snapshot name or a date (YYYY-MM-DD), got {since!r}")
+    inputs, notes = inputs_at(when)
+    return f"{since}", inputs, notes
+
+
+def compare(old: Dict, new: Dict) -> Dict[str, List]:
+    """Task and README changes between two input records"""
+    before, after = old.get("tasks", {}), new.get("tasks", {})
+    changes: Dict[str, List] = {key: [] for key in
+                                ("added", "completed", "removed", "reprioritised", "status", "deadlines", "readmes")}
+
+    for task_id, task in after.items():
+        was = before.get(task_id)
+        if was is None:
+            changes["added"].append(task)
+            if task["due"]:
+                changes["deadlines"].append((task, None))
+            continue
+        if str(task["status"]).lower() in DONE and str(was["status"]).lower() not in DONE:
+            changes["completed"].append(task)
+        elif task["status"] != was["status"]:
+            changes["status"].append((task, was["status"]))
+        if task["priority"] != was["priority"]:
+            changes["reprioritised"].append((task, was["priority"]))
+        if task["due"] and task["due"] != was["due"]:
+            changes["deadlines"].append((task, was["due"]))
+    changes["removed"] = [task for task_id, task in before.items() if task_id not in after]
+    changes["deadlines"].sort(key=lambda change: change[0]["due"])
+
+    old_readmes, new_readmes = old.get("readmes", {}), new.get("readmes", {})
+    for folder in sorted(set(old_readmes) | set(new_readmes)):
+        was, now = old_readmes.get(folder, {}), new_readmes.get(folder, {})
+        edited = [s for s in now if s in was and now[s] != was[s]]
+        added = [s for s in now if s not in was]
+        dropped = [s for s in was if s not in now]
+        if edited or added or dropped:
+            changes["readmes"].append((folder, edited, added, dropped))
+    return changes
+
+
+def render(label: str, old: Dict, new: Dict, changes: Dict[str, List], notes: List[str]) -> str:
+    """Markdown delta document"""
+    def task_line(task, extra=""):
+        due = f" (due {task['due']})" if task.get("due") else ""
+        return f"- {task['name']}{due}{extra}"
+
+    counts = {key: len(value) for key, value in changes.items()}
+    lines = [
+        f"# 🎅 Santa's Workshop - Changes since {label}",
+        "",
+        f"**From**: {old.get('created', '?')[:16].replace('T', ' ')}  ",
+        f"**To**: {new['created'][:16].replace('T', ' ')}  ",
+        f"**Tasks**: {counts['added']} added, {counts['completed']} completed, {counts['removed']} removed, "
+        f"{counts['reprioritised']} re-prioritised  ",
+        f"**READMEs**: {counts['readmes']} projects changed"
+    ]
+    if notes:
+        lines += [""] + [f"> {note}" for note in notes]
+
+    def block(title, items):
+        if items:
+            lines.extend(["", f"## {title}", ""] + items)
+
+    block("✅ Completed", [task_line(t) for t in changes["completed"]])
+    block("🆕 Added", [task_line(t, f" - {t['status'] or 'no status'}") for t in changes["added"]])
+    block("🔀 Re-prioritised", [task_line(t, f": {was or 'none'} → {t['priority'] or 'none'}")
+                                for t, was in changes["reprioritised"]])
+    block("📅 New deadlines", [f"- **{t['due']}**: {t['name']}" + (f" (was {was})" if was else "")
+                               for t, was in changes["deadlines"]])
+    block("🔄 Status changes", [task_line(t, f": {was or 'none'} → {t['status'] or 'none'}")
+                                for t, was in changes["status"]])
+    block("🗑️ Removed", [task_line(t) for t in changes["removed"]])
+
+    readme_lines = []
+    for folder, edited, added, dropped in changes["readmes"]:
+        readme_lines.append(f"### {folder}")
+        readme_lines += [f"- Edited: {s}" for s in edited]
+        readme_lines += [f"- New: {s}" for s in added]
+        readme_lines += [f"- Removed: {s}" for s in dropped]
+        readme_lines.append("")
+    block("📝 README sections changed", readme_lines[:-1] if readme_lines else [])
+
+    if not any(counts.values()):
+        lines += ["", "*No changes.*"]
+    return "\n".join(lines) + "\n"
+
+
+def build_delta(since: str) -> Tuple[str, Dict[str, List]]:
+    """Delta markdown and the raw changes since a snapshot or date"""
+    label, old, notes = baseline(since)
+    new = current_inputs()
+    changes = compare(old, new)
+    return render(label, old, new, changes, notes), changes
+
+
+def save_delta(content: str) -> Path:
+    """Write a delta to snapshots/project_delta_<timestamp>.md (not catalogued)"""
+    SNAPSHOTS_DIR.mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    for attempt in range(1, 1000):
+        suffix = f"_{attempt}" if attempt > 1 else ""
+        path = SNAPSHOTS_DIR / f"project_delta_{timestamp}{suffix}.md"
+        try:
+            with open(path, 'x', encoding='utf-8') as f:
+                f.write(content)
+            return path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No free delta filename for {timestamp}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Snapshot Encoding - Precompressed variants of snapshot files
+Writes .gz (and .br when brotli is installed) next to each snapshot once,
+and picks the best variant for a client's Accept-Encoding
+"""
+
+import gzip
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Preferred first
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + SUFFIXES[encoding])
+
+
+def write_variants(path: Path, data: bytes) -> Dict[str, int]:
+    """Compress data next to path; returns {encoding: compressed size}"""
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    brotli = _brotli()
+    if brotli:
+        variants["br"] = brotli.compress(data, quality=11)
+
+    sizes = {}
+    for encoding, compressed in variants.items():
+        # Not worth serving if compression doesn't help
+        if len(compressed) < len(data):
+            variant_path(path, encoding).write_bytes(compressed)
+            sizes[encoding] = len(compressed)
+    return sizes
+
+
+def negotiate(accept_encodings, available: Iterable[str]) -> Optional[str]:
+    """
+    Best available encoding the client accepts, or None for identity.
+
+    accept_encodings is werkzeug's request.accept_encodings; ties in quality
+    go to our preference order (br, then gzip).
+    """
+    best, best_quality = None, 0
+    for encoding in SUFFIXES:
+        if encoding not in available:
+            continue
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Snapshot Jobs - Background job queue for the web service
+Runs snapshot builds on a small worker pool and keeps each job's progress
+events so clients can poll them or stream them as they happen
+"""
+
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+FINISHED = ("done", "failed")
+
+
+class Job:
+    """One queued build and everything reported about it"""
+
+    def __init__(self, params: Dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = "queued"
+        self.created = datetime.now().isoformat()
+        self.started: Optional[str] = None
+        self.finished: Optional[str] = None
+        self.events: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": self.events[-1] if self.events else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    """
+    Runs worker(job, report) for each submitted job on a thread pool.
+
+    report(stage, total, message) records a progress event; waiters on
+    events() wake up for every new event and when the job finishes. The
+    newest `keep` jobs are remembered; older finished ones are dropped.
+    """
+
+    def __init__(self, worker: Callable, max_workers: int = 2, keep: int = 100):
+        self.worker = worker
+        self.keep = keep
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._changed = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snapshot-job")
+
+    def submit(self, **params) -> Job:
+        job = Job(params)
+        with self._changed:
+            self.jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._changed:
+            return self.jobs.get(job_id)
+
+    def depth(self) -> int:
+        """Jobs queued or running"""
+        with self._changed:
+            return sum(1 for job in self.jobs.values() if not job.done)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self.jobs) - self.keep)]:
+            del self.jobs[job_id]
+
+    def _update(self, job: Job, **changes):
+        with self._changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            self._changed.notify_all()
+
+    def _run(self, job: Job):
+        self._update(job, status="running", started=datetime.now().isoformat())
+
+        def report(stage: int, total: int, message: str):
+            with self._changed:
+                job.events.append({
+                    "id": len(job.events) + 1,
+                    "stage": stage,
+                    "total": total,
+                    "message": message,
+                    "time": datetime.now().isoformat()
+                })
+                self._changed.notify_all()
+
+        try:
+            result = self.worker(job, report)
+            self._update(job, status="done", result=result, finished=datetime.now().isoformat())
+        except Exception as e:
+            print(f"[ERROR] Snapshot job {job.id}: {e}")
+            self._update(job, status="failed", error=str(e), finished=datetime.now().isoformat())
+
+    def events(self, job: Job, after: int = 0, timeout: float = 15):
+        """
+        Yield (event, job_finished) as events arrive, starting after event
+        number `after`. Yields (None, False) every `timeout` seconds of quiet
+        so streams can send keep-alives.
+        """
+        sent = after
+        while True:
+            with self._changed:
+                if len(job.events) <= sent and not job.done:
+                    self._changed.wait(timeout)
+                new = job.events[sent:]
+                finished = job.done
+
+            for event in new:
+                sent = event["id"]
+                yield event, False
+            if finished:
+                yield None, True
+                return
+            if not new:
+                yield None, False
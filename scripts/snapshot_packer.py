@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Snapshot Packer - Fit a snapshot into a model's context window
+Sections are split into prioritised blocks; the packer keeps the most
+important blocks that fit a token budget and reassembles them in document
+order
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUDGET = 32000
+
+# Rough average for English markdown; good enough to budget with
+CHARS_PER_TOKEN = 4
+# Room left per section for an "omitted" note
+NOTE_TOKENS = 20
+
+# Block priorities, highest kept first
+ESSENTIAL = 100          # executive summary
+STATUS = 95              # dashboard, metadata
+HIGH_PRIORITY_TASK = 90
+CRITICAL_PATH = 80       # critical-path project READMEs (detail sections get 20 less)
+OVERVIEW = 70            # core.md intro
+PROJECT = 60             # other project READMEs (detail sections get 20 less)
+DETAIL = 45              # core.md subsections
+GUIDE = 30               # AI analysis prompts
+CONTEXT = 20             # team context
+
+# A block is [priority, text, parent]: parent is the index (in the same
+# section) of the block it sits under, None for a section's head. A block
+# is only kept together with its parents. Lists, so blocks survive a JSON
+# round trip through the section cache.
+Block = list
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def block(text: str, priority: int, parent: Optional[int] = 0) -> Block:
+    return [priority, text, parent]
+
+
+def split_headings(text: str, priority: int, detail_priority: int, head: str = "") -> List[Block]:
+    """
+    Blocks for a markdown document: `head` plus the intro, then one block per
+    ##/### heading. ### blocks sit under the preceding ## block. Joining the
+    block texts gives back head + text exactly.
+    """
+    blocks = [block(head, priority, None)]
+    lines: List[str] = []
+    last_h2 = 0
+
+    def flush(first_line: bool):
+        if first_line:
+            blocks[0][1] += "\n".join(lines)
+        else:
+            blocks.append(block("\n" + "\n".join(lines), detail_priority,
+                                last_h2 if lines[0].startswith("###") else 0))
+
+    first = True
+    for line in text.split("\n"):
+        if line.startswith("##") and (lines or not first):
+            flush(first)
+            first = False
+            lines = []
+            if not line.startswith("###"):
+                last_h2 = len(blocks)
+        lines.append(line)
+    flush(first)
+    return blocks
+
+
+def pack(sections: List[List[Block]], budget: Optional[int] = DEFAULT_BUDGET) -> Tuple[List[str], Dict]:
+    """
+    Section texts holding the highest-priority blocks that fit `budget`
+    tokens (everything if budget is falsy), plus a report. Sections that
+    lost blocks end with a note saying how many; sections that lost all of
+    them are left out.
+    """
+    costs = [[estimate_tokens(b[1]) for b in blocks] for blocks in sections]
+    total = sum(map(sum, costs))
+    kept = [[True] * len(blocks) for blocks in sections]
+
+    if budget and total > budget:
+        kept = [[False] * len(blocks) for blocks in sections]
+        limit = budget - NOTE_TOKENS * len(sections)
+        used = 0
+        order = sorted(((-b[0], s, i) for s, blocks in enumerate(sections) for i, b in enumerate(blocks)))
+        for _, s, i in order:
+            chain = []
+            j = i
+            while j is not None and not kept[s][j]:
+                chain.append(j)
+                j = sections[s][j][2]
+            cost = sum(costs[s][j] for j in chain)
+            if chain and used + cost <= limit:
+                for j in chain:
+                    kept[s][j] = True
+                used += cost
+
+    texts = []
+    omitted_sections = 0
+    for s, blocks in enumerate(sections):
+        parts = [b[1] for b, keep in zip(blocks, kept[s]) if keep]
+        dropped = len(blocks) - len(parts)
+        if not parts:
+            omitted_sections += 1
+            continue
+        text = "".join(parts)
+        if dropped:
+            text += f"\n\n*[{dropped} more part{'s' if dropped > 1 else ''} omitted to fit the token budget]*"
+        texts.append(text)
+
+    report = {
+        "budget": budget or None,
+        "tokens": sum(estimate_tokens(t) for t in texts),
+        "full_tokens": total,
+        "blocks": sum(map(len, sections)),
+        "kept": sum(map(sum, kept)),
+        "omitted_sections": omitted_sections
+    }
+    return texts, report
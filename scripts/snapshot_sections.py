@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Snapshot Sections - Memoized snapshot sections
+Each section is cached under a hash of its input files and of the code that
+renders it, so a build only re-renders the sections whose inputs changed
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / "cache"
+SECTIONS_FILE = CACHE_DIR / "snapshot_sections.json"
+
+_digests: Dict[Path, tuple] = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """
+    sha256 of a file's bytes, or None if it doesn't exist.
+
+    Remembered per (mtime, size), so unchanged files are only stat'ed.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        cached = _digests.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _digest_lock:
+        _digests[path] = (stamp, digest)
+    return digest
+
+
+class SectionCache:
+    """
+    cache/snapshot_sections.json: the last rendering of each section (any
+    JSON value, e.g. a list of packer blocks).
+
+    One entry per section name, so the file never grows past one snapshot's
+    worth of text. Re-read when another process has rewritten it.
+    """
+
+    def __init__(self, path: Path = SECTIONS_FILE):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self._mtime = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get("sections", {})
+            except ValueError:
+                self.entries = {}
+            self._mtime = mtime
+
+    @staticmethod
+    def key(name: str, inputs: Iterable[Path], salt: str = "") -> str:
+        """Cache key for a section: its name, the renderer's code and its inputs' contents"""
+        digest = hashlib.sha256(f"{salt}\0{name}".encode("utf-8"))
+        for path in inputs:
+            digest.update(f"\0{path.relative_to(BASE_DIR)}\0{file_digest(path) or 'missing'}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, name: str, key: str) -> Optional[Any]:
+        with self._lock:
+            self._refresh()
+            entry = self.entries.get(name)
+        return entry.get("value") if entry and entry["key"] == key else None
+
+    def put(self, name: str, key: str, value: Any):
+        with self._lock:
+            self.entries[name] = {"key": key, "value": value}
+            self._dirty = True
+
+    def save(self):
+        """Write pending entries (atomically, so readers never see half a file)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"updated": datetime.now().isoformat(), "sections": self.entries}, f)
+            os.replace(tmp, self.path)
+            self._mtime = self.path.stat().st_mtime_ns
+            self._dirty = False
+
+
+_cache = None
+
+
+def get_section_cache() -> SectionCache:
+    """Process-wide section cache"""
+    global _cache
+    if _cache is None:
+        _cache = SectionCache()
+    return _cache
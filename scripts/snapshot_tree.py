@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Snapshot Tree - One structured form of a snapshot, rendered to every format
+The packed snapshot is parsed once into a tree of headed sections; markdown,
+JSON and HTML are all rendered from that tree, in parallel
+"""
+
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from typing import Callable, Dict, List, Optional
+
+from markdown_to_notion import FENCE_RE, HEADING_RE, markdown_to_blocks, parse_inline
+
+# format -> (file suffix, mimetype); markdown first, it's the canonical file
+FORMATS = {
+    "md": (".md", "text/markdown"),
+    "json": (".json", "application/json"),
+    "html": (".html", "text/html"),
+}
+
+# A node is {"id", "title", "level", "markdown", "children"}. "markdown" is
+# the node's own text, from its heading line up to the next heading, so
+# concatenating every node in document order gives back the snapshot.
+Node = dict
+
+
+def _slug(title: str, seen: Dict[str, int]) -> str:
+    base = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "section"
+    seen[base] = seen.get(base, 0) + 1
+    return base if seen[base] == 1 else f"{base}-{seen[base]}"
+
+
+def build_tree(markdown: str, **meta) -> Dict:
+    """
+    Section tree for a snapshot's markdown.
+
+    Every heading (outside code fences) starts a node nested under the
+    closest preceding heading of a higher level. Text before the first
+    heading is the document's "intro". Extra keyword arguments (generated,
+    input_hash, ...) are stored on the document.
+    """
+    doc = dict(meta, title="", intro="", sections=[])
+    stack: List[Node] = []
+    seen: Dict[str, int] = {}
+    current: Optional[Node] = None
+    lines: List[str] = []
+    fence = None
+
+    def flush():
+        text = "".join(lines)
+        if current is None:
+            doc["intro"] = text
+        else:
+            current["markdown"] = text
+
+    for line in markdown.splitlines(keepends=True):
+        stripped = line.rstrip("\n")
+        if fence:
+            if stripped.strip().startswith(fence):
+                fence = None
+        elif FENCE_RE.match(stripped):
+            fence = FENCE_RE.match(stripped).group(1)
+        elif HEADING_RE.match(stripped):
+            flush()
+            hashes, title = HEADING_RE.match(stripped).groups()
+            node = {"id": _slug(title, seen), "title": title, "level": len(hashes), "markdown": "", "children": []}
+            while stack and stack[-1]["level"] >= node["level"]:
+                stack.pop()
+            (stack[-1]["children"] if stack else doc["sections"]).append(node)
+            stack.append(node)
+            if not doc["title"] and node["level"] == 1:
+                doc["title"] = title
+            current, lines = node, []
+        lines.append(line)
+    flush()
+    return doc
+
+
+def walk(nodes: List[Node]):
+    """Nodes in document order"""
+    for node in nodes:
+        yield node
+        yield from walk(node["children"])
+
+
+def render_markdown(doc: Dict) -> str:
+    return doc["intro"] + "".join(node["markdown"] for node in walk(doc["sections"]))
+
+
+def render_json(doc: Dict) -> str:
+    return json.dumps(doc, ensure_ascii=False, indent=2)
+
+
+# HTML
+
+def _runs_html(runs: List[Dict]) -> str:
+    parts = []
+    for run in runs:
+        text = escape(run["text"]["content"])
+        notes = run.get("annotations", {})
+        if notes.get("code"):
+            text = f"<code>{text}</code>"
+        if notes.get("bold"):
+            text = f"<strong>{text}</strong>"
+        if notes.get("italic"):
+            text = f"<em>{text}</em>"
+        if notes.get("strikethrough"):
+            text = f"<s>{text}</s>"
+        link = run["text"].get("link")
+        if link:
+            text = f'<a href="{escape(link["url"])}">{text}</a>'
+        parts.append(text)
+    return "".join(parts)
+
+
+LISTS = {"bulleted_list_item": "ul", "numbered_list_item": "ol", "to_do": 'ul class="todo"'}
+
+
+def blocks_html(blocks: List[Dict]) -> str:
+    """HTML for blocks from markdown_to_blocks (consecutive list items share a list)"""
+    out = []
+    open_list = None
+    for block in blocks:
+        kind = block["type"]
+        body = block[kind]
+        tag = LISTS.get(kind)
+        if tag != open_list:
+            if open_list:
+                out.append(f"</{open_list.split()[0]}>")
+            if tag:
+                out.append(f"<{tag}>")
+            open_list = tag
+
+        if tag:
+            text = _runs_html(body["rich_text"])
+            if kind == "to_do":
+                checked = " checked" if body.get("checked") else ""
+                text = f'<input type="checkbox" disabled{checked}> {text}'
+            out.append(f"<li>{text}{blocks_html(body.get('children', []))}</li>")
+        elif kind.startswith("heading_"):
+            out.append(f"<h{kind[-1]}>{_runs_html(body['rich_text'])}</h{kind[-1]}>")
+        elif kind == "paragraph":
+            out.append(f"<p>{_runs_html(body['rich_text'])}{blocks_html(body.get('children', []))}</p>")
+        elif kind == "quote":
+            out.append(f"<blockquote>{_runs_html(body['rich_text']).replace(chr(10), '<br>')}</blockquote>")
+        elif kind == "code":
+            out.append(f"<pre><code>{_runs_html([dict(r, annotations={}) for r in body['rich_text']])}</code></pre>")
+        elif kind == "divider":
+            out.append("<hr>")
+        elif kind == "image":
+            alt = escape("".join(r["text"]["content"] for r in body.get("caption", [])))
+            out.append(f'<img src="{escape(body["external"]["url"])}" alt="{alt}">')
+        elif kind == "table":
+            rows = []
+            for i, row in enumerate(body["children"]):
+                cell = "th" if i == 0 and body.get("has_column_header") else "td"
+                rows.append("<tr>" + "".join(f"<{cell}>{_runs_html(c)}</{cell}>" for c in row["table_row"]["cells"])
+                            + "</tr>")
+            out.append("<table>" + "".join(rows) + "</table>")
+    if open_list:
+        out.append(f"</{open_list.split()[0]}>")
+    return "".join(out)
+
+
+HTML_STYLE = """
+body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif; color: #1f1a1b;
+       background: #f4efe5; margin: 0; line-height: 1.55; }
+header { background: #0f2f24; color: #f4efe5; padding: 28px 32px; }
+header h1 { margin: 0 0 6px; font-size: 1.8em; }
+header p { margin: 0; opacity: 0.8; }
+main { display: flex; gap: 32px; max-width: 1200px; margin: 0 auto; padding: 24px 32px; }
+nav { flex: 0 0 240px; position: sticky; top: 16px; align-self: flex-start; font-size: 0.9em; }
+nav ul { list-style: none; padding-left: 12px; margin: 4px 0; }
+nav a { color: #1a3b2d; text-decoration: none; }
+article { flex: 1; min-width: 0; }
+section > h2 { border-bottom: 2px solid #e4b567; padding-bottom: 4px; }
+ul.todo { list-style: none; padding-left: 8px; }
+table { border-collapse: collapse; margin: 12px 0; }
+th, td { border: 1px solid #d9d4c7; padding: 4px 10px; text-align: left; }
+pre { background: #fff; padding: 12px; overflow-x: auto; }
+code { background: rgba(228, 181, 103, 0.32); padding: 0 3px; }
+blockquote { border-left: 4px solid #e4b567; margin: 12px 0; padding: 4px 12px; background: #fff; }
+"""
+
+
+def _node_html(node: Node) -> str:
+    level = min(node["level"], 6)
+    # The heading line is rendered from the title; the rest is the body
+    body = node["markdown"].split("\n", 1)[1] if "\n" in node["markdown"] else ""
+    children = "".join(_node_html(child) for child in node["children"])
+    return (f'<section id="{node["id"]}"><h{level}>{_runs_html(parse_inline(node["title"]))}</h{level}>'
+            f'{blocks_html(markdown_to_blocks(body))}{children}</section>')
+
+
+def _toc(nodes: List[Node], depth: int = 2) -> str:
+    items = []
+    for node in nodes:
+        if node["level"] > depth:
+            continue
+        sub = _toc(node["children"], depth) if node["children"] else ""
+        items.append(f'<li><a href="#{node["id"]}">{escape(node["title"])}</a>{sub}</li>')
+    return f"<ul>{''.join(items)}</ul>" if items else ""
+
+
+def render_html(doc: Dict) -> str:
+    """A standalone page: header, table of contents and the sections"""
+    sections = doc["sections"]
+    # The document's h1 becomes the page header
+    if sections and sections[0]["level"] == 1:
+        top = sections[0]
+        lead = top["markdown"].split("\n", 1)[1] if "\n" in top["markdown"] else ""
+        sections = top["children"] + sections[1:]
+    else:
+        lead = ""
+    title = escape(doc["title"] or "Project Snapshot")
+    generated = escape(doc.get("generated", "")[:16].replace("T", " "))
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n"
+        f"<title>{title}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n"
+        f"<header><h1>{title}</h1><p>Generated {generated}</p></header>\n"
+        f"<main><nav>{_toc(sections)}</nav>\n<article>{blocks_html(markdown_to_blocks(doc['intro'] + lead))}"
+        + "".join(_node_html(node) for node in sections)
+        + "</article></main>\n</body>\n</html>\n"
+    )
+
+
+RENDERERS: Dict[str, Callable[[Dict], str]] = {
+    "md": render_markdown,
+    "json": render_json,
+    "html": render_html,
+}
+
+
+def render_all(doc: Dict) -> Dict[str, str]:
+    """Every format, rendered concurrently from the same tree"""
+    with ThreadPoolExecutor(max_workers=len(RENDERERS), thread_name_prefix="snapshot-format") as pool:
+        futures = {fmt: pool.submit(render, doc) for fmt, render in RENDERERS.items()}
+        return {fmt: future.result() for fmt, future in futures.items()}
@@ -4,37 +4,13 @@ Pre-work sync script - Run this before starting your work session
 Pulls latest content from Notion and prepares your workspace
 """
 
-import os
 import sys
-import time
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
-def run_command(cmd, description):
-    """Run a command and show status"""
-    print(f"\n{'='*60}")
-    print(f"{description}")
-    print(f"{'='*60}")
-
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent.parent
-        )
-
-        if result.returncode == 0:
-            print(result.stdout)
-            return True
-        else:
-            print(f"[ERROR] Command failed: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        return False
+from chunk_store import get_chunk_store
+from pipeline import PipelineContext, start_work_pipeline
+from sync_policy import SyncPolicy
 
 def main():
     print("""
@@ -46,62 +22,38 @@ def main():
 
     print(f"\nStarting sync at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
+    # --on-conflict/--yes let the whole run go without prompts
+    policy, args = SyncPolicy.from_argv(sys.argv[1:])
+
     # Check if user wants full sync or quick sync
-    if len(sys.argv) > 1 and sys.argv[1] == "--quick":
+    if args and args[0] == "--quick":
         quick_mode = True
         print("[QUICK MODE] Skipping README pull, only syncing tasks\n")
     else:
         quick_mode = False
         print("[FULL MODE] Syncing everything from Notion\n")
 
-    success = True
-
-    # Step 1: Pull latest database content (Tasks, Notes, etc.)
-    if run_command(
-        "python scripts/notion.py sync",
-        "STEP 1: Pulling latest Tasks, Notes, and Projects from Notion"
-    ):
-        print("[OK] Database sync complete")
-    else:
-        print("[WARN] Database sync failed - continuing anyway")
-        success = False
-
-    time.sleep(1)
-
-    # Step 2: Generate task files for each project
-    if run_command(
-        "python scripts/generate_tasks_md.py",
-        "STEP 2: Generating tasks.md files for each project"
-    ):
-        print("[OK] Task files generated")
-    else:
-        print("[WARN] Task generation failed - continuing anyway")
-        success = False
-
-    time.sleep(1)
-
-    # Step 3: Pull latest README content from Notion (unless quick mode)
+    # Ask up front so the pipeline can run its steps without stopping
+    pull_readmes = False
     if not quick_mode:
-        print("\n" + "="*60)
-        print("STEP 3: Pulling README content from Notion pages")
-        print("="*60)
-        print("\n[INFO] This will check for conflicts and create backups")
-        print("[INFO] You'll be prompted if there are recent local changes\n")
-
-        response = input("Pull all README files from Notion? (y/n/skip): ").lower()
-
-        if response == 'y':
-            if run_command(
-                "python scripts/pull_from_notion.py",
-                "Pulling README content from Notion"
-            ):
-                print("[OK] README files synced from Notion")
-            else:
-                print("[WARN] Some README files may not have synced")
-                success = False
+        print("[INFO] README pulls check for conflicts and create backups")
+        if policy.interactive:
+            print("[INFO] You'll be prompted if there are recent local changes\n")
         else:
+            print(f"[INFO] Conflicts resolved by policy: {policy.on_conflict}\n")
+        if policy.interactive or policy.assume_yes:
+            pull_readmes = policy.confirm("Pull all README files from Notion? (y/n/skip): ")
+        else:
+            # The conflict policy only governs pulls, so choosing one approves this pull
+            print(f"Pull all README files from Notion? y (--on-conflict={policy.on_conflict})")
+            pull_readmes = True
+        if not pull_readmes:
             print("[SKIP] Skipping README pull")
 
+    # Database sync -> tasks.md, with the README pull running alongside
+    pipeline = start_work_pipeline(pull=pull_readmes, context=PipelineContext(policy=policy))
+    success = pipeline.run()
+
     # Step 4: Show current status
     print("\n" + "="*60)
     print("WORKSPACE STATUS")
@@ -109,8 +61,10 @@ def main():
 
     # Count tasks
     try:
-        from generate_tasks_md import TaskGenerator
-        generator = TaskGenerator()
+        generator = pipeline.context.cache.get("task_generator")
+        if generator is None:
+            from generate_tasks_md import TaskGenerator
+            generator = TaskGenerator()
         high_priority = sum(1 for t in generator.tasks
                           if generator.extract_property_text(
                               t.get("properties", {}), "Priority"
@@ -128,12 +82,12 @@ def main():
     backup_dir = Path(__file__).parent.parent / "backups"
     if backup_dir.exists():
         recent_backups = []
+        store = get_chunk_store()
         for project_dir in backup_dir.iterdir():
             if project_dir.is_dir():
-                backups = list(project_dir.glob("README_*.md"))
+                backups = store.listing(project_dir, "README_*.md")
                 if backups:
-                    latest = max(backups, key=lambda x: x.stat().st_mtime)
-                    recent_backups.append((project_dir.name, latest))
+                    recent_backups.append((project_dir.name, store.on_disk(backups[-1])))
 
         if recent_backups:
             print(f"\nRecent Backups:")
@@ -141,6 +95,8 @@ def main():
                 mod_time = datetime.fromtimestamp(backup.stat().st_mtime)
                 print(f"  {project}: {mod_time.strftime('%Y-%m-%d %H:%M')}")
 
+    pipeline.report()
+
     # Final status
     print("\n" + "="*60)
     if success:
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Sync Policy - Decide conflicts and confirmations without prompting
+Lets scheduled jobs run the sync scripts headless and records every
+conflict decision in a JSON report instead of asking on the terminal
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from notion_client import load_env
+
+BASE_DIR = Path(__file__).parent.parent
+REPORT_DIR = BASE_DIR / "cache" / "conflict_reports"
+
+CONFLICT_POLICIES = ("prompt", "backup-and-overwrite", "skip", "merge")
+
+
+class SyncPolicy:
+    """
+    How to handle confirmations and conflicts.
+
+    on_conflict "prompt" keeps the interactive behaviour. --yes answers every
+    confirmation with yes and, unless a policy is given, resolves conflicts
+    the way answering "y" would: back up the README and overwrite it.
+    Defaults can also come from SYNC_ON_CONFLICT / SYNC_ASSUME_YES in .env.
+    """
+
+    def __init__(self, on_conflict: Optional[str] = None, assume_yes: bool = False,
+                 report_dir: Path = REPORT_DIR):
+        load_env()
+        if assume_yes is False:
+            assume_yes = os.getenv("SYNC_ASSUME_YES", "").lower() in ("1", "true", "yes")
+        on_conflict = on_conflict or os.getenv("SYNC_ON_CONFLICT") or (
+            "backup-and-overwrite" if assume_yes else "prompt")
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy '{on_conflict}' "
+                             f"(choose from {', '.join(CONFLICT_POLICIES)})")
+
+        self.on_conflict = on_conflict
+        self.assume_yes = assume_yes
+        self.report_dir = report_dir
+        self.decisions: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_argv(cls, argv: List[str]) -> Tuple["SyncPolicy", List[str]]:
+        """Pull --on-conflict/--yes out of argv; returns the policy and the other args"""
+        on_conflict = None
+        assume_yes = False
+        rest = []
+        args = iter(argv)
+        for arg in args:
+            if arg in ("--yes", "-y"):
+                assume_yes = True
+            elif arg == "--on-conflict":
+                on_conflict = next(args, None)
+            elif arg.startswith("--on-conflict="):
+                on_conflict = arg.split("=", 1)[1]
+            else:
+                rest.append(arg)
+        return cls(on_conflict, assume_yes), rest
+
+    @property
+    def interactive(self) -> bool:
+        return self.on_conflict == "prompt" and not self.assume_yes
+
+    def confirm(self, question: str) -> bool:
+        """Ask a yes/no question, or answer it from the policy when headless"""
+        if self.assume_yes:
+            print(f"{question} y (--yes)")
+            return True
+        if not self.interactive:
+            # A conflict policy alone doesn't approve bulk operations
+            print(f"{question} n (non-interactive, pass --yes to approve)")
+            return False
+        return input(question).lower() == 'y'
+
+    def record(self, project: str, path: Path, reason: str, decision: str, **details):
+        """Add one conflict decision to the report"""
+        entry = {
+            "time": datetime.now().isoformat(),
+            "project": project,
+            "path": str(path),
+            "reason": reason,
+            "policy": self.on_conflict,
+            "decision": decision
+        }
+        entry.update({k: str(v) if isinstance(v, Path) else v for k, v in details.items()})
+        with self._lock:
+            self.decisions.append(entry)
+
+    def save_report(self) -> Optional[Path]:
+        """Write the decisions made so far; returns the report path"""
+        with self._lock:
+            if not self.decisions:
+                return None
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            report_path = self.report_dir / f"conflicts_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+            with open(report_path, 'w') as f:
+                json.dump({
+                    "generated": datetime.now().isoformat(),
+                    "policy": self.on_conflict,
+                    "assume_yes": self.assume_yes,
+                    "decisions": self.decisions
+                }, f, indent=2)
+
+        print(f"[INFO] Conflict report: {report_path}")
+        return report_path
+
+
+def _hunks(base: List[str], other: List[str]) -> List[Tuple[int, int, List[str]]]:
+    matcher = SequenceMatcher(None, base, other, autojunk=False)
+    return [(i1, i2, other[j1:j2]) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def _apply(base: List[str], hunks, lo: int, hi: int) -> List[str]:
+    """One side's version of base[lo:hi] given its hunks inside that range"""
+    out = []
+    pos = lo
+    for i1, i2, lines in hunks:
+        out.extend(base[pos:i1])
+        out.extend(lines)
+        pos = i2
+    out.extend(base[pos:hi])
+    return out
+
+
+def merge_text(base: str, local: str, remote: str) -> Tuple[str, int]:
+    """
+    Line-based three-way merge.
+
+    Changes on one side only are taken as-is; overlapping changes that differ
+    are wrapped in conflict markers. Returns the merged text and the number
+    of conflicts.
+    """
+    base_lines = base.splitlines(keepends=True)
+    ours = _hunks(base_lines, local.splitlines(keepends=True))
+    theirs = _hunks(base_lines, remote.splitlines(keepends=True))
+
+    merged = []
+    conflicts = 0
+    pos = 0
+    a = b = 0
+
+    while a < len(ours) or b < len(theirs):
+        # Start a cluster at the earliest hunk and absorb anything touching it
+        if b >= len(theirs) or (a < len(ours) and ours[a][0] <= theirs[b][0]):
+            lo, hi = ours[a][0], ours[a][1]
+        else:
+            lo, hi = theirs[b][0], theirs[b][1]
+        ours_in, theirs_in = [], []
+        while True:
+            if a < len(ours) and ours[a][0] <= hi:
+                ours_in.append(ours[a])
+                hi = max(hi, ours[a][1])
+                a += 1
+            elif b < len(theirs) and theirs[b][0] <= hi:
+                theirs_in.append(theirs[b])
+                hi = max(hi, theirs[b][1])
+                b += 1
+            else:
+                break
+
+        merged.extend(base_lines[pos:lo])
+        local_side = _apply(base_lines, ours_in, lo, hi)
+        remote_side = _apply(base_lines, theirs_in, lo, hi)
+
+        if not theirs_in or local_side == remote_side:
+            merged.extend(local_side)
+        elif not ours_in:
+            merged.extend(remote_side)
+        else:
+            conflicts += 1
+            merged.append("<<<<<<< local\n")
+            merged.extend(line if line.endswith("\n") else line + "\n" for line in local_side)
+            merged.append("=======\n")
+            merged.extend(line if line.endswith("\n") else line + "\n" for line in remote_side)
+            merged.append(">>>>>>> notion\n")
+        pos = hi
+
+    merged.extend(base_lines[pos:])
+    return "".join(merged), conflicts
@@ -6,17 +6,18 @@ Converts markdown to Notion blocks and pushes to configured synced blocks
 
 import os
 import json
-import time
-import re
 from pathlib import Path
 from datetime import datetime
-import requests
 from dotenv import load_dotenv
 
+from markdown_to_notion import markdown_to_blocks, parse_inline
+from notion_chunking import append_blocks
+from notion_client import NotionClient
+
 load_dotenv()
 
 class ReadmeToNotionSync:
-    def __init__(self):
+    def __init__(self, client=None):
         self.api_key = os.getenv("NOTION_API")
         self.base_dir = Path(__file__).parent.parent
         self.docs_dir = self.base_dir / "Docs"
@@ -27,6 +28,7 @@ class ReadmeToNotionSync:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.client = client or NotionClient(self.api_key)
 
         # Load synced block mappings
         self.load_mappings()
@@ -42,211 +44,21 @@ class ReadmeToNotionSync:
         with open(mapping_file, 'r') as f:
             self.mappings = json.load(f)
 
-    def markdown_to_notion_blocks(self, markdown_text, max_blocks=90):
+    def markdown_to_notion_blocks(self, markdown_text):
         """Convert markdown to Notion blocks format"""
-        blocks = []
-        lines = markdown_text.split('\n')
-
-        i = 0
-        while i < len(lines) and len(blocks) < max_blocks:
-            line = lines[i].rstrip()
-
-            # Skip empty lines at the start
-            if not line and len(blocks) == 0:
-                i += 1
-                continue
-
-            # Headers
-            if line.startswith('### '):
-                blocks.append({
-                    "type": "heading_3",
-                    "heading_3": {
-                        "rich_text": [{"type": "text", "text": {"content": line[4:]}}]
-                    }
-                })
-            elif line.startswith('## '):
-                blocks.append({
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": line[3:]}}]
-                    }
-                })
-            elif line.startswith('# '):
-                blocks.append({
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"type": "text", "text": {"content": line[2:]}}]
-                    }
-                })
-
-            # Bullet points
-            elif line.startswith('- '):
-                # Collect all consecutive bullet items
-                bullet_items = []
-                while i < len(lines) and lines[i].startswith('- '):
-                    bullet_items.append(lines[i][2:].strip())
-                    i += 1
-                i -= 1  # Back up one since we'll increment at the end
-
-                # Create bulleted list items
-                for item in bullet_items[:min(10, max_blocks - len(blocks))]:
-                    blocks.append({
-                        "type": "bulleted_list_item",
-                        "bulleted_list_item": {
-                            "rich_text": [{"type": "text", "text": {"content": item}}]
-                        }
-                    })
-
-            # Numbered lists
-            elif re.match(r'^\d+\. ', line):
-                # Collect all consecutive numbered items
-                numbered_items = []
-                while i < len(lines) and re.match(r'^\d+\. ', lines[i]):
-                    content = re.sub(r'^\d+\. ', '', lines[i]).strip()
-                    numbered_items.append(content)
-                    i += 1
-                i -= 1
-
-                # Create numbered list items
-                for item in numbered_items[:min(10, max_blocks - len(blocks))]:
-                    blocks.append({
-                        "type": "numbered_list_item",
-                        "numbered_list_item": {
-                            "rich_text": [{"type": "text", "text": {"content": item}}]
-                        }
-                    })
-
-            # Code blocks
-            elif line.startswith('```'):
-                i += 1
-                code_lines = []
-                language = line[3:].strip() or "plain text"
-
-                while i < len(lines) and not lines[i].startswith('```'):
-                    code_lines.append(lines[i])
-                    i += 1
-
-                if code_lines and len(blocks) < max_blocks:
-                    code_text = '\n'.join(code_lines[:50])  # Limit code lines
-                    blocks.append({
-                        "type": "code",
-                        "code": {
-                            "rich_text": [{"type": "text", "text": {"content": code_text}}],
-                            "language": language if language in ["python", "javascript", "bash", "json", "yaml", "html", "css"] else "plain text"
-                        }
-                    })
-
-            # Blockquotes
-            elif line.startswith('> '):
-                quote_text = line[2:]
-                blocks.append({
-                    "type": "quote",
-                    "quote": {
-                        "rich_text": [{"type": "text", "text": {"content": quote_text}}]
-                    }
-                })
-
-            # Horizontal rule
-            elif line in ['---', '***', '___']:
-                blocks.append({"type": "divider", "divider": {}})
-
-            # Regular paragraph
-            elif line:
-                # Parse for bold and italic
-                text_parts = self.parse_markdown_formatting(line)
-                blocks.append({
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": text_parts
-                    }
-                })
-
-            # Empty line = paragraph break
-            else:
-                if blocks and blocks[-1]["type"] != "paragraph":
-                    blocks.append({
-                        "type": "paragraph",
-                        "paragraph": {"rich_text": [{"type": "text", "text": {"content": " "}}]}
-                    })
-
-            i += 1
-
-        return blocks
+        return markdown_to_blocks(markdown_text)
 
     def parse_markdown_formatting(self, text):
-        """Parse markdown bold and italic formatting"""
-        parts = []
-        current = ""
-        i = 0
-
-        while i < len(text):
-            # Bold
-            if text[i:i+2] == '**':
-                if current:
-                    parts.append({"type": "text", "text": {"content": current}})
-                    current = ""
-                i += 2
-                end = text.find('**', i)
-                if end != -1:
-                    parts.append({
-                        "type": "text",
-                        "text": {"content": text[i:end]},
-                        "annotations": {"bold": True}
-                    })
-                    i = end + 2
-                else:
-                    current += '**'
-            # Italic
-            elif text[i] == '*' and (i == 0 or text[i-1] != '*') and (i+1 < len(text) and text[i+1] != '*'):
-                if current:
-                    parts.append({"type": "text", "text": {"content": current}})
-                    current = ""
-                i += 1
-                end = text.find('*', i)
-                if end != -1:
-                    parts.append({
-                        "type": "text",
-                        "text": {"content": text[i:end]},
-                        "annotations": {"italic": True}
-                    })
-                    i = end + 1
-                else:
-                    current += '*'
-            # Code
-            elif text[i] == '`':
-                if current:
-                    parts.append({"type": "text", "text": {"content": current}})
-                    current = ""
-                i += 1
-                end = text.find('`', i)
-                if end != -1:
-                    parts.append({
-                        "type": "text",
-                        "text": {"content": text[i:end]},
-                        "annotations": {"code": True}
-                    })
-                    i = end + 1
-                else:
-                    current += '`'
-            else:
-                current += text[i]
-                i += 1
-
-        if current:
-            parts.append({"type": "text", "text": {"content": current}})
-
-        return parts if parts else [{"type": "text", "text": {"content": text}}]
+        """Parse markdown bold, italic, code and link formatting"""
+        return parse_inline(text) or [{"type": "text", "text": {"content": text}}]
 
     def update_synced_block(self, block_id, new_blocks):
         """Update a synced block with new content"""
 
-        # First, get and delete existing children
-        children_url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-        response = requests.get(children_url, headers=self.headers)
-
-        if response.status_code == 200:
-            children = response.json().get("results", [])
+        # First, get and delete existing children (all pages of them)
+        children = self.client.get_block_children(block_id)
 
+        if children:
             # Delete existing children (except the first heading if it's our sync marker)
             for child in children:
                 if child.get("type") == "heading_2":
@@ -255,9 +67,7 @@ class ReadmeToNotionSync:
                     if "[SYNC]" in text or "Documentation" in text:
                         continue  # Keep the sync marker
 
-                delete_url = f"https://api.notion.com/v1/blocks/{child['id']}"
-                requests.delete(delete_url, headers=self.headers)
-                time.sleep(0.1)
+                self.client.delete(f"blocks/{child['id']}")
 
         # Add new content with a sync timestamp
         all_blocks = [
@@ -275,19 +85,10 @@ class ReadmeToNotionSync:
             {"type": "divider", "divider": {}}
         ] + new_blocks
 
-        # Split into batches if needed (Notion limit is 100 blocks)
-        batch_size = 100
-        for i in range(0, len(all_blocks), batch_size):
-            batch = all_blocks[i:i+batch_size]
-            data = {"children": batch}
-
-            response = requests.patch(children_url, headers=self.headers, json=data)
-
-            if response.status_code != 200:
-                print(f"    Error updating block: {response.status_code}")
-                return False
-
-            time.sleep(0.35)  # Rate limiting
+        # Pack into as few requests as Notion's children and nesting limits allow
+        if append_blocks(self.client, block_id, all_blocks) is None:
+            print("    Error updating block")
+            return False
 
         return True
 
@@ -345,7 +146,6 @@ class ReadmeToNotionSync:
         for folder_name in self.mappings.keys():
             if self.sync_project(folder_name):
                 success_count += 1
-            time.sleep(0.5)  # Rate limiting between projects
 
         print("\n" + "="*60)
         print(f"SYNC COMPLETE: {success_count}/{len(self.mappings)} projects synced")
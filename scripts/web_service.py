@@ -4,30 +4,322 @@ Web Service for Notion Button Integration
 Generates project snapshot on webhook trigger
 """
 
-from flask import Flask, send_file, jsonify, request, make_response
-from flask_cors import CORS
-import subprocess
 from pathlib import Path
 import os
 import json
+import time
+import threading
 from datetime import datetime
 import hashlib
 import hmac
 
-app = Flask(__name__)
-CORS(app)  # Allow cross-origin requests
+from metrics import REGISTRY, Counter, Gauge, Histogram
+from snapshot_encoding import negotiate, variant_path
 
 # Configuration
 BASE_DIR = Path(__file__).parent.parent
 SNAPSHOTS_DIR = BASE_DIR / "snapshots"
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # Optional webhook verification
+CACHE_DIR = BASE_DIR / "cache"
+DAEMON_STATE_FILE = CACHE_DIR / "daemon_state.json"
 
-# Ensure snapshots directory exists
-SNAPSHOTS_DIR.mkdir(exist_ok=True)
+# Metrics (GET /metrics)
+HTTP_REQUESTS = Counter("http_requests_total", "Web service responses by route, method and status")
+SNAPSHOT_REQUESTS = Counter("snapshot_requests_total",
+                            "Snapshot requests by cache result (hit, shared, miss)")
+SNAPSHOT_BUILD = Histogram("snapshot_build_seconds", "Time to render and save a snapshot",
+                           buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+
+class SnapshotCache:
+    """
+    The latest rendered snapshot, reused while its inputs are unchanged.
+
+    Builds are single-flight: concurrent requests for the same inputs wait
+    on the one build in progress and all get its result (or its error).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._building = {}
+        self.entry = None
+
+    def get(self, pull=False, progress=None):
+        """Return (entry, hit); renders in-process when the inputs changed"""
+        from concurrent.futures import Future
+        from compile_project_snapshot import STAGES, ProjectSnapshot, inputs_hash
+        if pull:
+            ProjectSnapshot(progress).pull_latest_data()
+
+        etag = inputs_hash()
+        with self._lock:
+            if self.entry and self.entry['etag'] == etag:
+                SNAPSHOT_REQUESTS.inc(result='hit')
+                if progress:
+                    progress(STAGES, STAGES, "Inputs unchanged, reusing the last snapshot")
+                return self.entry, True
+            build = self._building.get(etag)
+            leader = build is None
+            if leader:
+                build = self._building[etag] = Future()
+
+        if not leader:
+            SNAPSHOT_REQUESTS.inc(result='shared')
+            if progress:
+                progress(0, STAGES, "Waiting for the same snapshot already being built...")
+            return build.result(), True
+
+        SNAPSHOT_REQUESTS.inc(result='miss')
+        try:
+            entry = self._build(etag, progress)
+            with self._lock:
+                self.entry = entry
+            build.set_result(entry)
+            return entry, False
+        except Exception as e:
+            build.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._building[etag]
+
+    def _build(self, etag, progress=None):
+        from compile_project_snapshot import ProjectSnapshot
+        started = time.perf_counter()
+        snapshot = ProjectSnapshot(progress)
+        content = snapshot.render(pull_latest=False)
+        entry = {
+            'etag': etag,
+            'content': content,
+            'path': snapshot.save(content, input_hash=etag),
+            'generated': datetime.now().isoformat()
+        }
+        SNAPSHOT_BUILD.observe(time.perf_counter() - started)
+        return entry
+
+snapshot_cache = SnapshotCache()
+
+def snapshot_summary(entry):
+    return {
+        'filename': entry['path'].name,
+        'etag': entry['etag'],
+        'generated': entry['generated'],
+        'size': len(entry['content']),
+        'download_url': f"/download/{entry['path'].name}"
+    }
+
+def run_snapshot_job(job, report):
+    """Job worker: build (or reuse) a snapshot, reporting each stage"""
+    entry, hit = snapshot_cache.get(pull=job.params.get('pull', False), progress=report)
+    return dict(snapshot_summary(entry), cached=hit)
+
+_jobs = None
+_jobs_lock = threading.Lock()
+
+def get_jobs():
+    """The snapshot job queue, started on first use"""
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            from snapshot_jobs import JobQueue
+            _jobs = JobQueue(run_snapshot_job, max_workers=int(os.getenv("SNAPSHOT_WORKERS", "2")))
+        return _jobs
+
+def cache_hit_ratio():
+    total = SNAPSHOT_REQUESTS.total()
+    served = SNAPSHOT_REQUESTS.get(result='hit') + SNAPSHOT_REQUESTS.get(result='shared')
+    return [({}, served / total if total else 0)]
+
+def last_sync_ages():
+    """Seconds since each database's newest cache/content file"""
+    try:
+        with open(CACHE_DIR / "notion_config.json", 'r') as f:
+            categories = list(json.load(f).get('databases', {}))
+    except (OSError, ValueError):
+        return []
+
+    samples = []
+    for category in categories:
+        files = sorted((CACHE_DIR / "content").glob(f"{category}_*.json"))
+        if not files:
+            continue
+        # Names carry the sync time; mtimes don't survive a checkout
+        stamp = files[-1].stem[len(category) + 1:]
+        try:
+            synced = datetime.strptime(stamp, "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            synced = files[-1].stat().st_mtime
+        samples.append(({'database': category}, time.time() - synced))
+    return samples
+
+def notion_webhook_secret():
+    """
+    Notion's verification_token for the webhook subscription (signs
+    X-Notion-Signature). Read when a request comes in, with .env loaded,
+    so it is the same secret notion_webhooks.py replay signs with.
+    """
+    from notion_client import load_env
+    load_env()
+    return os.getenv("NOTION_WEBHOOK_SECRET", "")
+
+def webhook_queue_depth():
+    from notion_webhooks import get_refresher
+    return [({}, get_refresher().depth())]
+
+def daemon_samples(field):
+    """Collector for one value from the sync daemon's state file"""
+    def collect():
+        try:
+            with open(DAEMON_STATE_FILE, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            # No readable state: the daemon is down, other fields are unknown
+            return [({}, 0)] if field == 'up' else []
+
+        if field == 'up':
+            try:
+                os.kill(state['pid'], 0)
+                return [({}, 1)]
+            except (OSError, KeyError, TypeError):
+                return [({}, 0)]
+        if field == 'last_poll_age':
+            if not state.get('last_poll'):
+                return []
+            return [({}, time.time() - datetime.fromisoformat(state['last_poll']).timestamp())]
+        return [({'type': name}, value) for name, value in state.get(field, {}).items()]
+    return collect
+
+Gauge("snapshot_cache_hit_ratio", "Share of snapshot requests served without a new build", collect=cache_hit_ratio)
+Gauge("snapshot_jobs_queue_depth", "Snapshot jobs queued or running", collect=lambda: [({}, get_jobs().depth())])
+Gauge("notion_last_sync_age_seconds", "Seconds since each database was last synced", collect=last_sync_ages)
+Gauge("notion_webhook_refresh_queue_depth", "Webhook refresh targets waiting to run",
+      collect=webhook_queue_depth)
+Gauge("notion_daemon_up", "1 if the sync daemon in daemon_state.json is running", collect=daemon_samples('up'))
+Gauge("notion_daemon_last_poll_age_seconds", "Seconds since the sync daemon last polled Notion",
+      collect=daemon_samples('last_poll_age'))
+Gauge("notion_daemon_events", "Sync daemon totals since it started (pushes, pulls, polls, ...)",
+      collect=daemon_samples('stats'))
+Gauge("notion_daemon_api_calls", "Sync daemon Notion API requests, 429s and retries since it started",
+      collect=daemon_samples('notion_api'))
+
+def requested_format():
+    """?format=md|json|html (markdown by default); None if it isn't one of those"""
+    from flask import request
+    from snapshot_tree import FORMATS
+    fmt = request.args.get('format', 'md').lower()
+    fmt = 'md' if fmt == 'markdown' else fmt
+    return fmt if fmt in FORMATS else None
+
+def format_etag(etag, fmt='md'):
+    return etag if fmt == 'md' else f"{etag}-{fmt}"
+
+def cached_snapshot(fmt='md'):
+    """Snapshot entry for this request, or a 304 response if the client already has it"""
+    from flask import request, make_response
+    entry, hit = snapshot_cache.get()
+    print(f"[{datetime.now()}] Snapshot {'cache hit' if hit else 'generated'}: {entry['path'].name}")
+
+    etag = format_etag(entry['etag'], fmt)
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return entry, response
+    return entry, None
+
+def snapshot_headers(response, entry, fmt='md'):
+    response.set_etag(format_etag(entry['etag'], fmt))
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate
+    response.headers['X-Snapshot-Generated'] = entry['generated']
+    return response
+
+def send_format(entry, fmt, download_name=None, etag=None):
+    """
+    Send a catalogued snapshot as JSON or HTML.
+
+    The newest snapshot has these as files next to its markdown. Older ones
+    are rendered from their markdown's section tree, which is quick and
+    never recompiles anything; a matching If-None-Match skips even that.
+    """
+    import io
+    from flask import make_response, request, send_file
+    from chunk_store import get_chunk_store
+    from snapshot_tree import FORMATS, RENDERERS, build_tree
+    suffix, mimetype = FORMATS[fmt]
+    markdown_path = SNAPSHOTS_DIR / entry['filename']
+    etag = etag or f"{entry['etag']}-{fmt}"
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    source = markdown_path.with_suffix(suffix)
+    if not source.exists():
+        markdown = get_chunk_store().read_text(markdown_path)
+        source = io.BytesIO(RENDERERS[fmt](build_tree(markdown, generated=entry['created'])).encode('utf-8'))
+    return send_file(
+        source,
+        as_attachment=fmt != 'html',
+        download_name=download_name or markdown_path.with_suffix(suffix).name,
+        mimetype=mimetype,
+        etag=etag,
+        conditional=True
+    )
+
+def send_snapshot(entry, download_name=None, etag=None, fmt='md'):
+    """
+    Send a catalogued snapshot file (as markdown unless fmt says otherwise).
+
+    Uses the precompressed .br/.gz variant the client accepts. GET requests
+    also get Range and If-None-Match/If-Modified-Since handling from
+    send_file; each encoding has its own ETag. Pass etag to override it.
+    Snapshots packed into the chunk store are reassembled in memory.
+    """
+    import io
+    from flask import request, send_file
+    from chunk_store import get_chunk_store
+    if fmt != 'md':
+        return send_format(entry, fmt, download_name, etag)
+    path = SNAPSHOTS_DIR / entry['filename']
+    encoding = negotiate(request.accept_encodings, entry.get('encodings', {}))
+    content_etag = entry.get('etag')
+    if not etag and content_etag:
+        etag = f"{content_etag}-{encoding or 'identity'}"
+
+    source = variant_path(path, encoding) if encoding else path
+    if not encoding and not path.exists():
+        source = io.BytesIO(get_chunk_store().read(path))
+
+    try:
+        response = send_file(
+            source,
+            as_attachment=True,
+            download_name=download_name or entry['filename'],
+            mimetype='text/markdown',
+            etag=etag or True,
+            conditional=True
+        )
+    except FileNotFoundError:
+        if not encoding:
+            raise
+        # The identity body needs its own ETag, not the compressed variant's
+        return send_snapshot(dict(entry, encodings={}), download_name, None)
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def format_urls(filename):
+    """Download URL of a snapshot in each format"""
+    from snapshot_tree import FORMATS
+    stem = Path(filename).stem
+    return {fmt: f"/download/{stem}{suffix}" for fmt, (suffix, _) in FORMATS.items()}
 
-@app.route('/generate-snapshot', methods=['POST'])
 def generate_snapshot():
-    """Generate project snapshot on POST request"""
+    """Generate project snapshot on POST request (?format=json|html for the other formats)"""
+    from flask import jsonify, request
+    from werkzeug.exceptions import HTTPException
+    from snapshot_catalog import get_catalog
+    from snapshot_tree import FORMATS
     try:
         # Optional: Verify webhook signature if secret is set
         if WEBHOOK_SECRET:
@@ -35,140 +327,370 @@ def generate_snapshot():
             if not verify_webhook_signature(request.data, signature):
                 return jsonify({'error': 'Invalid signature'}), 401
 
-        print(f"[{datetime.now()}] Generating snapshot...")
+        fmt = requested_format()
+        if not fmt:
+            return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
 
-        # Run the snapshot script
-        result = subprocess.run(
-            ['python', 'scripts/compile_project_snapshot.py', '--no-pull'],
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR
-        )
-
-        if result.returncode != 0:
-            print(f"Error: {result.stderr}")
-            return jsonify({'error': 'Failed to generate snapshot', 'details': result.stderr}), 500
-
-        # Find the latest snapshot
-        files = sorted(SNAPSHOTS_DIR.glob('project_snapshot_*.md'),
-                      key=lambda x: x.stat().st_mtime,
-                      reverse=True)
-
-        if not files:
-            return jsonify({'error': 'No snapshot file found'}), 500
-
-        latest_file = files[0]
-        print(f"[{datetime.now()}] Snapshot generated: {latest_file.name}")
+        entry, not_modified = cached_snapshot(fmt)
+        if not_modified:
+            return not_modified
 
         # Return file as download
-        response = make_response(send_file(
-            latest_file,
-            as_attachment=True,
-            download_name=f"project_snapshot_{datetime.now().strftime('%Y%m%d')}.md",
-            mimetype='text/markdown'
-        ))
+        response = send_snapshot(
+            get_catalog().get(entry['path'].name),
+            download_name=f"project_snapshot_{datetime.now().strftime('%Y%m%d')}{FORMATS[fmt][0]}",
+            etag=format_etag(entry['etag'], fmt),
+            fmt=fmt
+        )
 
         # Add headers for better compatibility
         response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['X-Snapshot-Generated'] = datetime.now().isoformat()
 
-        return response
+        return snapshot_headers(response, entry, fmt)
 
+    except HTTPException:
+        raise  # e.g. 416 for an unsatisfiable Range, with its Content-Range
     except Exception as e:
         print(f"Exception: {str(e)}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/generate-snapshot-json', methods=['POST'])
 def generate_snapshot_json():
-    """Generate snapshot and return as JSON (alternative to file download)"""
-    try:
-        print(f"[{datetime.now()}] Generating snapshot (JSON response)...")
-
-        # Run the snapshot script
-        result = subprocess.run(
-            ['python', 'scripts/compile_project_snapshot.py', '--no-pull'],
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR
-        )
-
-        if result.returncode != 0:
-            return jsonify({'error': 'Failed to generate snapshot', 'details': result.stderr}), 500
-
-        # Find and read the latest snapshot
-        files = sorted(SNAPSHOTS_DIR.glob('project_snapshot_*.md'),
-                      key=lambda x: x.stat().st_mtime,
-                      reverse=True)
-
-        if not files:
-            return jsonify({'error': 'No snapshot file found'}), 500
-
-        latest_file = files[0]
+    """
+    Generate snapshot and return as JSON (alternative to file download).
 
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+    ?content=false leaves the markdown out; fetch it from download_url,
+    which is compressed and range-capable.
+    """
+    from flask import jsonify, request
+    try:
+        entry, not_modified = cached_snapshot()
+        if not_modified:
+            return not_modified
 
-        return jsonify({
+        content = entry['content']
+        payload = {
             'success': True,
-            'filename': latest_file.name,
-            'generated': datetime.now().isoformat(),
-            'content': content,
+            'filename': entry['path'].name,
+            'generated': entry['generated'],
             'size': len(content),
-            'download_url': f"/download/{latest_file.name}"
-        })
+            'download_url': f"/download/{entry['path'].name}",
+            'formats': format_urls(entry['path'].name)
+        }
+        if request.args.get('content', 'true').lower() not in ('0', 'false', 'no'):
+            payload['content'] = content
+        response = jsonify(payload)
+        return snapshot_headers(response, entry)
 
     except Exception as e:
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/download/<filename>', methods=['GET'])
-def download_snapshot(filename):
-    """Download a specific snapshot file"""
+def job_payload(job):
+    payload = job.to_dict()
+    payload['status_url'] = f"/jobs/{job.id}"
+    payload['events_url'] = f"/jobs/{job.id}/events"
+    if job.status == 'done':
+        payload['artifact_url'] = f"/jobs/{job.id}/artifact"
+    return payload
+
+def submit_snapshot_job():
+    """Queue a snapshot build; returns immediately with the job ID"""
+    from flask import jsonify, request
+    if WEBHOOK_SECRET:
+        signature = request.headers.get('X-Webhook-Signature', '')
+        if not verify_webhook_signature(request.data, signature):
+            return jsonify({'error': 'Invalid signature'}), 401
+
+    body = request.get_json(silent=True) or {}
+    job = get_jobs().submit(pull=bool(body.get('pull', False)))
+    print(f"[{datetime.now()}] Queued snapshot job {job.id}")
+
+    response = jsonify(job_payload(job))
+    response.status_code = 202
+    response.headers['Location'] = f"/jobs/{job.id}"
+    return response
+
+def job_status(job_id):
+    """Current state of a snapshot job"""
+    from flask import jsonify
+    job = get_jobs().get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_payload(job))
+
+def job_events(job_id):
+    """Stream a job's progress as Server-Sent Events until it finishes"""
+    from flask import Response, jsonify, request
+    job = get_jobs().get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    # Reconnecting EventSource clients resume after the last event they saw
     try:
-        filepath = SNAPSHOTS_DIR / filename
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID and after must be event numbers'}), 400
+
+    def stream():
+        for event, finished in get_jobs().events(job, after=after):
+            if finished:
+                yield f"event: {job.status}\ndata: {json.dumps(job_payload(job))}\n\n"
+            elif event:
+                yield f"id: {event['id']}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def job_artifact(job_id):
+    """Download the snapshot a finished job produced (?format=json|html for the other formats)"""
+    from flask import jsonify
+    from snapshot_catalog import get_catalog
+    from snapshot_tree import FORMATS
+    fmt = requested_format()
+    if not fmt:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    job = get_jobs().get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': 'Snapshot job failed', 'details': job.error}), 500
+    if job.status != 'done':
+        return jsonify({'error': 'Snapshot job not finished', 'status': job.status}), 409
+
+    entry = get_catalog().get(job.result['filename'])
+    if not entry:
+        return jsonify({'error': 'Snapshot file no longer available'}), 404
+    return send_snapshot(entry, fmt=fmt)
 
-        # Security: Ensure file is in snapshots directory
-        if not filepath.exists() or not filepath.is_relative_to(SNAPSHOTS_DIR):
+def download_snapshot(filename):
+    """Download a specific snapshot file; <name>.json and <name>.html give the other formats"""
+    from flask import jsonify
+    from werkzeug.exceptions import HTTPException
+    from snapshot_catalog import get_catalog
+    from snapshot_tree import FORMATS
+    fmt = next((fmt for fmt, (suffix, _) in FORMATS.items() if filename.endswith(suffix)), 'md')
+    filename = str(Path(filename).with_suffix(FORMATS['md'][0]))
+    try:
+        # Only catalogued snapshots can be downloaded
+        entry = get_catalog().get(filename)
+        if not entry:
             return jsonify({'error': 'File not found'}), 404
 
-        return send_file(
-            filepath,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='text/markdown'
-        )
+        return send_snapshot(entry, fmt=fmt)
 
+    except FileNotFoundError:
+        get_catalog().remove(filename)  # deleted by hand since it was catalogued
+        return jsonify({'error': 'File not found'}), 404
+    except HTTPException:
+        raise  # e.g. 416 for an unsatisfiable Range, with its Content-Range
     except Exception as e:
         return jsonify({'error': 'Failed to download file', 'details': str(e)}), 500
 
-@app.route('/list-snapshots', methods=['GET'])
 def list_snapshots():
-    """List all available snapshots"""
+    """
+    List snapshots from the catalog, newest first.
+
+    Query parameters: limit (default 10, max 100), cursor (next_cursor from
+    the previous page), since/until (ISO date or time), input_hash (prefix).
+    """
+    from flask import jsonify, request
+    from snapshot_catalog import get_catalog
     try:
-        files = sorted(SNAPSHOTS_DIR.glob('project_snapshot_*.md'),
-                      key=lambda x: x.stat().st_mtime,
-                      reverse=True)
-
-        snapshots = []
-        for f in files[:10]:  # Last 10 snapshots
-            stat = f.stat()
-            snapshots.append({
-                'filename': f.name,
-                'size': stat.st_size,
-                'created': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                'download_url': f"/download/{f.name}"
-            })
+        args = request.args
+        try:
+            limit = max(1, min(int(args.get('limit', 10)), 100))
+        except ValueError:
+            return jsonify({'error': 'limit must be a number'}), 400
+        page, total, next_cursor = get_catalog().query(
+            cursor=args.get('cursor'),
+            limit=limit,
+            since=args.get('since'),
+            until=args.get('until'),
+            input_hash=args.get('input_hash')
+        )
+
+        snapshots = [dict(entry, download_url=f"/download/{entry['filename']}", formats=format_urls(entry['filename']))
+                     for entry in page]
 
         return jsonify({
             'snapshots': snapshots,
-            'total': len(files)
+            'total': total,
+            'next_cursor': next_cursor
         })
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to list snapshots', 'details': str(e)}), 500
 
-@app.route('/health', methods=['GET'])
+def store_response(dataset, build):
+    """
+    JSON from the local store, with an ETag for this dataset version and query.
+
+    build() makes the payload and only runs when the client's copy is stale.
+    """
+    from flask import jsonify, make_response, request
+    etag = hashlib.sha256(f"{dataset.etag}?{request.query_string.decode()}".encode()).hexdigest()[:32]
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        try:
+            response = jsonify(build())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # cheap to revalidate
+    response.headers['X-Synced-From'] = dataset.path.name
+    return response
+
+def page_payload(key, rows):
+    from local_store import select
+    page, total, next_cursor = select(rows, request_args())
+    return {key: page, 'total': total, 'next_cursor': next_cursor}
+
+def request_args():
+    from flask import request
+    return request.args.to_dict()
+
+def api_tasks():
+    """
+    Tasks from the last sync, never from Notion.
+
+    Filter on any property (?status=Not started&priority=High Priority), search
+    names (q), updated_since, sort (-due_date), fields (name,status,due_date),
+    and page with limit/cursor. See local_store.select.
+    """
+    from flask import jsonify
+    from local_store import get_store
+    dataset = get_store().rows('tasks')
+    if dataset is None:
+        return jsonify({'error': 'No tasks synced yet'}), 404
+    return store_response(dataset, lambda: page_payload('tasks', dataset.data))
+
+def api_project_tasks(folder):
+    """Tasks for one project folder (same grouping as its tasks.md); same parameters as /api/tasks"""
+    from flask import jsonify
+    from local_store import get_store
+    store = get_store()
+    if folder not in store.project_folders():
+        return jsonify({'error': 'Unknown project folder', 'folders': store.project_folders()}), 404
+    dataset, tasks = store.project_tasks(folder)
+    if dataset is None:
+        return jsonify({'error': 'No tasks synced yet'}), 404
+    return store_response(dataset, lambda: dict(page_payload('tasks', tasks), project=folder))
+
+def api_index(name):
+    """One of cache/indexes; list indexes take the same parameters as /api/tasks"""
+    from flask import jsonify
+    from local_store import get_store
+    store = get_store()
+    dataset = store.index(name)
+    if dataset is None:
+        return jsonify({'error': 'Index not found', 'indexes': store.index_names()}), 404
+
+    def build():
+        if isinstance(dataset.data, list):
+            return dict(page_payload('items', dataset.data), name=name)
+        return {'name': name, 'index': dataset.data}
+    return store_response(dataset, build)
+
+def api_export():
+    """
+    Stream whole datasets: ?format=ndjson (default) or csv, ?dataset=tasks,notes
+    (default all). Takes the same filters and fields as /api/tasks.
+
+    Rows go out in chunks as they are encoded, never as one document. The
+    datasets are pinned when the request starts, so a sync finishing
+    mid-stream doesn't mix versions.
+    """
+    from flask import Response, jsonify, make_response, request
+    from local_store import export, get_store
+    args = request.args.to_dict()
+    fmt = args.pop('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    store = get_store()
+    names = [n for n in args.pop('dataset', '').split(',') if n] or store.categories()
+    datasets = [(name, store.rows(name)) for name in names]
+    missing = [name for name, dataset in datasets if dataset is None]
+    if missing:
+        return jsonify({'error': 'Not synced', 'datasets': missing, 'available': store.categories()}), 404
+
+    versions = ",".join(dataset.etag for _, dataset in datasets)
+    etag = hashlib.sha256(f"{versions}?{request.query_string.decode()}".encode()).hexdigest()[:32]
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    rows = [(name, dataset.data) for name, dataset in datasets]
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    response = Response(export(rows, args, fmt), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+    response.set_etag(etag)
+    return response
+
+def notion_webhook():
+    """
+    Receive Notion change events and queue only the refreshes they need.
+
+    Events are signed with the subscription's verification token
+    (X-Notion-Signature: sha256=...). The first request Notion sends carries
+    that token; it is logged so it can be saved as NOTION_WEBHOOK_SECRET.
+    Until it is set, every other event is refused.
+    """
+    from flask import jsonify, request
+    from notion_webhooks import WEBHOOK_EVENTS, get_refresher, get_router, describe, log_event
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Expected a JSON event'}), 400
+
+    if 'verification_token' in body:
+        print(f"[INFO] Notion webhook verification token: {body['verification_token']}")
+        print("[INFO] Set NOTION_WEBHOOK_SECRET to it and paste it into the subscription to verify")
+        return jsonify({'received': True})
+
+    # Events rewrite files under Docs/, so nothing unsigned gets through
+    secret = notion_webhook_secret()
+    if not secret:
+        WEBHOOK_EVENTS.inc(type=body.get('type', 'unknown'), result='rejected')
+        return jsonify({'error': 'Webhook secret not configured; set NOTION_WEBHOOK_SECRET'}), 503
+
+    signature = request.headers.get('X-Notion-Signature', '')
+    if not verify_webhook_signature(request.data, signature, secret):
+        WEBHOOK_EVENTS.inc(type=body.get('type', 'unknown'), result='rejected')
+        return jsonify({'error': 'Invalid signature'}), 401
+
+    log_event(body)
+    targets = get_router().plan(body)
+    queued = get_refresher().enqueue(targets)
+    WEBHOOK_EVENTS.inc(type=body.get('type', 'unknown'), result='queued' if targets else 'ignored')
+    print(f"[{datetime.now()}] Webhook {body.get('type')}: "
+          f"{', '.join(describe(t) for t in targets) or 'nothing to refresh'}")
+
+    response = jsonify({
+        'event_id': body.get('id'),
+        'targets': [describe(t) for t in targets],
+        'queued': [describe(t) for t in queued],
+        'last_batch': get_refresher().last_batch
+    })
+    # Accepted: the refresh runs in the background
+    response.status_code = 202 if targets else 200
+    return response
+
+def metrics():
+    """Prometheus text exposition of service, cache, queue and Notion sync metrics"""
+    from flask import Response
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 def health():
     """Health check endpoint"""
+    from flask import jsonify
     return jsonify({
         'status': 'healthy',
         'service': 'Notion Snapshot Generator',
@@ -176,7 +698,6 @@ def health():
         'snapshots_dir': str(SNAPSHOTS_DIR)
     })
 
-@app.route('/', methods=['GET'])
 def index():
     """Simple web interface"""
     html = """
@@ -246,28 +767,41 @@ def index():
             async function generateSnapshot() {
                 const status = document.getElementById('status');
                 status.className = 'status';
-                status.textContent = 'Generating snapshot...';
+                status.textContent = 'Queuing snapshot...';
 
                 try {
-                    const response = await fetch('/generate-snapshot-json', {
+                    const response = await fetch('/jobs/snapshot', {
                         method: 'POST',
                         headers: {'Content-Type': 'application/json'},
                         body: JSON.stringify({})
                     });
 
-                    const data = await response.json();
+                    const job = await response.json();
+                    if (!response.ok) {
+                        throw new Error(job.error);
+                    }
 
-                    if (data.success) {
+                    const events = new EventSource(job.events_url);
+                    events.addEventListener('progress', (e) => {
+                        const p = JSON.parse(e.data);
+                        status.textContent = `[${p.stage}/${p.total}] ${p.message}`;
+                    });
+                    events.addEventListener('done', (e) => {
+                        events.close();
+                        const data = JSON.parse(e.data);
                         status.className = 'status success';
                         status.innerHTML = `
-                            ✅ Snapshot generated successfully!<br>
-                            Size: ${data.size.toLocaleString()} characters<br>
-                            <a href="${data.download_url}" download>Download ${data.filename}</a>
+                            ✅ Snapshot ${data.result.cached ? 'unchanged' : 'generated successfully'}!<br>
+                            Size: ${data.result.size.toLocaleString()} characters<br>
+                            <a href="${data.artifact_url}" download>Download ${data.result.filename}</a>
                         `;
                         loadSnapshots();
-                    } else {
-                        throw new Error(data.error);
-                    }
+                    });
+                    events.addEventListener('failed', (e) => {
+                        events.close();
+                        status.className = 'status error';
+                        status.textContent = '❌ Error: ' + JSON.parse(e.data).error;
+                    });
                 } catch (error) {
                     status.className = 'status error';
                     status.textContent = '❌ Error: ' + error.message;
@@ -289,7 +823,10 @@ def index():
                                     <strong>${s.filename}</strong><br>
                                     <small>${new Date(s.created).toLocaleString()}</small>
                                 </div>
-                                <a href="${s.download_url}" download>Download</a>
+                                <span>
+                                    <a href="${s.formats.html}" target="_blank">View</a> ·
+                                    <a href="${s.download_url}" download>Download</a>
+                                </span>
                             </div>
                         `).join('');
                     }
@@ -306,20 +843,71 @@ def index():
     """
     return html
 
-def verify_webhook_signature(payload, signature):
-    """Verify webhook signature if secret is set"""
-    if not WEBHOOK_SECRET:
+def verify_webhook_signature(payload, signature, secret=None):
+    """Verify webhook signature if secret is set (bare hex or sha256=<hex>)"""
+    from notion_webhooks import sign
+    secret = secret if secret is not None else WEBHOOK_SECRET
+    if not secret:
         return True
 
-    expected = hmac.new(
-        WEBHOOK_SECRET.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
+    expected = sign(payload, secret)
+    if not signature.startswith('sha256='):
+        signature = 'sha256=' + signature
 
     return hmac.compare_digest(expected, signature)
 
+ROUTES = [
+    ('/generate-snapshot', generate_snapshot, ['POST']),
+    ('/generate-snapshot-json', generate_snapshot_json, ['POST']),
+    ('/jobs/snapshot', submit_snapshot_job, ['POST']),
+    ('/jobs/<job_id>', job_status, ['GET']),
+    ('/jobs/<job_id>/events', job_events, ['GET']),
+    ('/jobs/<job_id>/artifact', job_artifact, ['GET']),
+    ('/download/<filename>', download_snapshot, ['GET']),
+    ('/list-snapshots', list_snapshots, ['GET']),
+    ('/webhooks/notion', notion_webhook, ['POST']),
+    ('/api/tasks', api_tasks, ['GET']),
+    ('/api/projects/<folder>/tasks', api_project_tasks, ['GET']),
+    ('/api/indexes/<name>', api_index, ['GET']),
+    ('/api/export', api_export, ['GET']),
+    ('/metrics', metrics, ['GET']),
+    ('/health', health, ['GET']),
+    ('/', index, ['GET']),
+]
+
+def create_app():
+    """Build the Flask app; Flask and CORS are only imported here"""
+    from flask import Flask
+    from flask_cors import CORS
+    import notion_webhooks  # registers the webhook metrics before /metrics is scraped
+
+    # Ensure snapshots directory exists
+    SNAPSHOTS_DIR.mkdir(exist_ok=True)
+
+    app = Flask(__name__)
+    CORS(app)  # Allow cross-origin requests
+    for rule, view, methods in ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
+
+    @app.after_request
+    def count_request(response):
+        from flask import request
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+    return app
+
+def __getattr__(name):
+    # Keeps `web_service:app` working for WSGI servers without building it on import
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
+    app = create_app()
+
     print("=" * 50)
     print("🎅 Santa's Workshop Snapshot Generator")
     print("=" * 50)
@@ -327,10 +915,16 @@ if __name__ == '__main__':
     print(f"Snapshots directory: {SNAPSHOTS_DIR}")
     print("")
     print("Endpoints:")
-    print("  POST /generate-snapshot - Generate and download snapshot")
+    print("  POST /generate-snapshot - Generate and download snapshot (?format=json|html)")
     print("  POST /generate-snapshot-json - Generate and return as JSON")
+    print("  POST /jobs/snapshot - Queue a snapshot build, returns a job ID")
+    print("  GET  /jobs/<id> - Job status (/events streams progress, /artifact downloads)")
+    print("  POST /webhooks/notion - Notion change events, refreshes only what changed")
+    print("  GET  /api/tasks, /api/projects/<folder>/tasks, /api/indexes/<name> - Synced data, no Notion calls")
+    print("  GET  /api/export?format=ndjson|csv - Stream every synced row")
     print("  GET  /list-snapshots - List available snapshots")
-    print("  GET  /download/<filename> - Download specific snapshot")
+    print("  GET  /download/<filename> - Download specific snapshot (.md, .json or .html)")
+    print("  GET  /metrics - Prometheus metrics")
     print("  GET  /health - Health check")
     print("  GET  / - Web interface")
     print("")